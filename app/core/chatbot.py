@@ -1,15 +1,76 @@
-from typing import List, Dict, Any, Tuple
-from ..services.llm_service import LLMService
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from ..services.llm_service import DEGRADED_RESPONSE, ERROR_RESPONSE, LLMService
 from .rag_engine import RAGEngine
+from .intent_router import INTENT_ROUTES_TOTAL, IntentRouter, load_default_router
+from .retrieval import PayrollRetriever
 from .memory import ConversationMemory
+from .prompt_builder import PromptBuilder, estimate_tokens
 from ..models.schemas import ChatResponse, Evidence
 from ..utils.config import settings
 from ..utils.logger import logger
+from ..utils.metrics import STAGE_DURATION, metrics
+from ..utils.profiler import run_sampled
+from ..utils.resilience import remaining_time
+from ..utils.tracing import tracer
+
+SPECULATIVE_TOTAL = metrics.counter(
+    "chatbot_speculative_total",
+    "Mensagens ambíguas executadas em RAG e LLM ao mesmo tempo, por caminho vencedor (rag/llm/none)",
+)
+SPECULATIVE_WASTED_TOKENS = metrics.counter(
+    "chatbot_speculative_wasted_llm_tokens_total",
+    "Tokens estimados de chamadas especulativas ao LLM cuja resposta foi descartada",
+)
+SPECULATIVE_SAVED_SECONDS = metrics.histogram(
+    "chatbot_speculative_saved_seconds",
+    "Latência economizada em relação a tentar a rota escolhida e depois a outra",
+)
+
+# Executor único do módulo: as instâncias de Chatbot compartilham no máximo
+# SPECULATIVE_MAX_WORKERS threads, em vez de um pool por instância que nunca é fechado
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _speculative_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.SPECULATIVE_MAX_WORKERS,
+                    thread_name_prefix="speculative"
+                )
+    return _executor
+
+
+class PathResult(NamedTuple):
+    path: str                  # "rag" ou "llm"
+    text: str
+    evidence: List[Evidence]
+    sources: List[str]
+    tokens_used: int
+    prompt: Any                # BuiltPrompt do caminho LLM (None no RAG)
+    duration_s: float
+    resolved: bool = True      # RAG: RagAnswer.resolved; LLM: resposta que não é de erro/degradada
+
+
+def is_valid_result(result: PathResult) -> bool:
+    """Resposta que pode ir para o usuário sem uma nova pergunta"""
+    return result.resolved
+
 
 class Chatbot:
-    def __init__(self, rag_engine: RAGEngine, llm_service: LLMService):
+    def __init__(self, rag_engine: RAGEngine, llm_service: LLMService,
+                 intent_router: Optional[IntentRouter] = None, retriever: Optional[PayrollRetriever] = None):
         self.rag_engine = rag_engine
         self.llm_service = llm_service
+        self.intent_router = intent_router if intent_router is not None else load_default_router()
+        self.retriever = retriever
         self.memory = ConversationMemory(settings.MAX_CONVERSATION_HISTORY)
         
         # System prompt para o LLM
@@ -24,46 +85,174 @@ class Chatbot:
         Se não tiver informações suficientes, peça mais detalhes.
         Para perguntas gerais não relacionadas a folha, responda de forma útil mas breve.
         """
+        self.prompt_builder = PromptBuilder(
+            self.system_prompt,
+            max_tokens=settings.PROMPT_TOKEN_BUDGET,
+            recent_messages=settings.PROMPT_RECENT_MESSAGES,
+            summary_chars=settings.PROMPT_SUMMARY_CHARS,
+        )
     
     def process_message(self, message: str, conversation_id: str = "default") -> ChatResponse:
         """Processa mensagem e retorna resposta"""
-        
-        # Adiciona mensagem do usuário ao histórico
-        self.memory.add_message(conversation_id, "user", message)
-        
-        # Analisa intenção
-        intent = self.llm_service.extract_intent(message)
-        
-        # Processa com RAG se for sobre folha
-        if intent["is_payroll_related"]:
-            response_text, evidence = self.rag_engine.process_query(message)
-            sources = ["payroll.csv"]
-        else:
-            # Usa LLM para perguntas gerais
-            messages = self._build_messages(conversation_id, message)
-            response_text = self.llm_service.generate_response(messages)
-            evidence = []
-            sources = []
-        
-        # Adiciona resposta ao histórico
-        self.memory.add_message(conversation_id, "assistant", response_text)
-        
-        return ChatResponse(
-            response=response_text,
-            evidence=evidence,
-            sources=sources,
-            conversation_id=conversation_id
-        )
+        with tracer.start_span("chatbot.process_message", conversation_id=conversation_id) as span:
+            # Histórico anterior (sem a mensagem atual, que entra separada no prompt)
+            history = self.memory.get_history(conversation_id)
+            self.memory.add_message(conversation_id, "user", message)
+            
+            # Analisa intenção
+            with STAGE_DURATION.time(stage="intent"):
+                intent = self._route(message)
+            span.set_attribute("is_payroll_related", intent["is_payroll_related"])
+            span.set_attribute("intent.source", intent["source"])
+            if intent["confidence"] is not None:
+                span.set_attribute("intent.confidence", intent["confidence"])
+            
+            preferred = "rag" if intent["is_payroll_related"] else "llm"
+            if self._should_speculate(message, intent):
+                result = self._speculate(message, history, preferred)
+            elif preferred == "rag":
+                result = self._answer_with_rag(message)
+            else:
+                result = self._answer_with_llm(message, history)
+            if result.prompt is not None:
+                span.set_attributes(prompt_tokens=result.prompt.tokens, prompt_summarized=result.prompt.summarized,
+                                    prompt_dropped=result.prompt.dropped)
+            response_text, evidence, sources = result.text, result.evidence, result.sources
+            tokens_used = result.tokens_used
+            span.set_attribute("evidence_count", len(evidence))
+            
+            # Adiciona resposta ao histórico
+            self.memory.add_message(conversation_id, "assistant", response_text)
+            
+            return ChatResponse(
+                response=response_text,
+                evidence=evidence,
+                sources=sources,
+                conversation_id=conversation_id,
+                tokens_used=tokens_used
+            )
     
-    def _build_messages(self, conversation_id: str, current_message: str) -> List[Dict[str, str]]:
-        """Constrói lista de mensagens para o LLM"""
-        messages = [{"role": "system", "content": self.system_prompt}]
-        
-        # Adiciona histórico
-        history = self.memory.get_history(conversation_id)
-        messages.extend(history)
-        
-        # Adiciona mensagem atual
-        messages.append({"role": "user", "content": current_message})
-        
-        return messages
\ No newline at end of file
+    def _answer_with_rag(self, message: str) -> PathResult:
+        """Caminho determinístico: consulta a folha (ou a Selic) no RAGEngine"""
+        start = time.perf_counter()
+        with STAGE_DURATION.time(stage="rag"):
+            answer = self.rag_engine.answer(message)
+        return PathResult("rag", answer.text, answer.evidence, ["payroll.csv"], 0, None,
+                          time.perf_counter() - start, answer.resolved)
+
+    def _answer_with_llm(self, message: str, history: List[Dict[str, str]]) -> PathResult:
+        """Caminho do LLM, com o contexto recuperado da folha/FAQ"""
+        start = time.perf_counter()
+        evidence, passages, sources = [], [], []
+        if self.retriever is not None:
+            retrieved = self.retriever.retrieve(message, settings.RETRIEVAL_TOP_K, settings.RETRIEVAL_MIN_SCORE)
+            evidence, passages, sources = retrieved.evidence, retrieved.passages, retrieved.sources
+        with STAGE_DURATION.time(stage="build_messages"):
+            prompt = self.prompt_builder.build(history, message, evidence, passages)
+        with STAGE_DURATION.time(stage="llm"):
+            response_text = self.llm_service.generate_response(prompt.messages)
+        tokens_used = prompt.tokens + estimate_tokens(response_text)
+        return PathResult("llm", response_text, evidence, sources, tokens_used, prompt, time.perf_counter() - start,
+                          response_text not in (DEGRADED_RESPONSE, ERROR_RESPONSE))
+
+    def _should_speculate(self, message: str, intent: Dict[str, Any]) -> bool:
+        """Roteamento ambíguo: modelo abaixo do limiar, ou rota RAG sem funcionário para resolver.
+
+        Sem modelo (desligado ou sem arquivo) as palavras-chave decidem sozinhas e
+        só a segunda regra vale; senão toda mensagem dispararia uma chamada ao LLM.
+        """
+        if not settings.SPECULATIVE_ENABLED or self.rag_engine is None:
+            return False
+        if intent["source"] == "keywords" and intent["confidence"] is not None:
+            return True
+        return intent["is_payroll_related"] and not self.rag_engine.can_resolve(message)
+
+    def _speculate(self, message: str, history: List[Dict[str, str]], preferred: str) -> PathResult:
+        """Roda RAG e LLM em paralelo e devolve o primeiro resultado válido.
+
+        Se nenhum for válido, fica com o da rota escolhida pelo roteador. O
+        caminho perdedor é cancelado se ainda não começou; se já está em
+        andamento, o resultado é descartado e os tokens do LLM contam como
+        desperdício.
+        """
+        with tracer.start_span("chatbot.speculative", preferred=preferred) as span:
+            start = time.perf_counter()
+            # Cada caminho roda numa cópia do contexto atual (trace e prazo da requisição)
+            executor = _speculative_executor()
+            futures = {
+                executor.submit(contextvars.copy_context().run, run_sampled, self._answer_with_rag, message): "rag",
+                executor.submit(contextvars.copy_context().run, run_sampled,
+                                self._answer_with_llm, message, history): "llm",
+            }
+            results: Dict[str, PathResult] = {}
+            winner = None
+            pending = set(futures)
+            while pending and winner is None:
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                # Se os dois terminaram juntos, a rota escolhida tem preferência
+                for future in sorted(done, key=lambda f: futures[f] != preferred):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning("⚠️ Caminho especulativo '%s' falhou: %s", futures[future], e)
+                        continue
+                    results[result.path] = result
+                    if winner is None and is_valid_result(result):
+                        winner = result
+
+            for future in pending:
+                if not future.cancel():
+                    # Já em andamento: o resultado é ignorado, mas o custo do LLM é contabilizado
+                    future.add_done_callback(_count_wasted_tokens)
+            elapsed = time.perf_counter() - start
+
+            if winner is not None:
+                SPECULATIVE_TOTAL.inc(winner=winner.path)
+                if winner.path != preferred:
+                    # Sem especulação: rota escolhida até o fim e só então a outra
+                    fallback = results.get(preferred)
+                    SPECULATIVE_SAVED_SECONDS.observe(fallback.duration_s if fallback else elapsed)
+                result = winner
+            else:
+                SPECULATIVE_TOTAL.inc(winner="none")
+                result = results.get(preferred) or results.get("llm") or results.get("rag") or PathResult(
+                    preferred, DEGRADED_RESPONSE, [], [], 0, None, elapsed, False
+                )
+            loser = results.get("llm")
+            if loser is not None and loser is not result:
+                SPECULATIVE_WASTED_TOKENS.inc(loser.tokens_used)
+            span.set_attributes(winner=winner.path if winner else "none", elapsed_ms=round(elapsed * 1000, 1))
+            return result
+
+    def _route(self, message: str) -> Dict[str, Any]:
+        """Decide RAG ou LLM: modelo local se confiante, senão palavras-chave do LLMService.
+
+        Na rota por palavras-chave, confidence é a do modelo que ficou abaixo do
+        limiar (None quando não há modelo).
+        """
+        confidence = None
+        if self.intent_router is not None:
+            prediction = self.intent_router.predict(message)
+            confidence = round(prediction.confidence, 4)
+            if prediction.confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+                INTENT_ROUTES_TOTAL.inc(route=prediction.route, source="model")
+                return {
+                    "is_payroll_related": prediction.route == "rag",
+                    "label": prediction.label,
+                    "confidence": confidence,
+                    "source": "model",
+                }
+        intent = self.llm_service.extract_intent(message)
+        INTENT_ROUTES_TOTAL.inc(route="rag" if intent["is_payroll_related"] else "llm", source="keywords")
+        return {**intent, "confidence": confidence, "source": "keywords"}
+
+
+def _count_wasted_tokens(future):
+    """Callback do LLM especulativo descartado ainda em andamento"""
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if result.path == "llm":
+            SPECULATIVE_WASTED_TOKENS.inc(result.tokens_used)
@@ -0,0 +1,173 @@
+import math
+import os
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ..utils.config import settings
+from ..utils.logger import get_logger
+from ..utils.metrics import metrics
+
+logger = get_logger("intent")
+
+INTENT_ROUTES_TOTAL = metrics.counter(
+    "chatbot_intent_routes_total",
+    "Mensagens roteadas por destino (rag/llm) e origem da decisão (model/keywords)",
+)
+
+# Rótulos do modelo: os dois primeiros vão para o RAGEngine, "general" para o LLM
+RAG_LABELS = ("payroll", "web_search")
+GENERAL_LABEL = "general"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_DIGITS_RE = re.compile(r"[0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos e com números trocados por 0 (o valor não muda a intenção)"""
+    text = unicodedata.normalize("NFD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return _DIGITS_RE.sub("0", text)
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str, n_features: int) -> frozenset:
+    """Palavra + trigramas de caracteres; o vocabulário real é pequeno, então vale cachear"""
+    padded = f"<{word}>".encode()
+    grams = [b"w:" + word.encode()] + [b"c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+    return frozenset(zlib.crc32(g) % n_features for g in grams)
+
+
+def hashed_features(text: str, n_features: int) -> np.ndarray:
+    """Índices (únicos) de palavras, bigramas e trigramas de caracteres, via crc32 estável"""
+    words = _WORD_RE.findall(normalize(text))
+    indices = set()
+    for word in words:
+        indices |= _word_features(word, n_features)
+    indices.update(zlib.crc32(f"b:{a}_{b}".encode()) % n_features for a, b in zip(words, words[1:]))
+    return np.fromiter(indices, dtype=np.int64, count=len(indices))
+
+
+class IntentPrediction(NamedTuple):
+    label: str
+    confidence: float   # probabilidade (softmax) do rótulo escolhido
+
+    @property
+    def route(self) -> str:
+        return "rag" if self.label in RAG_LABELS else "llm"
+
+
+class IntentRouter:
+    """Classificador linear (softmax) sobre n-gramas com hashing, só CPU.
+
+    Cada mensagem vira algumas dezenas de índices; a pontuação é a soma das
+    linhas correspondentes da matriz de pesos, então a inferência custa
+    microssegundos e não depende de vocabulário salvo.
+    """
+
+    def __init__(self, labels: Sequence[str], n_features: int = 2 ** 16,
+                 weights: Optional[np.ndarray] = None, bias: Optional[np.ndarray] = None):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.weights = weights if weights is not None else np.zeros((n_features, len(self.labels)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(self.labels), dtype=np.float32)
+
+    # -----------------------
+    # Inferência
+    # -----------------------
+    def _scores(self, indices: np.ndarray) -> np.ndarray:
+        if not len(indices):
+            return self.bias.astype(np.float64)
+        return self.weights[indices].sum(axis=0, dtype=np.float64) / math.sqrt(len(indices)) + self.bias
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        exp = np.exp(scores - scores.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        return self._softmax(self._scores(hashed_features(text, self.n_features)))
+
+    def predict(self, text: str) -> IntentPrediction:
+        # Softmax em Python puro: com poucas classes é mais rápido que as chamadas do NumPy
+        scores = self._scores(hashed_features(text, self.n_features)).tolist()
+        top = max(scores)
+        best = scores.index(top)
+        return IntentPrediction(self.labels[best], 1.0 / sum(math.exp(s - top) for s in scores))
+
+    def predict_batch(self, texts: Iterable[str]) -> List[IntentPrediction]:
+        """Várias mensagens de uma vez: um único gather + reduceat na matriz de pesos"""
+        features = [hashed_features(t, self.n_features) for t in texts]
+        if not features:
+            return []
+        lengths = np.array([len(f) for f in features])
+        scores = np.tile(self.bias.astype(np.float64), (len(features), 1))
+        nonempty = lengths > 0
+        if nonempty.any():
+            flat = np.concatenate([f for f in features if len(f)])
+            offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+            sums = np.add.reduceat(self.weights[flat], offsets, axis=0)
+            scores[nonempty] += sums / np.sqrt(lengths[nonempty])[:, None]
+        proba = self._softmax(scores)
+        best = proba.argmax(axis=1)
+        return [IntentPrediction(self.labels[b], float(proba[i, b])) for i, b in enumerate(best)]
+
+    # -----------------------
+    # Treino
+    # -----------------------
+    @classmethod
+    def fit(cls, texts: Sequence[str], labels: Sequence[str], n_features: int = 2 ** 16,
+            epochs: int = 5, learning_rate: float = 0.5, l2: float = 1e-6, seed: int = 42) -> "IntentRouter":
+        """SGD sobre a entropia cruzada, um exemplo por vez (o conjunto é pequeno)"""
+        router = cls(sorted(set(labels)), n_features)
+        label_index = {label: i for i, label in enumerate(router.labels)}
+        features = [hashed_features(t, n_features) for t in texts]
+        targets = np.array([label_index[label] for label in labels])
+        weights = router.weights.astype(np.float64)
+        bias = router.bias.astype(np.float64)
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            lr = learning_rate / (1 + epoch)
+            for i in rng.permutation(len(features)):
+                indices = features[i]
+                scale = 1 / np.sqrt(len(indices)) if len(indices) else 0.0
+                proba = cls._softmax(weights[indices].sum(axis=0) * scale + bias)
+                proba[targets[i]] -= 1.0
+                weights[indices] -= lr * (scale * proba + l2 * weights[indices])
+                bias -= lr * proba
+
+        router.weights = weights.astype(np.float32)
+        router.bias = bias.astype(np.float32)
+        return router
+
+    # -----------------------
+    # Persistência
+    # -----------------------
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            labels=np.array(self.labels), n_features=np.array(self.n_features))
+
+    @classmethod
+    def load(cls, path: str) -> "IntentRouter":
+        with np.load(path) as data:
+            return cls([str(label) for label in data["labels"]], int(data["n_features"]),
+                       data["weights"], data["bias"])
+
+
+def load_default_router() -> Optional[IntentRouter]:
+    """Modelo configurado em INTENT_MODEL_PATH (None se desligado ou sem arquivo)"""
+    if not settings.INTENT_ROUTER_ENABLED:
+        return None
+    try:
+        router = IntentRouter.load(settings.INTENT_MODEL_PATH)
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("⚠️ Roteador de intenção indisponível (%s), usando palavras-chave: %s",
+                       settings.INTENT_MODEL_PATH, e)
+        return None
+    logger.info("🧭 Roteador de intenção carregado: %s (%s)", settings.INTENT_MODEL_PATH, ", ".join(router.labels))
+    return router
@@ -0,0 +1,162 @@
+import re
+import textwrap
+from typing import Dict, List, NamedTuple, Sequence
+
+from ..services.formatter import format_currency_brl
+from ..utils.metrics import metrics
+
+PROMPT_TOKENS = metrics.histogram(
+    "chatbot_prompt_tokens",
+    "Tokens estimados do prompt enviado ao LLM",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+PROMPT_TURNS_TOTAL = metrics.counter(
+    "chatbot_prompt_history_messages_total",
+    "Mensagens do histórico por tratamento no prompt (verbatim/summarized/dropped)",
+)
+
+# Overhead aproximado do formato de chat por mensagem (papel + separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_TABLE_ROW_RE = re.compile(r"^\s*\|.*\|\s*$")
+_EMPHASIS_RE = re.compile(r"(\*\*|__|`)")
+_LINK_LINE_RE = re.compile(r"^\s*🔗.*$")
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local de tokens (sem tokenizer): palavras longas valem mais de um token"""
+    return sum(1 + (len(piece) - 1) // 4 for piece in _TOKEN_RE.findall(text or ""))
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(MESSAGE_OVERHEAD_TOKENS + estimate_tokens(m["content"]) for m in messages)
+
+
+def compact_text(text: str) -> str:
+    """Remove a indentação e linhas em branco repetidas"""
+    lines = [line.strip() for line in textwrap.dedent(text).strip().splitlines()]
+    return _BLANK_LINES_RE.sub("\n", "\n".join(lines))
+
+
+def strip_evidence(text: str) -> str:
+    """Tira do histórico tabelas de evidência, linhas de fonte e marcação markdown"""
+    lines = [
+        line for line in text.splitlines()
+        if not _TABLE_ROW_RE.match(line) and not _LINK_LINE_RE.match(line)
+    ]
+    return compact_text(_EMPHASIS_RE.sub("", "\n".join(lines)))
+
+
+def summarize_turn(text: str, max_chars: int) -> str:
+    """Resumo de uma mensagem antiga: primeira frase, em uma linha, cortada em max_chars"""
+    text = " ".join(strip_evidence(text).split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(sentence) <= max_chars:
+        return sentence
+    return sentence[:max_chars - 1].rstrip() + "…"
+
+
+def evidence_line(evidence) -> str:
+    """Registro da folha em uma linha compacta para o contexto do LLM"""
+    parts = [evidence.name, evidence.competency, f"líquido {format_currency_brl(evidence.net_pay)}"]
+    if evidence.bonus:
+        parts.append(f"bônus {format_currency_brl(evidence.bonus)}")
+    if evidence.deductions_inss is not None:
+        parts.append(f"INSS {format_currency_brl(evidence.deductions_inss)}")
+    if evidence.deductions_irrf is not None:
+        parts.append(f"IRRF {format_currency_brl(evidence.deductions_irrf)}")
+    parts.append(f"pago em {evidence.payment_date}")
+    return "- " + " | ".join(parts)
+
+
+CONTEXT_HEADER = "Dados recuperados da folha e das políticas (use apenas se forem relevantes):"
+
+
+class BuiltPrompt(NamedTuple):
+    messages: List[Dict[str, str]]
+    tokens: int        # tokens estimados do prompt completo
+    summarized: int    # mensagens antigas que entraram só como resumo
+    dropped: int       # mensagens que não couberam no orçamento
+
+
+class PromptBuilder:
+    """Monta o prompt do LLM dentro de um orçamento de tokens.
+
+    As recent_messages mensagens mais novas do histórico entram inteiras
+    (sem evidências); as anteriores viram um resumo de uma linha cada, num
+    único bloco. Do mais novo para o mais antigo, o que não couber no
+    orçamento fica de fora. O system prompt e a mensagem atual sempre entram;
+    o contexto recuperado (evidências e trechos de FAQ) tem prioridade sobre
+    o histórico.
+    """
+
+    def __init__(self, system_prompt: str, max_tokens: int = 1500, recent_messages: int = 4,
+                 summary_chars: int = 160):
+        self.system_message = {"role": "system", "content": compact_text(system_prompt)}
+        self.max_tokens = max_tokens
+        self.recent_messages = recent_messages
+        self.summary_chars = summary_chars
+
+    def build(self, history: List[Dict[str, str]], current_message: str,
+              evidence: Sequence = (), passages: Sequence = ()) -> BuiltPrompt:
+        current = {"role": "user", "content": current_message}
+        budget = self.max_tokens - count_message_tokens([self.system_message, current])
+
+        # Contexto recuperado, na ordem de relevância, enquanto couber
+        context_lines: List[str] = []
+        candidates = [evidence_line(e) for e in evidence] + [f"- {p.title}: {p.text}" for p in passages]
+        if candidates:
+            budget -= MESSAGE_OVERHEAD_TOKENS + estimate_tokens(CONTEXT_HEADER)
+            for line in candidates:
+                cost = estimate_tokens(line)
+                if cost > budget:
+                    break
+                context_lines.append(line)
+                budget -= cost
+
+        split = max(0, len(history) - self.recent_messages)
+        older, recent = history[:split], history[split:]
+
+        # Recentes: do mais novo para o mais antigo, enquanto couber
+        kept: List[Dict[str, str]] = []
+        for message in reversed(recent):
+            content = strip_evidence(message["content"])
+            cost = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(content)
+            if not content or cost > budget:
+                break
+            kept.append({"role": message["role"], "content": content})
+            budget -= cost
+        kept.reverse()
+        dropped = len(recent) - len(kept)
+
+        # Antigas: só se todas as recentes couberam, resumidas num bloco
+        summary_lines: List[str] = []
+        if not dropped and older:
+            budget -= MESSAGE_OVERHEAD_TOKENS + estimate_tokens("Resumo da conversa anterior:")
+            for message in reversed(older):
+                speaker = "Usuário" if message["role"] == "user" else "Assistente"
+                line = f"- {speaker}: {summarize_turn(message['content'], self.summary_chars)}"
+                cost = estimate_tokens(line)
+                if cost > budget:
+                    break
+                summary_lines.append(line)
+                budget -= cost
+            summary_lines.reverse()
+        dropped += len(older) - len(summary_lines)
+
+        messages = [self.system_message]
+        if context_lines:
+            messages.append({"role": "system", "content": CONTEXT_HEADER + "\n" + "\n".join(context_lines)})
+        if summary_lines:
+            messages.append({"role": "system", "content": "Resumo da conversa anterior:\n" + "\n".join(summary_lines)})
+        messages.extend(kept)
+        messages.append(current)
+
+        tokens = count_message_tokens(messages)
+        PROMPT_TOKENS.observe(tokens)
+        PROMPT_TURNS_TOTAL.inc(len(kept), treatment="verbatim")
+        PROMPT_TURNS_TOTAL.inc(len(summary_lines), treatment="summarized")
+        PROMPT_TURNS_TOTAL.inc(dropped, treatment="dropped")
+        return BuiltPrompt(messages, tokens, len(summary_lines), dropped)
@@ -1,102 +1,172 @@
 import re
-import sys
 import os
-from typing import List, Tuple, Optional, Dict, Any
-import requests
+from datetime import date, timedelta
+from typing import List, NamedTuple, Tuple, Optional, Dict, Any
 
-# ================================
-# Imports locais com fallback
-# ================================
-try:
-    from ..services.payroll_service import PayrollService
-    from ..services.formatter import format_currency_brl, format_payment_date
-    from ..models.schemas import Evidence
-    from ...logger import logger
-except ImportError:
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-    try:
-        from app.services.payroll_service import PayrollService
-        from app.services.formatter import format_currency_brl, format_payment_date
-        from app.models.schemas import Evidence
-        from logger import logger
-    except ImportError:
-        class PayrollService:
-            def get_employee_records(self, name): 
-                return type('obj', (object,), {'empty': True, 'iloc': []})()
-            def search_by_competency(self, comp, name): 
-                return type('obj', (object,), {'empty': True, 'iloc': []})()
-            def find_max_bonus(self, name): 
-                return type('obj', (object,), {'empty': True, 'iloc': []})()
-            def to_evidence(self, records): return []
-            def get_empty_dataframe(self): 
-                return type('obj', (object,), {'empty': True})()
-        
-        def format_currency_brl(value): return f"R$ {value:,.2f}"
-        def format_payment_date(date): return date
-        
-        class Evidence: pass
-        
-        class Logger:
-            def info(self, msg): print(f"INFO: {msg}")
-            def error(self, msg): print(f"ERROR: {msg}")
-            def warning(self, msg): print(f"WARNING: {msg}")
-        
-        logger = Logger()
+from ..services.payroll_service import PayrollService
+from ..services.formatter import format_currency_brl, format_payment_date, format_age
+from ..services.payroll_simulation import PayrollSimulator
+from ..services.selic import load_selic_series
+from ..models.schemas import Evidence, SimulationScenario
+from ..utils.metrics import STAGE_DURATION, RAG_QUERIES_TOTAL
+from ..utils.tracing import tracer, current_span
+from ..utils.logger import get_logger
+from ..utils.config import settings
+from ..utils.http import get_http_session
+from ..utils.swr_cache import web_facts
+from ..utils.resilience import CircuitOpenError, DeadlineExceeded, get_breaker, outbound_timeout
+from ..utils.singleflight import SingleFlight
+
+logger = get_logger("rag")
 
 # ================================
 # RAG Engine
 # ================================
+# Perguntas simultâneas sobre a Selic compartilham uma única chamada à Serper
+_serper_flight = SingleFlight("serper")
+
+
+class RagRoute(NamedTuple):
+    query_type: str              # handler escolhido (ou web_search, employee_not_found, general_without_employee)
+    employee_names: List[str]    # funcionários citados, na ordem da consulta
+    date_info: Dict[str, Any]    # período extraído (vazio nas rotas que não usam)
+
+    @property
+    def employee_name(self) -> Optional[str]:
+        return self.employee_names[0] if self.employee_names else None
+
+
+class RagAnswer(NamedTuple):
+    text: str
+    evidence: List[Evidence]
+    resolved: bool = True        # False quando o RAG não respondeu a pergunta (pede dados, erro, fora do escopo)
+
+
 class RAGEngine:
+    # Sem funcionário, estes termos indicam pergunta de folha (o RAG pede o nome)
+    PAYROLL_TERMS = ['salário', 'salario', 'líquido', 'liquido', 'bruto', 'inss', 'irrf', 'bônus', 'bonus',
+                     'pagamento', 'holerite', 'recebi', 'desconto', 'folha', 'contracheque']
+
     def __init__(self, payroll_service: PayrollService):
         self.payroll_service = payroll_service
+        self._simulator = None
+        self._selic_series = None
         logger.info("RAGEngine inicializado!")
 
     def process_query(self, query: str) -> Tuple[str, List[Evidence]]:
-        try:
-            logger.info(f"Processando query: '{query}'")
-            
-            if self._is_web_search_query(query):
-                return self._handle_web_search(query)
+        answer = self.answer(query)
+        return answer.text, answer.evidence
 
-            employee_name = self._extract_employee_name(query)
-            logger.info(f"Funcionário detectado: '{employee_name}'")
-            
-            # Se não encontrou funcionário
-            if not employee_name:
-                payroll_terms = ['salário', 'salario', 'líquido', 'liquido', 'bruto', 'inss', 'irrf', 'bônus', 'bonus', 'pagamento', 'holerite', 'recebi', 'desconto', 'folha', 'contracheque']
-                query_terms = query.lower()
-                if any(term in query_terms for term in payroll_terms):
-                    return self._get_employee_not_found_message(query, "")
-                else:
-                    return self._handle_general_query_without_employee(query)
-            
-            if not self._employee_exists(employee_name):
-                return self._get_employee_not_found_message(query, employee_name)
+    def answer(self, query: str) -> RagAnswer:
+        """Como process_query, indicando também se o RAG resolveu a pergunta"""
+        with tracer.start_span("rag.process_query") as span:
+            answer = self._process_query(query)
+            if not isinstance(answer, RagAnswer):
+                answer = RagAnswer(*answer)
+            span.set_attribute("evidence_count", len(answer.evidence))
+            span.set_attribute("resolved", answer.resolved)
+            return answer
+
+    def can_resolve(self, query: str) -> bool:
+        """Checagem barata: a consulta tem um funcionário, é sobre a empresa, é auditoria/simulação ou é busca na web (senão o RAG pede mais dados)"""
+        return (self._is_web_search_query(query) or self._extract_employee_name(query) is not None
+                or self._is_analytics_query(query) or self._is_audit_query(query)
+                or self._is_simulation_query(query))
+
+    def route(self, query: str) -> RagRoute:
+        """Rota que _process_query toma para a consulta, sem executar o handler.
+
+        Também usada pelos benchmarks de roteamento e pelo teste de carga, para
+        que os rótulos de query_type sejam sempre os da produção.
+        """
+        # Correção pela série Selic local (antes da busca na web, que também reage a "selic")
+        if self._is_selic_correction_query(query):
+            return RagRoute("selic_correction", [], {})
+        if self._is_web_search_query(query):
+            return RagRoute("web_search", [], {})
 
+        with STAGE_DURATION.time(stage="name_extraction"):
+            employee_names = self._extract_employee_names(query)
+        employee_name = employee_names[0] if employee_names else None
+
+        # Mais de um funcionário: comparação num único agrupamento
+        if len(employee_names) > 1:
+            return RagRoute("comparison", employee_names, self._extract_date_info(query))
+
+        if not employee_name:
+            # Perguntas sobre a folha inteira: simulação, auditoria e agregados da empresa
+            for query_type, matches in (("simulation", self._is_simulation_query),
+                                        ("audit", self._is_audit_query),
+                                        ("analytics", self._is_analytics_query)):
+                if matches(query):
+                    return RagRoute(query_type, [], self._extract_date_info(query))
+            query_lower = query.lower()
+            if any(term in query_lower for term in self.PAYROLL_TERMS):
+                return RagRoute("employee_not_found", [], {})
+            return RagRoute("general_without_employee", [], {})
+
+        if not self._employee_exists(employee_name):
+            return RagRoute("employee_not_found", employee_names, {})
+
+        with STAGE_DURATION.time(stage="date_extraction"):
             date_info = self._extract_date_info(query)
-            logger.info(f"Data info: {date_info}")
-            
+        with STAGE_DURATION.time(stage="classification"):
             query_type = self._classify_query(query)
-            logger.info(f"Tipo de query: {query_type}")
+        return RagRoute(query_type, employee_names, date_info)
+
+    def _process_query(self, query: str) -> Tuple[str, List[Evidence]]:
+        try:
+            logger.debug("Processando query: '%s'", query)
+            route = self.route(query)
+            employee_name, date_info = route.employee_name, route.date_info
+            current_span().set_attribute("query_type", route.query_type)
+            if route.employee_names:
+                current_span().set_attribute("employee", ", ".join(route.employee_names))
+
+            if route.query_type == "web_search":
+                return self._handle_web_search(query)
+            if route.query_type == "employee_not_found":
+                return self._get_employee_not_found_message(query, employee_name or "")
+            if route.query_type == "general_without_employee":
+                return self._handle_general_query_without_employee(query)
+
+            if employee_name and route.query_type != "comparison":
+                logger.info("Query roteada | tipo: %s | funcionário: %s | período: %s",
+                            route.query_type, employee_name, date_info.get('competency', date_info.get('year')))
+            RAG_QUERIES_TOTAL.inc(query_type=route.query_type)
 
             # Roteia para o tipo de consulta
-            if query_type == "net_pay_specific":
-                return self._handle_net_pay_specific(employee_name, date_info, query)
-            elif query_type == "net_pay_aggregate":
-                return self._handle_net_pay_aggregate(employee_name, date_info, query)
-            elif query_type == "deduction_query":
-                return self._handle_deduction_query(employee_name, date_info, query)
-            elif query_type == "bonus_query":
-                return self._handle_bonus_query(employee_name, date_info, query)
-            elif query_type == "payment_date_query":
-                return self._handle_payment_date_query(employee_name, date_info, query)
-            else:
-                return self._handle_general_query(employee_name, query)
+            with STAGE_DURATION.time(stage="handler"):
+                if route.query_type == "selic_correction":
+                    return self._handle_selic_correction(query)
+                elif route.query_type == "comparison":
+                    return self._handle_comparison(route.employee_names, date_info, query)
+                elif route.query_type == "analytics":
+                    return self._handle_analytics(date_info, query)
+                elif route.query_type == "simulation":
+                    return self._handle_simulation(employee_name, date_info, query)
+                elif route.query_type == "audit":
+                    return self._handle_audit(employee_name, date_info, query)
+                elif route.query_type == "running_total":
+                    return self._handle_running_total(employee_name, date_info, query)
+                elif route.query_type == "net_pay_specific":
+                    return self._handle_net_pay_specific(employee_name, date_info, query)
+                elif route.query_type == "net_pay_aggregate":
+                    return self._handle_net_pay_aggregate(employee_name, date_info, query)
+                elif route.query_type == "deduction_query":
+                    return self._handle_deduction_query(employee_name, date_info, query)
+                elif route.query_type == "bonus_query":
+                    return self._handle_bonus_query(employee_name, date_info, query)
+                elif route.query_type == "payment_date_query":
+                    return self._handle_payment_date_query(employee_name, date_info, query)
+                else:
+                    return self._handle_general_query(employee_name, query)
                 
         except Exception as e:
             error_msg = f"❌ Erro crítico no processamento: {e}"
-            logger.error(error_msg)
-            return error_msg, []
+            logger.error("❌ Erro crítico no processamento: %s", e)
+            current_span().set_status(False, str(e))
+            return RagAnswer(error_msg, [], resolved=False)
 
     # -----------------------
     # Validações e helpers
@@ -115,7 +185,7 @@ class RAGEngine:
         message += f"👥 Funcionários disponíveis: {available_employees}\n\n"
         message += "💡 **Dica:** Use o nome completo do funcionário para obter informações precisas.\n\n"
         message += "📋 Exemplos de consulta:\n• `Qual o salário da Ana Souza?`\n• `Quanto recebeu Bruno Lima em junho?`\n• `Mostre os descontos da Ana`\n• `Quando foi pago o salário do Bruno?`"
-        return message, []
+        return RagAnswer(message, [], resolved=False)
 
     def _is_web_search_query(self, query: str) -> bool:
         query_lower = query.lower()
@@ -130,25 +200,59 @@ class RAGEngine:
         if any(term in query_lower for term in ['selic', 'taxa selic', 'juros básicos']):
             return self._fetch_selic_web()
         else:
-            return "Busca na web disponível apenas para taxa Selic no momento.", []
+            return RagAnswer("Busca na web disponível apenas para taxa Selic no momento.", [], resolved=False)
 
     def _fetch_selic_web(self) -> Tuple[str, List[Evidence]]:
         api_key = os.getenv("SERPER_API_KEY")
         if not api_key:
-            return "❌ Chave SERPER_API_KEY não configurada no arquivo .env", []
+            return RagAnswer("❌ Chave SERPER_API_KEY não configurada no arquivo .env", [], resolved=False)
+        span = current_span()
         try:
-            url = "https://api.serper.dev/search"
-            headers = {"X-API-KEY": api_key}
-            payload = {"q": "taxa Selic atual site:bcb.gov.br", "num": 1}
-            resp = requests.post(url, json=payload, headers=headers, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            snippet = data.get("organic", [{}])[0].get("snippet", "Informação não encontrada")
-            link = data.get("organic", [{}])[0].get("link", "https://www.bcb.gov.br")
-            response = f"💰 **Taxa Selic atual:** {snippet}\n\n🔗 **Fonte oficial:** {link}"
-            return response, []
+            cached = web_facts.get(
+                "selic",
+                lambda: _serper_flight.do("selic", lambda: self._query_serper_selic(api_key)),
+                ttl_s=settings.SELIC_CACHE_TTL_S
+            )
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # Resposta degradada imediata em vez de esperar o timeout da Serper
+            span.set_attribute("degraded", True)
+            logger.warning("⚠️ Selic indisponível, resposta degradada: %s", e)
+            return "⚠️ A consulta da taxa Selic está temporariamente indisponível. Tente novamente em alguns instantes.", []
         except Exception as e:
-            return f"❌ Erro ao buscar taxa Selic na web: {e}", []
+            return RagAnswer(f"❌ Erro ao buscar taxa Selic na web: {e}", [], resolved=False)
+
+        span.set_attribute("cache.source", cached.source)
+        span.set_attribute("cache.age_s", round(cached.age_s, 1))
+        span.set_attribute("cache.stale", cached.stale)
+
+        selic = cached.value
+        response = f"💰 **Taxa Selic atual:** {selic['snippet']}\n\n🔗 **Fonte oficial:** {selic['link']}"
+        response += f"\n\n🕒 Consultado {format_age(cached.age_s)}"
+        if cached.stale:
+            response += " (atualizando em segundo plano)"
+        return response, []
+
+    def _query_serper_selic(self, api_key: str) -> Dict[str, str]:
+        """Busca a Selic na Serper (chamado pelo cache em falta ou no refresh)"""
+        url = f"{settings.SERPER_BASE_URL.rstrip('/')}/search"
+        headers = {"X-API-KEY": api_key}
+        payload = {"q": "taxa Selic atual site:bcb.gov.br", "num": 1}
+        timeout = outbound_timeout(settings.SERPER_TIMEOUT_S, "serper")
+        with STAGE_DURATION.time(stage="serper"), \
+                tracer.start_span("http.serper", url=url, timeout_s=round(timeout, 2)) as span:
+            resp = get_breaker("serper").call(self._post_json, url, payload, headers, timeout)
+            span.set_attribute("status_code", resp.status_code)
+        organic = resp.json().get("organic") or [{}]
+        return {
+            "snippet": organic[0].get("snippet", "Informação não encontrada"),
+            "link": organic[0].get("link", "https://www.bcb.gov.br"),
+        }
+
+    @staticmethod
+    def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float):
+        resp = get_http_session().post(url, json=payload, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp
 
     # -----------------------
     # Extração de datas
@@ -194,27 +298,44 @@ class RAGEngine:
     # -----------------------
     # Extração de funcionários
     # -----------------------
+    EMPLOYEE_ALIASES = {
+        'ana souza': ['ana souza', 'ana', 'souza', 'ana s', 'a. souza'],
+        'bruno lima': ['bruno lima', 'bruno', 'lima', 'bruno l', 'b. lima']
+    }
+
     def _extract_employee_name(self, query: str) -> Optional[str]:
-        query_lower = query.lower()
-        employee_mapping = {
-            'ana souza': ['ana souza', 'ana', 'souza', 'ana s', 'a. souza'],
-            'bruno lima': ['bruno lima', 'bruno', 'lima', 'bruno l', 'b. lima']
-        }
-        query_clean = re.sub(r'[^\w\s]', ' ', query)
-        query_clean_lower = query_clean.lower()
-        for full_name, variations in employee_mapping.items():
-            for variation in variations:
-                if re.search(rf'\b{re.escape(variation)}\b', query_clean_lower):
-                    match = re.search(rf'\b{variation}\b', query_clean, re.IGNORECASE)
-                    if match:
-                        return full_name  # Retorna nome completo
-        return None
+        names = self._extract_employee_names(query)
+        return names[0] if names else None
+
+    def _extract_employee_names(self, query: str) -> List[str]:
+        """Todos os funcionários citados na consulta (nome completo, sem repetição)"""
+        query_clean_lower = re.sub(r'[^\w\s]', ' ', query).lower()
+        names = []
+        for full_name, variations in self.EMPLOYEE_ALIASES.items():
+            if any(re.search(rf'\b{re.escape(variation)}\b', query_clean_lower) for variation in variations):
+                names.append(full_name)
+        return names
 
     # -----------------------
     # Classificação de query
     # -----------------------
+    RUNNING_TOTAL_PATTERN = re.compile(
+        r'acumulad|at[ée] agora|at[ée] o momento|at[ée] hoje|\bno ano\b|desde o in[ií]cio do ano'
+    )
+    MONTH_WORD = (r'(jan(?:eiro)?|fev(?:ereiro)?|mar(?:[çc]o)?|abr(?:il)?|mai(?:o)?|jun(?:ho)?|jul(?:ho)?'
+                  r'|ago(?:sto)?|set(?:embro)?|out(?:ubro)?|nov(?:embro)?|dez(?:embro)?)')
+    MONTH_RANGE_PATTERN = re.compile(rf'\b(?:de|desde)\s+{MONTH_WORD}\s+(?:a|at[ée])\s+{MONTH_WORD}\b')
+    MONTH_UNTIL_PATTERN = re.compile(rf'\bat[ée]\s+{MONTH_WORD}\b')
+    MONTH_PREFIXES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
     def _classify_query(self, query: str) -> str:
         query_lower = query.lower()
+        if self._is_simulation_query(query):
+            return "simulation"
+        if self._is_audit_query(query):
+            return "audit"
+        if self.RUNNING_TOTAL_PATTERN.search(query_lower) or self.MONTH_RANGE_PATTERN.search(query_lower):
+            return "running_total"
         if any(term in query_lower for term in ['quanto recebi', 'salário líquido', 'salario liquido', 'líquido', 'liquido', 'total líquido', 'total liquido', 'recebi']):
             if any(term in query_lower for term in ['trimestre', 'total', 'soma']):
                 return "net_pay_aggregate"
@@ -244,7 +365,7 @@ class RAGEngine:
             response = f"**{employee_name}** recebeu {format_currency_brl(record['net_pay'])} em {self._format_month_year(record['competency'])}."
             return response, evidence
         except Exception as e:
-            return f"❌ Erro ao processar consulta de salário: {e}", []
+            return RagAnswer(f"❌ Erro ao processar consulta de salário: {e}", [], resolved=False)
 
     def _handle_net_pay_aggregate(self, employee_name: str, date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
         try:
@@ -265,7 +386,7 @@ class RAGEngine:
             response = f"O total líquido de **{employee_name}** {period_desc} foi {format_currency_brl(total_net)}."
             return response, evidence
         except Exception as e:
-            return f"❌ Erro ao processar consulta agregada: {e}", []
+            return RagAnswer(f"❌ Erro ao processar consulta agregada: {e}", [], resolved=False)
 
     def _handle_payment_date_query(self, employee_name: str, date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
         try:
@@ -280,7 +401,7 @@ class RAGEngine:
             response = f"O salário de **{employee_name}** foi pago em {format_payment_date(record['payment_date'])}, e o líquido recebido foi {format_currency_brl(record['net_pay'])}."
             return response, evidence
         except Exception as e:
-            return f"❌ Erro ao processar consulta de data de pagamento: {e}", []
+            return RagAnswer(f"❌ Erro ao processar consulta de data de pagamento: {e}", [], resolved=False)
 
     def _handle_deduction_query(self, employee_name: str, date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
         deduction_type = 'INSS' if 'inss' in query.lower() else 'IRRF'
@@ -314,8 +435,364 @@ class RAGEngine:
         response = f"Encontrei {len(records)} registros para **{employee_name}**. O mais recente é {self._format_month_year(latest['competency'])}, líquido {format_currency_brl(latest['net_pay'])}."
         return response, evidence
 
+    def _handle_running_total(self, employee_name: str, date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
+        """Acumulado no ano ou entre dois meses, pelas somas acumuladas do funcionário"""
+        query_lower = query.lower()
+        field, label = self._query_field(query)
+        year = date_info['year']
+        if not re.search(r'20\d{2}', query):
+            # "até agora" sem ano: o ano da última competência do funcionário
+            last = self.payroll_service.last_competency(employee_name)
+            year = int(last[:4]) if last else year
+
+        range_match = self.MONTH_RANGE_PATTERN.search(query_lower)
+        until_match = self.MONTH_UNTIL_PATTERN.search(query_lower)
+        if range_match:
+            start = f"{year}-{self._month_from_word(range_match.group(1)):02d}"
+            end = f"{year}-{self._month_from_word(range_match.group(2)):02d}"
+        else:
+            start = f"{year}-01"
+            end = (f"{year}-{self._month_from_word(until_match.group(1)):02d}" if until_match
+                   else self.payroll_service.last_competency(employee_name, year))
+        totals = self.payroll_service.period_totals(employee_name, start, end) if end else None
+        if not totals or start > end:
+            return f"Não foram encontrados registros de {label} para {employee_name} no ano de {year}.", []
+
+        records = self.payroll_service.data.iloc[self.payroll_service.record_positions(employee_name, year=year)]
+        records = records[(records['competency'] >= start) & (records['competency'] <= end)]
+        if records.empty:
+            return f"Não foram encontrados registros de {label} para {employee_name} no ano de {year}.", []
+        response = (f"O acumulado de **{label}** de **{employee_name}** de {self._format_month_year(start)} "
+                    f"a {self._format_month_year(end)} foi {format_currency_brl(totals[field])} "
+                    f"({len(records)} competências).")
+        return response, self.payroll_service.to_evidence(records)
+
+    def _month_from_word(self, word: str) -> int:
+        return self.MONTH_PREFIXES.index(word[:3]) + 1
+
+    QUERY_FIELDS = [
+        (['salário base', 'salario base', 'bruto'], 'base_salary', 'salário base'),
+        (['bônus', 'bonus'], 'bonus', 'bônus'),
+        (['inss'], 'deductions_inss', 'INSS'),
+        (['irrf'], 'deductions_irrf', 'IRRF'),
+    ]
+
+    def _handle_comparison(self, employee_names: List[str], date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
+        field, label = self._query_field(query)
+        period_desc = self._get_period_description(date_info)
+        records, table = self.payroll_service.compare_employees(
+            employee_names, field, self._period_competencies(date_info)
+        )
+        if table.empty:
+            return f"Não foram encontrados registros para {' e '.join(n.title() for n in employee_names)} {period_desc}.", []
+
+        # Ranking pelo total do período e diferença para o primeiro colocado
+        totals = table.sum().sort_values(ascending=False)
+        leader, leader_total = totals.index[0], totals.iloc[0]
+        lines = [f"📊 Comparação de **{label}** {period_desc}:", ""]
+        for rank, (name, total) in enumerate(totals.items(), 1):
+            gap = f" ({format_currency_brl(leader_total - total)} a menos que {leader})" if rank > 1 else ""
+            lines.append(f"{rank}º **{name}**: {format_currency_brl(total)}{gap}")
+        missing = [n.title() for n in employee_names if n.title() not in table.columns]
+        if missing:
+            lines.append(f"Sem registros no período: {', '.join(missing)}.")
+
+        # Mês a mês, com a diferença entre os dois primeiros (ou a amplitude, com mais nomes)
+        if len(table) > 1:
+            ordered = table[list(totals.index)]
+            if len(ordered.columns) == 2:
+                delta_label, deltas = f"Diferença ({leader} − {ordered.columns[1]})", ordered.iloc[:, 0] - ordered.iloc[:, 1]
+            else:
+                delta_label, deltas = "Amplitude", ordered.max(axis=1) - ordered.min(axis=1)
+            lines += ["", "| Competência | " + " | ".join(ordered.columns) + f" | {delta_label} |",
+                      "|---" * (len(ordered.columns) + 2) + "|"]
+            for competency, row in ordered.iterrows():
+                values = " | ".join(format_currency_brl(v) if v == v else "-" for v in row)
+                lines.append(f"| {self._format_month_year(competency)} | {values} | {format_currency_brl(deltas[competency])} |")
+        return "\n".join(lines), self.payroll_service.to_evidence(records)
+
+    ANALYTICS_PATTERN = re.compile(
+        r'folha total|total da folha|\btop\s*\d*\b|\bmaiores\b|\bm[ée]dia\b|\bmediana\b|\bpercentil\b|\bp\d{2}\b'
+        r'|\bempresa\b|todos os funcion[aá]rios|por m[eê]s|\bmensal\b'
+    )
+
+    def _is_analytics_query(self, query: str) -> bool:
+        return bool(self.ANALYTICS_PATTERN.search(query.lower()))
+
+    def _handle_analytics(self, date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
+        query_lower = query.lower()
+        field, label = self._query_field(query)
+        analytics = self.payroll_service.analytics
+        if 'trimestre' in query_lower and 'quarter' not in date_info and analytics.competencies:
+            # "do trimestre" sem número: o trimestre mais recente da folha
+            latest = max(analytics.competencies)
+            date_info = {'year': int(latest[:4]), 'quarter': (int(latest[5:7]) - 1) // 3 + 1}
+        competencies = self._period_competencies(date_info)
+        period_desc = self._get_period_description(date_info)
+
+        top_match = re.search(r'top\s*(\d+)|(\d+)\s+maiores', query_lower)
+        if top_match or re.search(r'\btop\b|\bmaiores\b', query_lower):
+            n = int(top_match.group(1) or top_match.group(2)) if top_match else 10
+            top = analytics.top(field, competencies, n)
+            if not top:
+                return f"Não foram encontrados registros de {label} {period_desc}.", []
+            records = self.payroll_service.data.iloc[[position for _, position in top]]
+            lines = [f"🏆 Top {len(top)} de **{label}** {period_desc}:", ""]
+            for rank, row in enumerate(records.to_dict('records'), 1):
+                lines.append(f"{rank}. **{row['name']}** ({self._format_month_year(row['competency'])}): "
+                             f"{format_currency_brl(row[field])}")
+            return "\n".join(lines), self.payroll_service.to_evidence(records)
+
+        if re.search(r'por m[eê]s|\bmensal\b', query_lower):
+            stat, stat_label = ('mean', 'Média') if re.search(r'\bm[ée]dia\b', query_lower) else ('total', 'Total')
+            rows = [row for row in analytics.by_competency(field, competencies) if row['count']]
+            if not rows:
+                return f"Não foram encontrados registros de {label} {period_desc}.", []
+            lines = [f"📅 {stat_label} de **{label}** por mês {period_desc}:", "",
+                     f"| Competência | {stat_label} | Registros |", "|---|---|---|"]
+            lines += [f"| {self._format_month_year(row['competency'])} | {format_currency_brl(row[stat])} | {row['count']} |"
+                      for row in rows]
+            return "\n".join(lines), []
+
+        percentile = re.search(r'percentil\s*(\d{1,2})|\bp(\d{2})\b', query_lower)
+        q = int(percentile.group(1) or percentile.group(2)) / 100 if percentile else 0.5
+        summary = analytics.summary(field, competencies, quantiles=sorted({0.5, 0.9, q}))
+        if not summary['count']:
+            return f"Não foram encontrados registros de {label} {period_desc}.", []
+        if percentile or 'mediana' in query_lower:
+            value = summary[f"p{round(q * 100):g}"]
+            name = f"O percentil {round(q * 100)}" if percentile else "A mediana"
+            return f"{name} de **{label}** {period_desc} é {format_currency_brl(value)} (estimativa, {summary['count']} registros).", []
+        if re.search(r'\bm[ée]dia\b', query_lower):
+            return f"A média de **{label}** {period_desc} foi {format_currency_brl(summary['mean'])} ({summary['count']} registros).", []
+        return (
+            f"📊 Total de **{label}** da empresa {period_desc}: {format_currency_brl(summary['total'])} "
+            f"em {summary['count']} registros.\n"
+            f"Média {format_currency_brl(summary['mean'])} · mediana {format_currency_brl(summary['p50'])} · "
+            f"p90 {format_currency_brl(summary['p90'])} · maior {format_currency_brl(summary['max'])}"
+        ), []
+
+    AUDIT_PATTERN = re.compile(
+        r'audit|\bconfer|\bcorret[oa]s?\b|\bcert[oa]s?\b|\bbate[m]? com\b|diverg|recalcul|tabela oficial'
+    )
+    AUDIT_LABELS = {'deductions_inss': 'INSS', 'deductions_irrf': 'IRRF', 'net_pay': 'líquido'}
+
+    def _is_audit_query(self, query: str) -> bool:
+        return bool(self.AUDIT_PATTERN.search(query.lower()))
+
+    def _handle_audit(self, employee_name: Optional[str], date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
+        """Recalcula INSS/IRRF/líquido pelas tabelas oficiais e lista as maiores divergências"""
+        query_lower = query.lower()
+        if 'competency' in date_info:
+            result = self.payroll_service.audit(employee_name, competency=date_info['competency'])
+            period_desc = self._get_period_description(date_info)
+        elif re.search(r'20\d{2}', query):
+            result = self.payroll_service.audit(employee_name, year=date_info['year'])
+            period_desc = f"no ano de {date_info['year']}"
+        else:
+            result = self.payroll_service.audit(employee_name)
+            period_desc = "em todo o histórico"
+        who = f"de **{employee_name}**" if employee_name else "da folha"
+        if not result.rows:
+            return f"Não foram encontrados registros com tabela de INSS/IRRF vigente {who} {period_desc}.", []
+
+        fields = [field for field, label in self.AUDIT_LABELS.items() if label.lower() in query_lower]
+        mismatches = result.mismatches
+        if fields:
+            mismatches = mismatches[mismatches['field'].isin(fields)]
+        checked = ", ".join(self.AUDIT_LABELS[f] for f in (fields or self.AUDIT_LABELS))
+        tolerance = format_currency_brl(result.tolerance)
+        if mismatches.empty:
+            return (f"✅ Auditoria {who} {period_desc}: {result.rows} registros conferidos, {checked} "
+                    f"batem com as tabelas oficiais (tolerância {tolerance})."), []
+
+        counts = mismatches['field'].value_counts()
+        lines = [
+            f"🔎 Auditoria {who} {period_desc}: {mismatches['position'].nunique()} de {result.rows} registros "
+            f"com divergência acima de {tolerance} ({checked}).",
+            " · ".join(f"{self.AUDIT_LABELS[f]}: {int(counts.get(f, 0))}" for f in (fields or self.AUDIT_LABELS)),
+            "",
+            "| Funcionário | Competência | Campo | Na folha | Recalculado | Diferença |",
+            "|---|---|---|---|---|---|",
+        ]
+        largest = mismatches.loc[mismatches['difference'].abs().nlargest(10).index]
+        for row in largest.to_dict('records'):
+            lines.append(
+                f"| {row['name']} | {self._format_month_year(row['competency'])} | {self.AUDIT_LABELS[row['field']]} | "
+                f"{format_currency_brl(row['stored'])} | {format_currency_brl(row['expected'])} | "
+                f"{format_currency_brl(row['difference'])} |"
+            )
+        records = self.payroll_service.data.iloc[largest['position'].drop_duplicates().to_numpy()]
+        return "\n".join(lines), self.payroll_service.to_evidence(records)
+
+    SIMULATION_PATTERN = re.compile(r'\be se\b|simul|cen[aá]rio|\bimpacto\b|\breajust')
+    SIMULATION_LABELS = {
+        'base_salary': 'Salário base', 'bonus': 'Bônus', 'benefits_vt_vr': 'Benefícios (VT/VR)',
+        'gross_pay': 'Proventos (custo)', 'deductions_inss': 'INSS', 'deductions_irrf': 'IRRF', 'net_pay': 'Líquido',
+    }
+
+    def _is_simulation_query(self, query: str) -> bool:
+        return bool(self.SIMULATION_PATTERN.search(query.lower()))
+
+    @property
+    def simulator(self) -> PayrollSimulator:
+        if self._simulator is None:
+            self._simulator = PayrollSimulator(self.payroll_service)
+        return self._simulator
+
+    def _parse_scenario(self, query: str) -> Optional[Tuple[str, str, float]]:
+        """(campo do cenário, 'pct' ou 'amount', valor com sinal) ou None se não há mudança na consulta"""
+        query_lower = query.lower()
+        sign = -1 if re.search(r'reduz|redu[çc][ãa]o|\bca[ií]r|diminu|\bcort', query_lower) else 1
+        if re.search(r'b[ôo]nus|gratifica', query_lower):
+            field = 'bonus'
+        elif re.search(r'benef[ií]cio|\bvt\b|\bvr\b|\bvale', query_lower):
+            field = 'benefits'
+        else:
+            field = 'base_salary'
+        pct = re.search(r'(\d+(?:[.,]\d+)?)\s*%', query_lower)
+        if pct:
+            return field, 'pct', sign * float(pct.group(1).replace(',', '.'))
+        amount = self._parse_brl_amount(query_lower)
+        if amount is not None:
+            return field, 'amount', sign * amount
+        return None
+
+    def _parse_brl_amount(self, query: str) -> Optional[float]:
+        """'R$ 1.000,50' ou '1000 reais' -> 1000.5"""
+        query_lower = query.lower()
+        amount = (re.search(r'r\$\s*(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)', query_lower)
+                  or re.search(r'(\d+(?:,\d{1,2})?)\s*reais', query_lower))
+        return float(amount.group(1).replace('.', '').replace(',', '.')) if amount else None
+
+    def _handle_simulation(self, employee_name: Optional[str], date_info: Dict, query: str) -> Tuple[str, List[Evidence]]:
+        """Cenário what-if (reajuste, bônus, benefícios) com INSS/IRRF recalculados"""
+        change = self._parse_scenario(query)
+        if change is None:
+            return RagAnswer("Informe a mudança a simular, por exemplo: \"e se o salário base subir 8%?\" ou "
+                             "\"impacto de um bônus de R$ 1.000 para todos em julho\".", [], resolved=False)
+        field, kind, value = change
+        if 'competency' in date_info:
+            period = {'competency': date_info['competency']}
+            period_desc = self._get_period_description(date_info)
+        else:
+            # Sem ano explícito: o ano mais recente da folha
+            competencies = self.payroll_service.competencies
+            year = date_info['year'] if re.search(r'20\d{2}', query) or not competencies else int(competencies[-1][:4])
+            period = {'year': year}
+            period_desc = f"no ano de {year}"
+        scenario = SimulationScenario(employee_name=employee_name, **{f"{field}_{kind}": value}, **period)
+        result = self.simulator.run(scenario)
+        who = f"de **{employee_name}**" if employee_name else "da folha"
+        if not result.record_count:
+            return f"Não foram encontrados registros {who} {period_desc} para simular.", []
+
+        labels = {'base_salary': 'salário base', 'bonus': 'bônus', 'benefits': 'benefícios'}
+        change_desc = (f"{labels[field]} {value:+g}%" if kind == 'pct'
+                       else f"{labels[field]} {'+' if value >= 0 else '-'}{format_currency_brl(abs(value))} por registro")
+        lines = [f"🧮 **Simulação** {who}: {change_desc} {period_desc} ({result.record_count} registros)", "",
+                 "| | Atual | Simulado | Diferença |", "|---|---|---|---|"]
+        for key, label in self.SIMULATION_LABELS.items():
+            lines.append(f"| {label} | {format_currency_brl(result.baseline[key])} | "
+                         f"{format_currency_brl(result.simulated[key])} | {format_currency_brl(result.delta[key])} |")
+        lines += ["", "INSS e IRRF recalculados pelas tabelas oficiais vigentes em cada competência."]
+        return "\n".join(lines), []
+
+    SELIC_CORRECTION_PATTERN = re.compile(r'corrig|corre[çc][ãa]o|atualiz|valeria|\brend')
+
+    def _is_selic_correction_query(self, query: str) -> bool:
+        query_lower = query.lower()
+        return 'selic' in query_lower and bool(self.SELIC_CORRECTION_PATTERN.search(query_lower))
+
+    @property
+    def selic_series(self):
+        """Série Selic local (SELIC_SERIES_FILE), carregada no primeiro uso"""
+        if self._selic_series is None:
+            self._selic_series = load_selic_series(os.path.join(settings.DATA_DIR, settings.SELIC_SERIES_FILE))
+        return self._selic_series
+
+    def _handle_selic_correction(self, query: str) -> Tuple[str, List[Evidence]]:
+        """Corrige valores da folha (ou um valor informado) pela Selic até hoje, com a série local"""
+        series = self.selic_series
+        until = series.clamp(date.today())
+        # Fator até o fim do dia "until" (o fim do intervalo é exclusivo)
+        end = until + timedelta(days=1)
+        footer = (f"Selic efetiva capitalizada por dia útil, série local versão {series.version}"
+                  f"{' (termina em ' + until.strftime('%d/%m/%Y') + ')' if until < date.today() else ''}; "
+                  f"taxa vigente em {until.strftime('%d/%m/%Y')}: {self._format_number(series.rate_on(until), 2)}% a.a.")
+        date_info = self._extract_date_info(query)
+        employee_name = self._extract_employee_name(query)
+
+        if not employee_name:
+            amount = self._parse_brl_amount(query)
+            if amount is None or 'competency' not in date_info:
+                return RagAnswer("Para corrigir pela Selic, informe o funcionário (ex: \"bônus de maio da Ana corrigido pela Selic\") "
+                                 "ou um valor e o mês (ex: \"R$ 1.000 de janeiro de 2024 corrigidos pela Selic\").", [],
+                                 resolved=False)
+            start = f"{date_info['competency']}-01"
+            factor = series.factor(start, end)
+            return (f"{format_currency_brl(amount)} de {self._format_month_year(date_info['competency'])} corrigidos "
+                    f"pela Selic até {until.strftime('%d/%m/%Y')} valem {format_currency_brl(amount * factor)} "
+                    f"(fator {self._format_number(factor, 6)}, +{self._format_number((factor - 1) * 100, 2)}%).\n{footer}"), []
+
+        if not self._employee_exists(employee_name):
+            return self._get_employee_not_found_message(query, employee_name)
+        field, label = self._query_field(query)
+        if 'competency' in date_info:
+            positions = self.payroll_service.record_positions(employee_name, competency=date_info['competency'])
+        elif re.search(r'20\d{2}', query):
+            positions = self.payroll_service.record_positions(employee_name, year=date_info['year'])
+        else:
+            positions = self.payroll_service.employee_positions(employee_name)
+        records = self.payroll_service.data.iloc[positions]
+        records = records[records[field] > 0]
+        if records.empty:
+            return f"Não foram encontrados registros de {label} para {employee_name} {self._get_period_description(date_info)}.", []
+
+        # Um fator por pagamento, todos com duas leituras na série acumulada
+        factors = series.factor(records['payment_date'].to_numpy(dtype='datetime64[D]'), end)
+        values = records[field].to_numpy(dtype=float)
+        corrected = values * factors
+        evidence = self.payroll_service.to_evidence(records)
+        if len(records) == 1:
+            row = records.iloc[0]
+            return (f"O {label} de **{employee_name}** de {self._format_month_year(row['competency'])} "
+                    f"({format_currency_brl(values[0])}, pago em {format_payment_date(row['payment_date'])}) "
+                    f"corrigido pela Selic até {until.strftime('%d/%m/%Y')} vale {format_currency_brl(corrected[0])} "
+                    f"(fator {self._format_number(factors[0], 6)}, +{self._format_number((factors[0] - 1) * 100, 2)}%).\n{footer}"), evidence
+
+        lines = [f"📈 **{label.capitalize()}** de **{employee_name}** corrigido pela Selic até {until.strftime('%d/%m/%Y')}:", "",
+                 "| Competência | Pago em | Valor | Fator | Corrigido |", "|---|---|---|---|---|"]
+        for row, value, factor, fixed in zip(records.to_dict('records'), values, factors, corrected):
+            lines.append(f"| {self._format_month_year(row['competency'])} | {format_payment_date(row['payment_date'])} | "
+                         f"{format_currency_brl(value)} | {self._format_number(factor, 6)} | {format_currency_brl(fixed)} |")
+        lines += ["", f"Total: {format_currency_brl(values.sum())} → {format_currency_brl(corrected.sum())} "
+                      f"(+{format_currency_brl(corrected.sum() - values.sum())}).", footer]
+        return "\n".join(lines), evidence
+
+    @staticmethod
+    def _format_number(value: float, decimals: int) -> str:
+        return f"{value:.{decimals}f}".replace('.', ',')
+
+    def _query_field(self, query: str) -> Tuple[str, str]:
+        """Campo da folha citado na consulta (líquido por padrão) e seu rótulo"""
+        query_lower = query.lower()
+        for terms, field, label in self.QUERY_FIELDS:
+            if any(term in query_lower for term in terms):
+                return field, label
+        return 'net_pay', 'líquido'
+
+    def _period_competencies(self, date_info: Dict) -> List[str]:
+        if 'competency' in date_info:
+            return [date_info['competency']]
+        months = range(1, 13)
+        if 'quarter' in date_info:
+            months = range(3 * (date_info['quarter'] - 1) + 1, 3 * date_info['quarter'] + 1)
+        return [f"{date_info['year']}-{month:02d}" for month in months]
+
     def _handle_general_query_without_employee(self, query: str) -> Tuple[str, List[Evidence]]:
-        return "Não foi possível identificar o funcionário na consulta. Por favor, utilize o nome completo.", []
+        return RagAnswer("Não foi possível identificar o funcionário na consulta. Por favor, utilize o nome completo.", [],
+                         resolved=False)
 
     # -----------------------
     # Helpers adicionais
@@ -0,0 +1,274 @@
+import json
+import math
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.schemas import Evidence
+from ..utils.config import settings
+from ..utils.logger import get_logger
+from ..utils.metrics import STAGE_DURATION
+from ..utils.tracing import tracer
+
+logger = get_logger("retrieval")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Palavras que aparecem em quase toda pergunta e não ajudam a separar documentos
+STOPWORDS = frozenset("a o as os de da do das dos e em no na nos nas para por com qual quanto quais que um uma meu minha".split())
+MONTHS_PT = ["janeiro", "fevereiro", "marco", "abril", "maio", "junho",
+             "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFD", text.lower()).encode("ascii", "ignore").decode("ascii")
+
+
+# Peso dos trigramas de caracteres em relação à palavra inteira
+TRIGRAM_WEIGHT = 0.25
+
+
+@lru_cache(maxsize=262144)
+def _token_features(token: str, dim: int) -> Tuple[Tuple[int, float], ...]:
+    """Palavra inteira + trigramas de caracteres com peso menor (toleram erros de digitação)"""
+    features = [(zlib.crc32(b"w:" + token.encode()) % dim, 1.0)]
+    if not token.isdigit() and len(token) > 3:
+        padded = f"<{token}>".encode()
+        features += [(zlib.crc32(b"c:" + padded[i:i + 3]) % dim, TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+    return tuple(features)
+
+
+def text_features(text: str, dim: int) -> List[Tuple[int, float]]:
+    """(índice, peso) de cada termo do texto no espaço de hashing"""
+    features: List[Tuple[int, float]] = []
+    for token in _WORD_RE.findall(_normalize(text)):
+        if token not in STOPWORDS:
+            features.extend(_token_features(token, dim))
+    return features
+
+
+class HashingEmbedder:
+    """Vetores TF-IDF em espaço de hashing (sem vocabulário nem modelo baixado)"""
+
+    # Documentos por bloco: o bincount temporário (float64) fica em chunk_rows x dim
+    chunk_rows = 2048
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _term_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """Matriz de frequências (float32) preenchida bloco a bloco, sem cópia da matriz inteira"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.chunk_rows):
+            chunk = texts[start:start + self.chunk_rows]
+            rows: List[int] = []
+            features: List[Tuple[int, float]] = []
+            for i, text in enumerate(chunk):
+                text_feats = text_features(text, self.dim)
+                rows.extend([i] * len(text_feats))
+                features.extend(text_feats)
+            if not features:
+                continue
+            cols, weights = zip(*features)
+            # bincount sobre a posição linear soma termos repetidos bem mais rápido que np.add.at
+            flat = np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(cols, dtype=np.int64)
+            counts = np.bincount(flat, weights=weights, minlength=len(chunk) * self.dim)
+            matrix[start:start + len(chunk)] = counts.reshape(len(chunk), self.dim)
+        return matrix
+
+    def fit_transform(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = self._term_matrix(texts)
+        doc_freq = np.zeros(self.dim, dtype=np.int64)
+        for start in range(0, len(matrix), self.chunk_rows):
+            doc_freq += np.count_nonzero(matrix[start:start + self.chunk_rows], axis=0)
+        self.idf = np.log((1 + len(texts)) / (1 + doc_freq)).astype(np.float32) + 1.0
+        return self._weight(matrix)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        return self._weight(self._term_matrix(texts))
+
+    def _weight(self, matrix: np.ndarray) -> np.ndarray:
+        # tf sublinear * idf, normalizado (produto interno = cosseno)
+        np.log1p(matrix, out=matrix)
+        matrix *= self.idf
+        # einsum calcula as normas sem o temporário matrix ** 2
+        norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))[:, None]
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+
+class VectorIndex:
+    """Busca top-k por produto interno numa matriz NumPy.
+
+    Até ivf_threshold documentos a busca é exaustiva (uma multiplicação
+    matriz-vetor). Acima disso monta um índice IVF: k-means esférico agrupa
+    os vetores em n_lists listas (padrão ~sqrt(n)/4), a matriz é reordenada
+    para cada lista ficar contígua e a busca só pontua as n_probe listas com
+    centróide mais próximo da consulta.
+    """
+
+    def __init__(self, embedder: HashingEmbedder, ivf_threshold: int = 20000, n_probe: int = 8,
+                 n_lists: Optional[int] = None, kmeans_iterations: int = 8, kmeans_sample: int = 20000,
+                 seed: int = 42):
+        self.embedder = embedder
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.n_lists = n_lists
+        self.kmeans_iterations = kmeans_iterations
+        self.kmeans_sample = kmeans_sample
+        self.seed = seed
+        self.matrix = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.centroids: Optional[np.ndarray] = None
+        self.bounds: Optional[np.ndarray] = None   # lista c ocupa as linhas bounds[c]:bounds[c + 1]
+        self.doc_ids: Optional[np.ndarray] = None  # linha da matriz -> posição original do documento
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @property
+    def uses_ivf(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, texts: Sequence[str]) -> "VectorIndex":
+        self.matrix = self.embedder.fit_transform(texts)
+        self.centroids = self.bounds = self.doc_ids = None
+        if len(self.matrix) >= self.ivf_threshold:
+            self.build_ivf()
+        return self
+
+    def build_ivf(self):
+        """Agrupa a matriz atual em listas invertidas (chamado pelo build acima do limiar)"""
+        if self.doc_ids is not None:
+            # Volta à ordem original antes de reagrupar
+            original = np.empty_like(self.matrix)
+            original[self.doc_ids] = self.matrix
+            self.matrix = original
+        rng = np.random.default_rng(self.seed)
+        n = len(self.matrix)
+        n_lists = min(n, self.n_lists or max(1, int(math.sqrt(n) / 4)))
+        sample = self.matrix[rng.choice(n, size=min(n, self.kmeans_sample), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            for c in range(n_lists):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        # Atribuição final em blocos (evita a matriz n x n_lists inteira na memória)
+        assignment = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            assignment[start:start + 65536] = (self.matrix[start:start + 65536] @ centroids.T).argmax(axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self.matrix = self.matrix[order]
+        self.doc_ids = order
+        self.bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self.centroids = centroids
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """(posição do documento, similaridade) em ordem decrescente"""
+        if not len(self.matrix):
+            return []
+        vector = self.embedder.transform([query])[0]
+        if not vector.any():
+            return []
+        if self.uses_ivf:
+            probes = np.argsort(self.centroids @ vector)[::-1][:self.n_probe]
+            rows = np.concatenate([np.arange(self.bounds[c], self.bounds[c + 1]) for c in probes])
+            scores = np.concatenate([self.matrix[self.bounds[c]:self.bounds[c + 1]] @ vector for c in probes])
+            if not len(scores):
+                return []
+        else:
+            rows = None
+            scores = self.matrix @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = self.doc_ids[rows[top]] if rows is not None else top
+        return [(int(p), float(s)) for p, s in zip(positions, scores[top])]
+
+
+class Passage(NamedTuple):
+    title: str
+    text: str
+
+
+class RetrievalResult(NamedTuple):
+    evidence: List[Evidence]
+    passages: List[Passage]
+    scores: List[float]
+
+    @property
+    def sources(self) -> List[str]:
+        sources = []
+        if self.evidence:
+            sources.append("payroll.csv")
+        if self.passages:
+            sources.append("faq.jsonl")
+        return sources
+
+
+def payroll_record_text(row: Dict[str, Any]) -> str:
+    """Texto indexado de um registro da folha: quem e quando (os valores vêm da Evidence)"""
+    year, month = row["competency"].split("-")
+    month_name = MONTHS_PT[int(month) - 1]
+    bonus = " bônus" if row["bonus"] else ""
+    return (
+        f"{row['name']} {row['employee_id']} competência {row['competency']} {month_name} {month_name[:3]} "
+        f"{month}/{year} {year} holerite salário líquido{bonus} inss irrf pagamento {row['payment_date']}"
+    )
+
+
+def load_faq(path: str) -> List[Passage]:
+    passages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                passages.append(Passage(entry["title"], entry["text"]))
+    return passages
+
+
+class PayrollRetriever:
+    """Índice único com os registros da folha e os textos de política/FAQ"""
+
+    def __init__(self, payroll_service, passages: Sequence[Passage] = (), dim: int = 1024,
+                 ivf_threshold: int = 20000, n_probe: int = 8):
+        self.payroll_service = payroll_service
+        self.passages = list(passages)
+        df = payroll_service.data
+        self.n_records = len(df)
+        texts = [payroll_record_text(row) for row in df.to_dict("records")]
+        texts += [f"{p.title}. {p.text}" for p in self.passages]
+        self.index = VectorIndex(HashingEmbedder(dim), ivf_threshold=ivf_threshold, n_probe=n_probe).build(texts)
+        logger.info("📚 Índice de recuperação: %d registros + %d textos (%s)",
+                    self.n_records, len(self.passages), "IVF" if self.index.uses_ivf else "exaustivo")
+
+    def retrieve(self, query: str, k: int = 4, min_score: float = 0.0) -> RetrievalResult:
+        with STAGE_DURATION.time(stage="retrieval"), \
+                tracer.start_span("retrieval.search", docs=len(self.index), ivf=self.index.uses_ivf) as span:
+            hits = [(pos, score) for pos, score in self.index.search(query, k) if score >= min_score]
+            span.set_attribute("hits", len(hits))
+        rows = [pos for pos, _ in hits if pos < self.n_records]
+        evidence = self.payroll_service.to_evidence(self.payroll_service.data.iloc[rows]) if rows else []
+        passages = [self.passages[pos - self.n_records] for pos, _ in hits if pos >= self.n_records]
+        return RetrievalResult(evidence, passages, [score for _, score in hits])
+
+
+def build_default_retriever(payroll_service) -> Optional[PayrollRetriever]:
+    """Retriever conforme a configuração (FAQ opcional: sem arquivo indexa só a folha)"""
+    if not settings.RETRIEVAL_ENABLED:
+        return None
+    try:
+        passages = load_faq(f"{settings.DATA_DIR}/{settings.FAQ_FILE}")
+    except OSError as e:
+        logger.warning("⚠️ FAQ não encontrado, indexando só a folha: %s", e)
+        passages = []
+    return PayrollRetriever(payroll_service, passages, dim=settings.RETRIEVAL_DIM,
+                            ivf_threshold=settings.RETRIEVAL_IVF_THRESHOLD, n_probe=settings.RETRIEVAL_IVF_PROBES)
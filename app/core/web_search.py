@@ -1,79 +1,194 @@
 import requests
-from duckduckgo_search import DDGS
 from typing import List, Dict, Optional
 import re
+import time
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import json
 
+from ..utils.config import settings
+from ..utils.logger import get_logger
+from ..utils.tracing import tracer
+from ..utils.profiler import run_sampled
+from ..utils.resilience import get_breaker, remaining_time
+from ..utils.singleflight import SingleFlight
+
+logger = get_logger("web_search")
+
+# Termos consultados em paralelo (em ordem de preferência)
+SELIC_SEARCH_TERMS = [
+    "taxa selic atual Banco Central",
+    "Selic hoje BCB",
+    "taxa básica de juros Brasil",
+    "Copom Selic atual"
+]
+
+# Padrões para encontrar a taxa Selic (compilados uma vez)
+SELIC_PATTERNS = [
+    re.compile(r'Selic[\s\S]*?(\d+[.,]\d+)%', re.IGNORECASE),
+    re.compile(r'taxa Selic[\s\S]*?(\d+[.,]\d+)', re.IGNORECASE),
+    re.compile(r'(\d+[.,]\d+)%[\s\S]*?Selic', re.IGNORECASE),
+    re.compile(r'juros[\s\S]*?(\d+[.,]\d+)%', re.IGNORECASE)
+]
+
+SELIC_NOT_FOUND = "Valor não identificado"
+
+
+# Executor único do módulo: consultas abandonadas (saída antecipada ou prazo) ocupam
+# no máximo WEB_SEARCH_MAX_WORKERS threads no processo, não um pool por instância
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _search_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.WEB_SEARCH_MAX_WORKERS,
+                    thread_name_prefix="web-search"
+                )
+    return _executor
+
 
 class WebSearchService:
     """Serviço para busca web com citação de fontes"""
     
-    def __init__(self):
-        self.ddgs = DDGS()
-    
+    def __init__(self, backend=None, deadline_s: Optional[float] = None, breaker=None):
+        # backend: qualquer objeto com .text(query, region=..., max_results=...) (padrão: DuckDuckGo)
+        self._backend = backend
+        self.breaker = breaker or get_breaker("duckduckgo")
+        # Buscas idênticas simultâneas compartilham as mesmas consultas
+        self._flight = SingleFlight("duckduckgo")
+        self.deadline_s = deadline_s if deadline_s is not None else settings.WEB_SEARCH_DEADLINE_S
+
+    @property
+    def ddgs(self):
+        """Backend de busca (DDGS só é importado no primeiro uso)"""
+        if self._backend is None:
+            from duckduckgo_search import DDGS
+            self._backend = DDGS()
+        return self._backend
+
+    def _text_search(self, term: str, max_results: int = 3) -> List[Dict]:
+        with tracer.start_span("http.duckduckgo", query=term) as span:
+            results = self.breaker.call(
+                self.ddgs.text,
+                term,
+                region='br-br',
+                max_results=max_results
+            )
+            span.set_attribute("result_count", len(results))
+        return results
+
     def search_selic_rate(self) -> Dict[str, str]:
         """
         Busca a taxa Selic atual com fontes confiáveis
         Retorna: {'taxa': 'valor', 'fonte': 'url', 'descricao': 'texto'}
         """
-        try:
-            # Busca por termos relacionados à Selic
-            search_terms = [
-                "taxa selic atual Banco Central",
-                "Selic hoje BCB",
-                "taxa básica de juros Brasil",
-                "Copom Selic atual"
-            ]
-            
-            results = []
-            for term in search_terms:
-                search_results = self.ddgs.text(
-                    term, 
-                    region='br-br', 
-                    max_results=3
+        return dict(self._flight.do("selic", self._search_selic_rate))
+
+    def _search_selic_rate(self) -> Dict[str, str]:
+        """
+        Os termos são consultados em paralelo com um prazo global; assim que
+        uma fonte confiável traz uma taxa legível, as consultas pendentes
+        são canceladas (as que já estão em andamento são ignoradas).
+        """
+        # Prazo: o menor entre o da busca e o que resta da requisição
+        budget_s = self.deadline_s
+        remaining = remaining_time()
+        if remaining is not None:
+            budget_s = min(budget_s, remaining)
+        if budget_s <= 0 or self.breaker.is_open():
+            return {
+                'taxa': 'Indisponível',
+                'fonte': 'Busca na web temporariamente indisponível',
+                'descricao': 'Tente novamente em alguns instantes',
+                'timestamp': datetime.now().isoformat()
+            }
+
+        with tracer.start_span("web_search.selic", query_count=len(SELIC_SEARCH_TERMS)) as span:
+            deadline = time.monotonic() + budget_s
+            # Cada consulta roda no contexto atual para herdar o trace
+            executor = _search_executor()
+            futures = {
+                executor.submit(contextvars.copy_context().run, run_sampled, self._text_search, term): index
+                for index, term in enumerate(SELIC_SEARCH_TERMS)
+            }
+            results_by_term: Dict[int, List[Dict]] = {}
+            errors = []
+            best = None
+            pending = set(futures)
+
+            while pending and best is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        results_by_term[futures[future]] = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        logger.warning("⚠️ Falha na busca '%s': %s", SELIC_SEARCH_TERMS[futures[future]], e)
+                        continue
+                    for result in self._filter_reliable_sources(results_by_term[futures[future]]):
+                        selic_value = self._extract_selic_value(result['body'])
+                        if selic_value != SELIC_NOT_FOUND:
+                            best = (result, selic_value)
+                            break
+                    if best is not None:
+                        break
+
+            for future in pending:
+                future.cancel()
+            span.set_attribute("completed_queries", len(results_by_term))
+            span.set_attribute("early_exit", best is not None and bool(pending))
+            span.set_attribute("deadline_exceeded", best is None and bool(pending))
+
+            if best is None:
+                # Sem taxa legível: primeira fonte confiável na ordem dos termos
+                reliable_sources = self._filter_reliable_sources(
+                    [r for index in sorted(results_by_term) for r in results_by_term[index]]
                 )
-                results.extend(search_results)
-            
-            # Filtra fontes confiáveis
-            reliable_sources = self._filter_reliable_sources(results)
-            
-            if reliable_sources:
-                best_result = reliable_sources[0]
-                selic_value = self._extract_selic_value(best_result['body'])
-                
-                return {
-                    'taxa': selic_value,
-                    'fonte': best_result['href'],
-                    'descricao': best_result['body'][:200] + "...",
-                    'timestamp': datetime.now().isoformat()
-                }
-            else:
-                return {
-                    'taxa': 'Não encontrada',
-                    'fonte': 'Busca não retornou resultados confiáveis',
-                    'descricao': 'Tente novamente em alguns instantes',
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-        except Exception as e:
+                if reliable_sources:
+                    best = (reliable_sources[0], self._extract_selic_value(reliable_sources[0]['body']))
+
+        if best is not None:
+            best_result, selic_value = best
+            return {
+                'taxa': selic_value,
+                'fonte': best_result['href'],
+                'descricao': best_result['body'][:200] + "...",
+                'timestamp': datetime.now().isoformat()
+            }
+        if errors and not results_by_term:
             return {
                 'taxa': 'Erro na busca',
-                'fonte': f'Erro: {str(e)}',
+                'fonte': f'Erro: {str(errors[0])}',
                 'descricao': 'Não foi possível acessar as informações',
                 'timestamp': datetime.now().isoformat()
             }
+        return {
+            'taxa': 'Não encontrada',
+            'fonte': 'Busca não retornou resultados confiáveis',
+            'descricao': 'Tente novamente em alguns instantes',
+            'timestamp': datetime.now().isoformat()
+        }
     
     def search_general_info(self, query: str, max_results: int = 3) -> List[Dict]:
         """
         Busca geral por informações na web
         """
+        results = self._flight.do(("general", query, max_results), lambda: self._search_general_info(query, max_results))
+        return [dict(result) for result in results]
+
+    def _search_general_info(self, query: str, max_results: int) -> List[Dict]:
         try:
-            results = self.ddgs.text(
-                query, 
-                region='br-br', 
-                max_results=max_results
-            )
+            results = self._text_search(query, max_results)
             
             formatted_results = []
             for result in results:
@@ -115,16 +230,8 @@ class WebSearchService:
     
     def _extract_selic_value(self, text: str) -> str:
         """Extrai o valor da Selic do texto"""
-        # Padrões para encontrar a taxa Selic
-        patterns = [
-            r'Selic[\s\S]*?(\d+[.,]\d+)%',
-            r'taxa Selic[\s\S]*?(\d+[.,]\d+)',
-            r'(\d+[.,]\d+)%[\s\S]*?Selic',
-            r'juros[\s\S]*?(\d+[.,]\d+)%'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in SELIC_PATTERNS:
+            match = pattern.search(text)
             if match:
                 value = match.group(1).replace(',', '.')
                 try:
@@ -134,7 +241,7 @@ class WebSearchService:
                 except ValueError:
                     continue
         
-        return "Valor não identificado"
+        return SELIC_NOT_FOUND
     
     def _extract_domain(self, url: str) -> str:
         """Extrai o domínio de uma URL"""
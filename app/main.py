@@ -1,32 +1,66 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.schemas import ChatRequest, ChatResponse
+from fastapi.responses import PlainTextResponse
+from app.models.schemas import ChatRequest, ChatResponse, PayrollQuery, QueryResult
 from app.models.payroll import PayrollData
 from app.services.payroll_service import PayrollService
+from app.services.payroll_query import PayrollQueryService
 from app.core.rag_engine import RAGEngine
 from app.services.llm_service import LLMService
 from app.core.chatbot import Chatbot
+from app.core.retrieval import build_default_retriever
 from app.utils.config import settings
-from logger import logger
+from app.utils.metrics import metrics
+from app.utils.tracing import tracer
+from app.utils.profiler import profiler
+from app.utils.swr_cache import web_facts
+from app.utils.resilience import request_deadline
+from app.utils.memory_report import (
+    diff_snapshots, memory_report, snapshots, start_memory_instrumentation, structures, top_allocators,
+)
+from app.utils.logger import get_logger
+from observability import Observability
+import hmac
 import threading
 import subprocess
 import os
 import sys
 import time
 import uvicorn
+from typing import List, Optional, Union
+
+logger = get_logger("api")
 
 # Inicialização dos serviços
+observability = Observability()
+payroll_data = None
+rag_engine = None
+llm_service = None
+query_service = None
+
 try:
     payroll_data = PayrollData(f"{settings.DATA_DIR}/{settings.PAYROLL_FILE}")
     payroll_service = PayrollService(payroll_data)
+    query_service = PayrollQueryService(payroll_service, max_evidence=settings.QUERY_MAX_EVIDENCE)
+    if settings.ANALYTICS_PRELOAD:
+        # Agregados da empresa montados na carga, não na primeira pergunta
+        payroll_service.analytics
     rag_engine = RAGEngine(payroll_service)
     llm_service = LLMService()
-    chatbot = Chatbot(rag_engine, llm_service)
+    retriever = build_default_retriever(payroll_service)
+    chatbot = Chatbot(rag_engine, llm_service, retriever=retriever)
     print("✅ Serviços do chatbot inicializados com sucesso")
 except Exception as e:
     print(f"❌ Erro na inicialização dos serviços: {e}")
     chatbot = None
 
+# Estruturas acompanhadas em /admin/memory e nas métricas de memória
+structures.register("conversations", lambda: chatbot.memory.conversations if chatbot else None)
+structures.register("payroll_table", lambda: payroll_data.df if payroll_data is not None else None)
+structures.register("web_cache", lambda: web_facts._memory)
+structures.register("retrieval_index", lambda: chatbot.retriever.index.matrix if chatbot and chatbot.retriever else None)
+memory_sampler = start_memory_instrumentation()
+
 # Configuração do FastAPI
 app = FastAPI(
     title="Chatbot Folha de Pagamento",
@@ -65,28 +99,126 @@ async def health_check():
     }
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    """Endpoint principal do chatbot"""
+def chat_endpoint(request: ChatRequest, http_response: Response,
+                  x_profile: Optional[str] = Header(None)):
+    """Endpoint principal do chatbot.
+
+    Síncrono de propósito: LLM, busca web e pandas bloqueiam, então o FastAPI
+    roda o endpoint no threadpool em vez de no event loop.
+    """
+    conversation_id = request.conversation_id or "default"
+    with tracer.start_span("POST /chat", conversation_id=conversation_id, message_length=len(request.message)) as span:
+        if span.trace_id:
+            http_response.headers["X-Trace-Id"] = span.trace_id
+        # Prazo da requisição, respeitado por todas as chamadas externas abaixo
+        with request_deadline(settings.REQUEST_DEADLINE_S):
+            if not _should_profile(x_profile):
+                return _process_chat(request, conversation_id)
+
+            # Perfil por amostragem de pilha só desta requisição
+            with profiler.profile(f"chat-{span.trace_id or conversation_id}") as sampler:
+                result = _process_chat(request, conversation_id)
+        if sampler is not None and sampler.path:
+            http_response.headers["X-Profile-File"] = os.path.basename(sampler.path)
+            span.set_attribute("profile.file", sampler.path)
+            logger.info("🔬 Perfil gravado em %s (%d amostras)", sampler.path, sampler.samples)
+        return result
+
+def _should_profile(x_profile: Optional[str]) -> bool:
+    if settings.PROFILE_ALL_REQUESTS:
+        return True
+    return settings.PROFILE_HEADER_ENABLED and (x_profile or "").lower() in ("1", "true", "yes")
+
+def _process_chat(request: ChatRequest, conversation_id: str) -> dict:
+    start_ns = time.perf_counter_ns()
     try:
         if chatbot is None:
             raise HTTPException(status_code=503, detail="Serviço do chatbot não disponível")
         
-        logger.info(f"Recebida mensagem: {request.message}")
+        logger.info("Recebida mensagem (%d chars) | conversa: %s", len(request.message), conversation_id)
+        logger.debug("Mensagem: %s", request.message)
         
         response = chatbot.process_message(
             request.message, 
-            request.conversation_id or "default"
+            conversation_id
         )
         
-        logger.info(f"Resposta gerada: {response.response}")
-        return {"response": response.response, "evidence": [ev.dict() for ev in response.evidence], "sources": response.sources, "conversation_id": response.conversation_id}
+        logger.info("Resposta gerada (%d chars, %d evidências)", len(response.response), len(response.evidence))
+        logger.debug("Resposta: %s", response.response)
+        observability.log_interaction(
+            session_id=conversation_id,
+            user_input=request.message,
+            response=response.response,
+            response_time=(time.perf_counter_ns() - start_ns) / 1e9,
+            status="success",
+            tokens_used=response.tokens_used
+        )
+        return {"response": response.response, "evidence": [ev.model_dump() for ev in response.evidence], "sources": response.sources, "conversation_id": response.conversation_id, "tokens_used": response.tokens_used}
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro no endpoint /chat: {e}")
+        logger.error("Erro no endpoint /chat: %s", e)
+        observability.log_interaction(
+            session_id=conversation_id,
+            user_input=request.message,
+            response=str(e),
+            response_time=(time.perf_counter_ns() - start_ns) / 1e9,
+            status="error"
+        )
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+@app.post("/query", response_model=Union[QueryResult, List[QueryResult]])
+def query_endpoint(request: Union[List[PayrollQuery], PayrollQuery]):
+    """Consulta estruturada (uma PayrollQuery ou uma lista), sem guardrails nem interpretação de texto"""
+    if query_service is None:
+        raise HTTPException(status_code=503, detail="Dados de folha não disponíveis")
+    if isinstance(request, list):
+        if len(request) > settings.QUERY_MAX_BATCH:
+            raise HTTPException(status_code=413, detail=f"Lote acima de {settings.QUERY_MAX_BATCH} consultas")
+        return query_service.run_many(request)
+    result = query_service.run(request)
+    if result.error:
+        raise HTTPException(status_code=400, detail=result.error)
+    return result
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Métricas no formato de exposição do Prometheus"""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+def _check_admin(x_admin_token: Optional[str]):
+    # Sem ADMIN_TOKEN configurado os endpoints /admin ficam fechados
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de administração desabilitados (defina ADMIN_TOKEN)")
+    if not hmac.compare_digest((x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+@app.get("/admin/memory")
+async def admin_memory(limit: int = 10, x_admin_token: Optional[str] = Header(None)):
+    """Uso de memória: RSS, estruturas principais e top alocadores do tracemalloc"""
+    _check_admin(x_admin_token)
+    return memory_report(limit)
+
+@app.post("/admin/memory/snapshots/{name}")
+async def admin_memory_snapshot(name: str, compare_to: Optional[str] = None, limit: int = 10,
+                                x_admin_token: Optional[str] = Header(None)):
+    """Tira um snapshot do tracemalloc (inicia o rastreamento se preciso) e compara com outro"""
+    _check_admin(x_admin_token)
+    baseline = None
+    if compare_to:
+        baseline = snapshots.get(compare_to)
+        if baseline is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot '{compare_to}' não encontrado")
+    snapshot = snapshots.take(name)
+    result = {"name": name, "top": top_allocators(snapshot, limit), "snapshots": snapshots.names()}
+    if baseline is not None:
+        result["diff"] = diff_snapshots(baseline, snapshot, limit)
+    return result
+
 @app.get("/employees")
 async def list_employees():
     """Lista funcionários disponíveis"""
@@ -100,7 +232,7 @@ async def list_employees():
             "total": len(employees)
         }
     except Exception as e:
-        logger.error(f"Erro ao listar funcionários: {e}")
+        logger.error("Erro ao listar funcionários: %s", e)
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.get("/chatbot/info")
@@ -243,6 +375,8 @@ def main():
     print("   🩺 Health Check: http://localhost:8000/health")
     print("   🤖 Chatbot Info: http://localhost:8000/chatbot/info")
     print("   👥 Employees:    http://localhost:8000/employees")
+    print("   📈 Métricas:     http://localhost:8000/metrics")
+    print("   🧠 Memória:      http://localhost:8000/admin/memory")
     print("   📊 Streamlit:    http://localhost:8501 (ou porta alternativa)")
     print("\n🔧 COMANDOS DE TESTE:")
     print("   curl http://localhost:8000/health")
@@ -20,6 +20,14 @@ class PayrollData:
     def __init__(self, file_path: str):
         self.df = pd.read_csv(file_path)
         self._validate_data()
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "PayrollData":
+        """Cria a partir de um DataFrame já carregado (ex: datasets sintéticos)"""
+        payroll_data = cls.__new__(cls)
+        payroll_data.df = df
+        payroll_data._validate_data()
+        return payroll_data
     
     def _validate_data(self):
         """Valida estrutura básica do dataset"""
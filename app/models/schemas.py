@@ -22,10 +22,41 @@ class ChatResponse(BaseModel):
     evidence: List[Evidence]
     sources: List[str]
     conversation_id: Optional[str] = None
+    tokens_used: int = 0
 
 class PayrollQuery(BaseModel):
     employee_name: Optional[str] = None
     competency: Optional[str] = None
     year: Optional[int] = None
     month: Optional[int] = None
-    query_type: str  # 'specific', 'aggregate', 'comparison'
\ No newline at end of file
+    query_type: str  # 'specific', 'aggregate', 'comparison'
+    employee_names: Optional[List[str]] = None  # funcionários comparados em 'comparison'
+
+class QueryResult(BaseModel):
+    query: PayrollQuery
+    evidence: List[Evidence]
+    aggregates: Dict[str, float]
+    record_count: int
+    evidence_truncated: bool = False
+    groups: Dict[str, Dict[str, float]] = {}  # agregados por funcionário em 'comparison'
+    error: Optional[str] = None
+
+class SimulationScenario(BaseModel):
+    base_salary_pct: float = 0.0   # variação percentual do salário base (8 = +8%)
+    base_salary_amount: float = 0.0  # R$ somados ao salário base de cada registro
+    bonus_pct: float = 0.0
+    bonus_amount: float = 0.0      # R$ somados ao bônus de cada registro
+    benefits_pct: float = 0.0
+    benefits_amount: float = 0.0
+    employee_name: Optional[str] = None
+    competency: Optional[str] = None
+    year: Optional[int] = None
+    month: Optional[int] = None
+
+class SimulationResult(BaseModel):
+    scenario: SimulationScenario
+    record_count: int
+    baseline: Dict[str, float]     # totais atuais, com INSS/IRRF recalculados pelas tabelas oficiais
+    simulated: Dict[str, float]
+    delta: Dict[str, float]
+    by_competency: Dict[str, Dict[str, float]] = {}  # diferença de proventos e líquido por competência
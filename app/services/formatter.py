@@ -66,4 +66,15 @@ def format_payment_date(date_str: str) -> str:
         date_obj = datetime.strptime(date_str, '%Y-%m-%d')
         return date_obj.strftime('%d/%m/%Y')
     except:
-        return date_str
\ No newline at end of file
+        return date_str
+
+def format_age(seconds: float) -> str:
+    """Idade de um valor em texto curto (ex: 'há 5 min')"""
+    if seconds < 60:
+        return "agora há pouco"
+    if seconds < 3600:
+        return f"há {int(seconds // 60)} min"
+    if seconds < 86400:
+        return f"há {int(seconds // 3600)} h"
+    days = int(seconds // 86400)
+    return f"há {days} dia{'s' if days > 1 else ''}"
@@ -1,31 +1,65 @@
+import hashlib
+import json
 from openai import OpenAI
 from typing import List, Dict, Any, Optional
 from ..utils.config import settings
-from ..utils.logger import logger
+from ..utils.logger import get_logger
+from ..utils.tracing import tracer
+from ..utils.resilience import CircuitOpenError, DeadlineExceeded, get_breaker, outbound_timeout
+from ..utils.singleflight import SingleFlight
+
+logger = get_logger("llm")
+
+# Resposta imediata quando o LLM está indisponível (circuito aberto ou prazo esgotado)
+DEGRADED_RESPONSE = (
+    "⚠️ O assistente está temporariamente indisponível para perguntas gerais. "
+    "Consultas sobre a folha de pagamento continuam funcionando normalmente."
+)
+
+# Resposta quando a chamada ao LLM falha por outro motivo
+ERROR_RESPONSE = "Desculpe, ocorreu um erro ao processar sua mensagem."
+
+# Mesmas mensagens em paralelo (ex: mesma pergunta geral no pico) geram uma única chamada
+_llm_flight = SingleFlight("openai")
+
 
 class LLMService:
     def __init__(self):
         self.client = OpenAI(
             api_key=settings.OPENAI_API_KEY,
-            base_url=settings.LLM_BASE_URL
+            base_url=settings.LLM_BASE_URL,
+            max_retries=settings.LLM_MAX_RETRIES
         )
         self.model = settings.LLM_MODEL
     
     def generate_response(self, messages: List[Dict[str, str]]) -> str:
         """Gera resposta do LLM"""
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=500
-            )
+        with tracer.start_span("llm.chat_completion", model=self.model, message_count=len(messages)) as span:
+            try:
+                timeout = outbound_timeout(settings.LLM_TIMEOUT_S, "openai")
+                key = hashlib.sha1(json.dumps([self.model, messages], ensure_ascii=False).encode("utf-8")).hexdigest()
+                response = _llm_flight.do(key, lambda: get_breaker("openai").call(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=500,
+                    timeout=timeout
+                ))
+                if response.usage is not None:
+                    span.set_attribute("prompt_tokens", response.usage.prompt_tokens)
+                    span.set_attribute("completion_tokens", response.usage.completion_tokens)
+                
+                return response.choices[0].message.content.strip()
             
-            return response.choices[0].message.content.strip()
-        
-        except Exception as e:
-            logger.error(f"Erro ao chamar LLM: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua mensagem."
+            except (CircuitOpenError, DeadlineExceeded) as e:
+                span.set_attribute("degraded", True)
+                logger.warning("⚠️ LLM indisponível, resposta degradada: %s", e)
+                return DEGRADED_RESPONSE
+            except Exception as e:
+                span.set_status(False, str(e))
+                logger.error("Erro ao chamar LLM: %s", e)
+                return ERROR_RESPONSE
     
     def extract_intent(self, user_message: str) -> Dict[str, Any]:
         """Extrai intenção da mensagem do usuário"""
@@ -0,0 +1,186 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.logger import get_logger
+from ..utils.tracing import tracer
+
+logger = get_logger("analytics")
+
+
+class QuantileSketch:
+    """Histograma logarítmico com erro relativo fixo (estilo DDSketch).
+
+    Um valor v > 0 cai no bucket ceil(log_gamma(v)); qualquer quantil
+    estimado fica a no máximo relative_accuracy do valor real. As contagens
+    são arrays densos, então sketches de competências diferentes se juntam
+    somando os arrays. Valores <= min_value contam como zero.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 0.01, max_value: float = 1e9):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_index = math.ceil(math.log(min_value) / self._log_gamma)
+        self.max_index = math.ceil(math.log(max_value) / self._log_gamma)
+        self.min_value = min_value
+        # Bucket 0 é o dos zeros; os demais deslocados por min_index
+        self.n_bins = self.max_index - self.min_index + 2
+
+    def bins(self, values: np.ndarray) -> np.ndarray:
+        """Bucket de cada valor (vetorizado)"""
+        safe = np.maximum(values, self.min_value)
+        index = np.ceil(np.log(safe) / self._log_gamma).astype(np.int64)
+        bins = np.clip(index, self.min_index, self.max_index) - self.min_index + 1
+        bins[values <= self.min_value] = 0
+        return bins
+
+    def quantile(self, counts: np.ndarray, q: float) -> Optional[float]:
+        total = counts.sum()
+        if not total:
+            return None
+        rank = q * (total - 1)
+        bucket = int(np.searchsorted(np.cumsum(counts), rank, side="right"))
+        if bucket == 0:
+            return 0.0
+        index = bucket - 1 + self.min_index
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+
+class PayrollAnalytics:
+    """Agregados parciais da empresa por competência e campo, mantidos na carga.
+
+    Para cada competência e campo: contagem, soma, mínimo, máximo, um heap
+    com os top_n maiores valores (posição da linha) e o sketch de quantis.
+    Consultas sobre um mês, trimestre ou ano só juntam os parciais das
+    competências envolvidas, sem tocar nas linhas da folha.
+    """
+
+    def __init__(self, fields: Sequence[str], top_n: int = 100, relative_accuracy: float = 0.01):
+        self.fields = list(fields)
+        self.top_n = top_n
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.competencies: List[str] = []
+        self._slot: Dict[str, int] = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros((0, len(self.fields)))
+        self.mins = np.zeros((0, len(self.fields)))
+        self.maxs = np.zeros((0, len(self.fields)))
+        self.sketch_counts = np.zeros((0, len(self.fields), self.sketch.n_bins), dtype=np.int64)
+        # heaps[slot][campo]: min-heap de (valor, posição) com os maiores valores
+        self.heaps: List[List[List[Tuple[float, int]]]] = []
+
+    def _slots_for(self, competencies: Sequence[str]) -> np.ndarray:
+        """Slot de cada competência, criando os que ainda não existem"""
+        new = [c for c in dict.fromkeys(competencies) if c not in self._slot]
+        if new:
+            n_old, n_new, n_fields = len(self.competencies), len(new), len(self.fields)
+            for competency in new:
+                self._slot[competency] = len(self.competencies)
+                self.competencies.append(competency)
+                self.heaps.append([[] for _ in self.fields])
+            self.count = np.concatenate([self.count, np.zeros(n_new, dtype=np.int64)])
+            self.sums = np.vstack([self.sums, np.zeros((n_new, n_fields))])
+            self.mins = np.vstack([self.mins, np.full((n_new, n_fields), np.inf)])
+            self.maxs = np.vstack([self.maxs, np.full((n_new, n_fields), -np.inf)])
+            self.sketch_counts = np.concatenate(
+                [self.sketch_counts, np.zeros((n_new, n_fields, self.sketch.n_bins), dtype=np.int64)]
+            )
+            logger.debug("Competências novas nos agregados: %d (total %d)", n_new, n_old + n_new)
+        return np.array([self._slot[c] for c in competencies], dtype=np.int64)
+
+    def add_rows(self, codes: np.ndarray, code_competencies: Sequence[str], values: np.ndarray,
+                 positions: np.ndarray):
+        """Soma linhas novas aos parciais (carga inicial ou competências que chegaram depois).
+
+        codes[i] é o índice em code_competencies da competência da linha i;
+        values tem uma coluna por campo e positions é a posição de cada linha
+        na tabela da folha.
+        """
+        if not len(positions):
+            return
+        with tracer.start_span("analytics.add_rows", rows=len(positions)):
+            slots = self._slots_for(list(code_competencies))[codes]
+            n_slots = len(self.competencies)
+            order = np.argsort(slots, kind="stable")
+            bounds = np.searchsorted(slots[order], np.arange(n_slots + 1))
+            present = np.flatnonzero(np.diff(bounds))
+            starts = bounds[present]
+            ordered = values[order]
+
+            # Parciais por competência numa passada reduceat sobre as linhas ordenadas
+            self.count[present] += np.diff(bounds)[present]
+            self.sums[present] += np.add.reduceat(ordered, starts, axis=0)
+            self.mins[present] = np.minimum(self.mins[present], np.minimum.reduceat(ordered, starts, axis=0))
+            self.maxs[present] = np.maximum(self.maxs[present], np.maximum.reduceat(ordered, starts, axis=0))
+            for f in range(len(self.fields)):
+                flat = slots * self.sketch.n_bins + self.sketch.bins(values[:, f])
+                self.sketch_counts[:, f, :] += np.bincount(
+                    flat, minlength=n_slots * self.sketch.n_bins
+                ).reshape(n_slots, self.sketch.n_bins)
+
+            # Top-N: pré-seleção vetorizada por competência, depois merge nos heaps
+            for slot in present:
+                rows = order[bounds[slot]:bounds[slot + 1]]
+                for f in range(len(self.fields)):
+                    column = values[rows, f]
+                    if len(rows) > self.top_n:
+                        best = np.argpartition(-column, self.top_n - 1)[:self.top_n]
+                    else:
+                        best = np.arange(len(rows))
+                    heap = self.heaps[slot][f]
+                    for value, position in zip(column[best].tolist(), positions[rows[best]].tolist()):
+                        if len(heap) < self.top_n:
+                            heapq.heappush(heap, (value, position))
+                        elif value > heap[0][0]:
+                            heapq.heapreplace(heap, (value, position))
+
+    def _select(self, competencies: Optional[Sequence[str]]) -> np.ndarray:
+        if competencies is None:
+            return np.arange(len(self.competencies))
+        return np.array([self._slot[c] for c in competencies if c in self._slot], dtype=np.int64)
+
+    def summary(self, field: str, competencies: Optional[Sequence[str]] = None,
+                quantiles: Sequence[float] = (0.5, 0.9)) -> Dict[str, float]:
+        """Contagem, total, média, mín/máx e quantis do campo no período"""
+        f = self.fields.index(field)
+        slots = self._select(competencies)
+        count = int(self.count[slots].sum())
+        if not count:
+            return {"count": 0}
+        total = float(self.sums[slots, f].sum())
+        result = {
+            "count": count,
+            "total": round(total, 2),
+            "mean": round(total / count, 2),
+            "min": round(float(self.mins[slots, f].min()), 2),
+            "max": round(float(self.maxs[slots, f].max()), 2),
+        }
+        counts = self.sketch_counts[slots, f].sum(axis=0)
+        for q in quantiles:
+            # A estimativa do bucket pode passar um pouco dos extremos reais
+            estimate = min(max(self.sketch.quantile(counts, q), result["min"]), result["max"])
+            result[f"p{round(q * 100):g}"] = round(estimate, 2)
+        return result
+
+    def by_competency(self, field: str, competencies: Optional[Sequence[str]] = None) -> List[Dict[str, float]]:
+        """Total, média e contagem do campo em cada competência"""
+        f = self.fields.index(field)
+        rows = []
+        for slot in sorted(self._select(competencies), key=lambda s: self.competencies[s]):
+            count = int(self.count[slot])
+            rows.append({
+                "competency": self.competencies[slot],
+                "count": count,
+                "total": round(float(self.sums[slot, f]), 2),
+                "mean": round(float(self.sums[slot, f]) / count, 2) if count else 0.0,
+            })
+        return rows
+
+    def top(self, field: str, competencies: Optional[Sequence[str]] = None,
+            n: int = 10) -> List[Tuple[float, int]]:
+        """(valor, posição da linha) dos n maiores valores do período (n <= top_n)"""
+        f = self.fields.index(field)
+        heaps = [self.heaps[slot][f] for slot in self._select(competencies)]
+        return heapq.nlargest(min(n, self.top_n), (item for heap in heaps for item in heap))
@@ -0,0 +1,138 @@
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.schemas import PayrollQuery, QueryResult
+from ..utils.logger import get_logger
+from ..utils.metrics import STAGE_DURATION, metrics
+from ..utils.tracing import tracer
+from .payroll_service import NUMERIC_FIELDS
+
+logger = get_logger("query")
+
+STRUCTURED_QUERIES_TOTAL = metrics.counter(
+    "chatbot_structured_queries_total",
+    "Consultas estruturadas (PayrollQuery) por tipo e resultado (ok/error)",
+)
+
+QUERY_TYPES = ("specific", "aggregate", "comparison")
+_NO_ROWS = np.empty(0, dtype=np.int64)
+_NET_PAY = NUMERIC_FIELDS.index("net_pay")
+
+
+class PayrollQueryService:
+    """Consultas PayrollQuery direto nos índices do PayrollService (sem guardrails nem NLP).
+
+    Num lote, as posições de todas as consultas são concatenadas e os
+    agregados saem de uma única passada np.add.reduceat sobre a matriz
+    numérica da folha.
+    """
+
+    def __init__(self, payroll_service, max_evidence: int = 100):
+        self.payroll_service = payroll_service
+        self.max_evidence = max_evidence
+
+    def run(self, query: PayrollQuery) -> QueryResult:
+        return self.run_many([query])[0]
+
+    def run_many(self, queries: Sequence[PayrollQuery]) -> List[QueryResult]:
+        start = time.perf_counter()
+        with STAGE_DURATION.time(stage="structured_query"), \
+                tracer.start_span("payroll_query.run_many", queries=len(queries)) as span:
+            plans = [self._plan(query) for query in queries]
+            # Um segmento por consulta (ou por funcionário, em 'comparison'), todos numa passada só
+            segments = [rows for rows_list, _ in plans for rows in rows_list]
+            sums, mins, maxs = self._segment_aggregates(segments)
+
+            # Evidências de todo o lote num único iloc (divididas entre os lados de uma comparação)
+            shown = []
+            for rows_list, _ in plans:
+                per_segment = self.max_evidence // max(1, len(rows_list))
+                shown.append(np.concatenate([rows[:per_segment] for rows in rows_list] or [_NO_ROWS]))
+            all_shown = np.concatenate(shown) if shown else _NO_ROWS
+            evidence = self.payroll_service.to_evidence(self.payroll_service.data.iloc[all_shown]) if len(all_shown) else []
+            bounds = np.cumsum([0] + [len(rows) for rows in shown])
+
+            results = []
+            segment = 0
+            for i, (query, (rows_list, error)) in enumerate(zip(queries, plans)):
+                STRUCTURED_QUERIES_TOTAL.inc(query_type=query.query_type, status="error" if error else "ok")
+                if error:
+                    results.append(QueryResult(query=query, evidence=[], aggregates={}, record_count=0, error=error))
+                    continue
+                own = slice(segment, segment + len(rows_list))
+                segment += len(rows_list)
+                counts = [len(rows) for rows in rows_list]
+                non_empty = [j for j, count in enumerate(counts) if count]
+                groups = {}
+                if query.query_type == "comparison":
+                    groups = {
+                        name: self._aggregates(count, total, low, high)
+                        for name, count, total, low, high in zip(query.employee_names, counts, sums[own], mins[own], maxs[own])
+                    }
+                results.append(QueryResult(
+                    query=query,
+                    evidence=evidence[bounds[i]:bounds[i + 1]],
+                    aggregates=self._aggregates(
+                        sum(counts), sums[own].sum(axis=0),
+                        min((mins[own][j] for j in non_empty), default=0.0),
+                        max((maxs[own][j] for j in non_empty), default=0.0),
+                    ),
+                    record_count=sum(counts),
+                    evidence_truncated=sum(counts) > len(shown[i]),
+                    groups=groups,
+                ))
+            span.set_attribute("records", int(sum(len(rows) for rows in segments)))
+        logger.info("📦 %d consulta(s) estruturada(s) em %.1f ms", len(queries), (time.perf_counter() - start) * 1000)
+        return results
+
+    def _plan(self, query: PayrollQuery) -> Tuple[List[np.ndarray], Optional[str]]:
+        """Valida a consulta e resolve as posições das linhas pelos índices"""
+        if query.query_type not in QUERY_TYPES:
+            return [], f"query_type '{query.query_type}' não suportado (use: {', '.join(QUERY_TYPES)})"
+        if query.month is not None and not 1 <= query.month <= 12:
+            return [], f"Mês inválido: {query.month}"
+        if query.query_type == "specific" and not (
+                query.employee_name and (query.competency or (query.year and query.month))):
+            return [], "Consulta 'specific' exige employee_name e competency (ou year e month)"
+        if query.query_type == "comparison":
+            if not query.employee_names or len(query.employee_names) < 2:
+                return [], "Consulta 'comparison' exige ao menos dois nomes em employee_names"
+            return [
+                self.payroll_service.record_positions(name, query.competency, query.year, query.month)
+                for name in query.employee_names
+            ], None
+        positions = self.payroll_service.record_positions(
+            query.employee_name, query.competency, query.year, query.month
+        )
+        return [positions], None
+
+    def _segment_aggregates(self, positions: List[np.ndarray]):
+        """Soma/mín/máx por segmento numa passada reduceat sobre as linhas concatenadas"""
+        n_fields = len(NUMERIC_FIELDS)
+        sums = np.zeros((len(positions), n_fields))
+        mins = np.zeros(len(positions))
+        maxs = np.zeros(len(positions))
+        lengths = np.array([len(p) for p in positions], dtype=np.int64)
+        non_empty = lengths > 0
+        if not non_empty.any():
+            return sums, mins, maxs
+        values = self.payroll_service.numeric_matrix[np.concatenate(positions)]
+        # Segmentos vazios ficam de fora: o próximo início não vazio é o fim do segmento anterior
+        offsets = (np.cumsum(lengths) - lengths)[non_empty]
+        sums[non_empty] = np.add.reduceat(values, offsets, axis=0)
+        mins[non_empty] = np.minimum.reduceat(values[:, _NET_PAY], offsets)
+        maxs[non_empty] = np.maximum.reduceat(values[:, _NET_PAY], offsets)
+        return sums, mins, maxs
+
+    @staticmethod
+    def _aggregates(count: int, sums: np.ndarray, net_min: float, net_max: float) -> Dict[str, float]:
+        if not count:
+            return {"count": 0}
+        aggregates = {"count": count}
+        aggregates.update({f"{field}_total": round(float(total), 2) for field, total in zip(NUMERIC_FIELDS, sums)})
+        aggregates["net_pay_mean"] = round(float(sums[_NET_PAY]) / count, 2)
+        aggregates["net_pay_min"] = round(float(net_min), 2)
+        aggregates["net_pay_max"] = round(float(net_max), 2)
+        return aggregates
@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 import re
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import sys
 import os
 
@@ -9,19 +10,256 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from app.models.schemas import Evidence
 from logger import logger
 from app.services.formatter import format_currency_brl, parse_date_variations
+from app.services.payroll_analytics import PayrollAnalytics
+from app.services.payroll_tax import AuditResult, PayrollAuditor, load_tax_tables
+from app.services.running_totals import RunningTotals, month_number
+from app.utils.config import settings
+from app.utils.metrics import STAGE_DURATION
+from app.utils.tracing import tracer
+
+
+# Colunas numéricas da folha (somadas nos agregados)
+NUMERIC_FIELDS = [
+    'base_salary', 'bonus', 'benefits_vt_vr', 'other_earnings',
+    'deductions_inss', 'deductions_irrf', 'other_deductions', 'net_pay'
+]
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
 
 
 class PayrollService:
     def __init__(self, payroll_data):
         self.data = payroll_data.df
+        self._employee_index: Optional[Dict[str, np.ndarray]] = None
+        self._id_index: Dict[str, np.ndarray] = {}
+        self._competency_index: Dict[str, np.ndarray] = {}
+        self._numeric: Optional[np.ndarray] = None
+        self._analytics: Optional[PayrollAnalytics] = None
+        self._running_totals: Optional[RunningTotals] = None
+        self._auditor: Optional[PayrollAuditor] = None
+
+    def _ensure_index(self):
+        """Índices nome/id/competência -> posições das linhas, montados no primeiro uso"""
+        if self._employee_index is None:
+            with tracer.start_span("payroll.build_index", rows=len(self.data)):
+                self._id_index = self.data.groupby('employee_id', sort=False).indices
+                codes, competencies = pd.factorize(self.data['competency'], sort=True)
+                self._competency_codes = codes
+                self._competency_list = list(competencies)
+                self._competency_code = {c: i for i, c in enumerate(self._competency_list)}
+                self._competency_index = self.data.groupby('competency').indices
+                self._numeric = self.data[NUMERIC_FIELDS].to_numpy(dtype=np.float64)
+                self._employee_index = self.data.groupby(self.data['name'].str.lower(), sort=False).indices
+
+    @property
+    def employee_index(self) -> Dict[str, np.ndarray]:
+        self._ensure_index()
+        return self._employee_index
+
+    @property
+    def numeric_matrix(self) -> np.ndarray:
+        """Colunas de NUMERIC_FIELDS como matriz float64 (linhas na ordem do DataFrame)"""
+        self._ensure_index()
+        return self._numeric
+
+    @property
+    def analytics(self) -> PayrollAnalytics:
+        """Agregados parciais da empresa por competência (montados no primeiro uso ou no startup)"""
+        if self._analytics is None:
+            self._ensure_index()
+            analytics = PayrollAnalytics(NUMERIC_FIELDS, top_n=settings.ANALYTICS_TOP_N,
+                                         relative_accuracy=settings.ANALYTICS_QUANTILE_ACCURACY)
+            analytics.add_rows(self._competency_codes, self._competency_list, self._numeric,
+                               np.arange(len(self.data)))
+            self._analytics = analytics
+        return self._analytics
+
+    @property
+    def running_totals(self) -> RunningTotals:
+        """Somas acumuladas por funcionário e competência (montadas no primeiro uso ou no startup)"""
+        if self._running_totals is None:
+            self._ensure_index()
+            running_totals = RunningTotals(NUMERIC_FIELDS)
+            running_totals.add_rows(*self._running_rows(self.data, self._numeric))
+            self._running_totals = running_totals
+        return self._running_totals
+
+    @property
+    def auditor(self) -> PayrollAuditor:
+        """Auditor de INSS/IRRF com as tabelas versionadas de TAX_TABLES_FILE (carregadas no primeiro uso)"""
+        if self._auditor is None:
+            tables = load_tax_tables(os.path.join(settings.DATA_DIR, settings.TAX_TABLES_FILE))
+            self._auditor = PayrollAuditor(tables, settings.AUDIT_TOLERANCE)
+        return self._auditor
+
+    def audit(self, employee_name: Optional[str] = None, competency: Optional[str] = None,
+              year: Optional[int] = None, month: Optional[int] = None) -> AuditResult:
+        """Recalcula INSS, IRRF e líquido das linhas filtradas e devolve as divergências"""
+        positions = self.record_positions(employee_name, competency, year, month)
+        return self.auditor.audit(self.data, positions, self.tax_versions()[positions])
+
+    def tax_versions(self) -> np.ndarray:
+        """Versão da tabela de INSS/IRRF de cada linha (-1 sem tabela vigente), via códigos de competência"""
+        codes, competencies = self.competency_codes()
+        return self.auditor.tables.version_index(competencies)[codes]
+
+    def competency_codes(self) -> Tuple[np.ndarray, List[str]]:
+        """Código da competência de cada linha e a lista de competências indexada pelo código"""
+        self._ensure_index()
+        return self._competency_codes, self._competency_list
+
+    @staticmethod
+    def _running_rows(df: pd.DataFrame, numeric: np.ndarray):
+        """(chave do funcionário, mês absoluto, valores) de cada linha para as somas acumuladas"""
+        codes, uniques = pd.factorize(df['competency'])
+        months = np.array([month_number(c) for c in uniques], dtype=np.int64)[codes]
+        return df['name'].str.lower().to_numpy(), months, numeric
+
+    @property
+    def competencies(self) -> List[str]:
+        self._ensure_index()
+        return sorted(self._competency_list)
+
+    def _employee_keys(self, name: str) -> List[str]:
+        """Chaves do índice de nomes para o nome exato, id ou trecho do nome"""
+        name_clean = name.lower().strip()
+        index = self.employee_index
+        if name_clean in index:
+            return [name_clean]
+        if name.strip() in self._id_index:
+            positions = self._id_index[name.strip()]
+            return [self.data['name'].iloc[positions[0]].lower()] if len(positions) else []
+        return [employee for employee in index if name_clean in employee]
+
+    def employee_positions(self, name: str) -> np.ndarray:
+        """Posições das linhas do funcionário: nome exato, id ou trecho do nome (só os nomes distintos são varridos)"""
+        name_clean = name.lower().strip()
+        index = self.employee_index
+        if name_clean in index:
+            return index[name_clean]
+        if name.strip() in self._id_index:
+            return self._id_index[name.strip()]
+        matches = [index[employee] for employee in self._employee_keys(name)]
+        if not matches:
+            return _EMPTY_POSITIONS
+        return matches[0] if len(matches) == 1 else np.sort(np.concatenate(matches))
+
+    def period_totals(self, employee_name: str, start: Optional[str] = None,
+                      end: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """Soma de cada campo entre duas competências (inclusive) pelas somas acumuladas"""
+        totals = self.running_totals.total(
+            self._employee_keys(employee_name),
+            month_number(start) if start else None,
+            month_number(end) if end else None,
+        )
+        if totals is None:
+            return None
+        return {field: round(float(value), 2) for field, value in zip(NUMERIC_FIELDS, totals)}
+
+    def ytd_totals(self, employee_name: str, year: int, until_month: Optional[int] = None) -> Optional[Dict[str, float]]:
+        """Acumulado do ano até until_month (padrão: última competência do funcionário no ano; None se não há)"""
+        end = f"{year}-{until_month:02d}" if until_month else self.last_competency(employee_name, year)
+        if end is None:
+            return None
+        return self.period_totals(employee_name, f"{year}-01", end)
+
+    def last_competency(self, employee_name: str, year: Optional[int] = None) -> Optional[str]:
+        month = self.running_totals.last_month(self._employee_keys(employee_name), year)
+        return None if month is None else f"{month // 12}-{month % 12 + 1:02d}"
+
+    def append_records(self, df: pd.DataFrame):
+        """Inclui registros novos (ex: competência que acabou de fechar) atualizando índices e acumulados
+        só com as linhas novas"""
+        if df.empty:
+            return
+        missing = [c for c in self.data.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Colunas obrigatórias faltando: {', '.join(missing)}")
+        df = df[self.data.columns]
+        offset = len(self.data)
+        with tracer.start_span("payroll.append_records", rows=len(df)):
+            self.data = pd.concat([self.data, df], ignore_index=True)
+            if self._employee_index is None:
+                return
+            positions = np.arange(offset, offset + len(df))
+            numeric = df[NUMERIC_FIELDS].to_numpy(dtype=np.float64)
+            for index, keys in ((self._employee_index, df['name'].str.lower()),
+                                (self._id_index, df['employee_id']),
+                                (self._competency_index, df['competency'])):
+                for key, rows in keys.groupby(keys.to_numpy(), sort=False).indices.items():
+                    index[key] = np.concatenate([index[key], positions[rows]]) if key in index else positions[rows]
+            for competency in df['competency'].unique():
+                if competency not in self._competency_code:
+                    self._competency_code[competency] = len(self._competency_list)
+                    self._competency_list.append(competency)
+            codes = df['competency'].map(self._competency_code).to_numpy(dtype=np.int64)
+            self._competency_codes = np.concatenate([self._competency_codes, codes])
+            self._numeric = np.vstack([self._numeric, numeric])
+            if self._analytics is not None:
+                self._analytics.add_rows(codes, self._competency_list, numeric, positions)
+            if self._running_totals is not None:
+                self._running_totals.add_rows(*self._running_rows(df, numeric))
+        logger.info("➕ %d registros incluídos na folha (%d no total)", len(df), len(self.data))
+
+    def period_competencies(self, competency: Optional[str] = None, year: Optional[int] = None,
+                            month: Optional[int] = None) -> Optional[List[str]]:
+        """Competências existentes no período (None quando não há filtro de período)"""
+        if competency:
+            parsed_date = parse_date_variations(competency)
+            keys = [parsed_date.strftime("%Y-%m") if parsed_date else competency]
+        elif year and month:
+            keys = [f"{year}-{month:02d}"]
+        elif year or month:
+            keys = [c for c in self.competencies
+                    if (not year or c.startswith(f"{year}-")) and (not month or c.endswith(f"-{month:02d}"))]
+        else:
+            return None
+        self._ensure_index()
+        return [key for key in keys if key in self._competency_index]
+
+    def record_positions(self, employee_name: Optional[str] = None, competency: Optional[str] = None,
+                         year: Optional[int] = None, month: Optional[int] = None) -> np.ndarray:
+        """Posições (ordenadas) das linhas que atendem a todos os filtros, via índices"""
+        keys = self.period_competencies(competency, year, month)
+        if employee_name:
+            positions = self.employee_positions(employee_name)
+            if keys is not None:
+                # Filtra as poucas linhas do funcionário pelo código da competência
+                wanted = [self._competency_code[key] for key in keys]
+                positions = positions[np.isin(self._competency_codes[positions], wanted)]
+            return positions
+        if keys is None:
+            return np.arange(len(self.data))
+        if not keys:
+            return _EMPTY_POSITIONS
+        found = [self._competency_index[key] for key in keys]
+        return found[0] if len(found) == 1 else np.sort(np.concatenate(found))
+
+    def compare_employees(self, employee_names: List[str], field: str = 'net_pay',
+                          competencies: Optional[List[str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Registros e tabela competência x funcionário de um campo, num único groupby para todos os nomes"""
+        self._ensure_index()
+        positions = np.concatenate([self.employee_positions(name) for name in employee_names] or [_EMPTY_POSITIONS])
+        if competencies is not None:
+            wanted = [self._competency_code[c] for c in competencies if c in self._competency_code]
+            positions = positions[np.isin(self._competency_codes[positions], wanted)]
+        with STAGE_DURATION.time(stage="filter"), \
+                tracer.start_span("payroll.compare_employees", employees=len(employee_names)) as span:
+            records = self.data.iloc[np.unique(positions)]
+            table = records.groupby(['competency', 'name'])[field].sum().unstack('name')
+            span.set_attribute("rows_matched", len(records))
+        return records, table
 
     def search_employee(self, name: str) -> pd.DataFrame:
         """Busca funcionário por nome (case insensitive, parcial)"""
         if not name:
             return pd.DataFrame()
 
-        name_clean = name.lower().strip()
-        return self.data[self.data['name'].str.lower().str.contains(name_clean, na=False)]
+        with STAGE_DURATION.time(stage="filter"), \
+                tracer.start_span("payroll.search_employee", rows=len(self.data)) as span:
+            result = self.data.iloc[self.employee_positions(name)]
+            span.set_attribute("rows_matched", len(result))
+            return result
 
     def search_by_competency(self, competency: str, employee_name: Optional[str] = None) -> pd.DataFrame:
         """Busca por competência com suporte a variações de formato"""
@@ -63,8 +301,9 @@ class PayrollService:
 
     def get_year_records(self, employee_name: str, year: int) -> pd.DataFrame:
         """Retorna registros de um ano específico"""
-        df = self.search_employee(employee_name)
-        return df[df['competency'].str.startswith(str(year))]
+        if not employee_name:
+            return pd.DataFrame()
+        return self.data.iloc[self.record_positions(employee_name, year=year)]
 
     def find_max_bonus(self, employee_name: str) -> pd.DataFrame:
         """Encontra o maior bônus de um funcionário"""
@@ -79,18 +318,20 @@ class PayrollService:
         """Converte DataFrame para lista de Evidence"""
         evidence_list = []
 
-        for _, row in df.iterrows():
-            evidence = Evidence(
-                employee_id=row['employee_id'],
-                name=row['name'],
-                competency=row['competency'],
-                net_pay=row['net_pay'],
-                payment_date=row['payment_date'],
-                base_salary=row['base_salary'],
-                bonus=row['bonus'],
-                deductions_inss=row['deductions_inss'],
-                deductions_irrf=row['deductions_irrf']
-            )
-            evidence_list.append(evidence)
+        with STAGE_DURATION.time(stage="evidence"), \
+                tracer.start_span("payroll.to_evidence", rows=len(df)):
+            for row in df.to_dict('records'):
+                evidence = Evidence(
+                    employee_id=row['employee_id'],
+                    name=row['name'],
+                    competency=row['competency'],
+                    net_pay=row['net_pay'],
+                    payment_date=row['payment_date'],
+                    base_salary=row['base_salary'],
+                    bonus=row['bonus'],
+                    deductions_inss=row['deductions_inss'],
+                    deductions_irrf=row['deductions_irrf']
+                )
+                evidence_list.append(evidence)
 
         return evidence_list
\ No newline at end of file
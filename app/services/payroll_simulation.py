@@ -0,0 +1,127 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from ..models.schemas import SimulationResult, SimulationScenario
+from ..utils.logger import get_logger
+from ..utils.metrics import STAGE_DURATION, metrics
+from ..utils.tracing import tracer
+from .payroll_service import NUMERIC_FIELDS
+from .payroll_tax import recompute_payroll
+
+logger = get_logger("simulation")
+
+SIMULATIONS_TOTAL = metrics.counter(
+    "chatbot_payroll_simulations_total",
+    "Simulações de cenário (what-if) executadas sobre a folha",
+)
+
+# Totais devolvidos pela simulação (gross_pay = todos os proventos, o custo da folha)
+SIMULATION_FIELDS = ['base_salary', 'bonus', 'benefits_vt_vr', 'gross_pay',
+                     'deductions_inss', 'deductions_irrf', 'net_pay']
+_COLUMN = {field: i for i, field in enumerate(NUMERIC_FIELDS)}
+
+
+class PayrollSimulator:
+    """Cenários what-if (reajuste de salário, bônus, benefícios) sobre a folha inteira.
+
+    Na folha inteira, as colunas que o cenário não altera são views da matriz
+    numérica do PayrollService e só as alteradas viram arrays novos; num
+    recorte (funcionário ou período), cada coluna é copiada só para as linhas
+    do recorte (indexação por posições). INSS, IRRF e líquido são
+    recalculados pelas tabelas oficiais tanto no cenário quanto na base (que
+    fica em cache), então a diferença mede só o efeito do cenário e não as
+    divergências já gravadas na folha.
+    """
+
+    def __init__(self, payroll_service):
+        self.payroll_service = payroll_service
+        self._baseline: Optional[Dict[str, np.ndarray]] = None
+        self._versions: Optional[np.ndarray] = None
+
+    def _ensure_baseline(self):
+        """Recalcula a base só para as linhas que ainda não estão no cache (carga ou append_records)"""
+        service = self.payroll_service
+        numeric = service.numeric_matrix
+        done = 0 if self._baseline is None else len(self._versions)
+        if done == len(numeric):
+            return
+        with tracer.start_span("simulation.baseline", rows=len(numeric) - done):
+            versions = service.tax_versions()[done:]
+            columns = {field: numeric[done:, _COLUMN[field]] for field in NUMERIC_FIELDS}
+            baseline = recompute_payroll(service.auditor.tables, columns, versions)
+            if self._baseline is None:
+                self._baseline, self._versions = baseline, versions
+            else:
+                self._baseline = {k: np.concatenate([self._baseline[k], v]) for k, v in baseline.items()}
+                self._versions = np.concatenate([self._versions, versions])
+
+    def run(self, scenario: SimulationScenario) -> SimulationResult:
+        start = time.perf_counter()
+        service = self.payroll_service
+        with STAGE_DURATION.time(stage="simulation"), tracer.start_span("simulation.run") as span:
+            self._ensure_baseline()
+            numeric = service.numeric_matrix
+            positions = service.record_positions(scenario.employee_name, scenario.competency,
+                                                 scenario.year, scenario.month)
+            everything = len(positions) == len(numeric)
+            versions = self._versions if everything else self._versions[positions]
+            if (versions < 0).any():
+                # Competências sem tabela vigente ficam fora da simulação
+                positions, versions = positions[versions >= 0], versions[versions >= 0]
+                everything = False
+            span.set_attribute("rows", len(positions))
+
+            def column(field):
+                values = numeric[:, _COLUMN[field]]
+                return values if everything else values[positions]
+
+            current = {field: column(field) for field in NUMERIC_FIELDS}
+            baseline = {k: (v if everything else v[positions]) for k, v in self._baseline.items()}
+            simulated = dict(current)
+            if scenario.base_salary_pct or scenario.base_salary_amount:
+                simulated['base_salary'] = np.round(
+                    current['base_salary'] * (1 + scenario.base_salary_pct / 100) + scenario.base_salary_amount, 2)
+            if scenario.bonus_pct or scenario.bonus_amount:
+                simulated['bonus'] = np.round(current['bonus'] * (1 + scenario.bonus_pct / 100) + scenario.bonus_amount, 2)
+            if scenario.benefits_pct or scenario.benefits_amount:
+                simulated['benefits_vt_vr'] = np.round(
+                    current['benefits_vt_vr'] * (1 + scenario.benefits_pct / 100) + scenario.benefits_amount, 2)
+            simulated.update(recompute_payroll(service.auditor.tables, simulated, versions))
+
+            def gross(values):
+                return values['base_salary'] + values['bonus'] + values['benefits_vt_vr'] + values['other_earnings']
+
+            baseline_gross, simulated_gross = gross(current), gross(simulated)
+            totals_before = {f: float(current[f].sum()) for f in ('base_salary', 'bonus', 'benefits_vt_vr')}
+            totals_before.update(gross_pay=float(baseline_gross.sum()),
+                                 **{f: float(baseline[f].sum()) for f in ('deductions_inss', 'deductions_irrf', 'net_pay')})
+            totals_after = {f: float(simulated[f].sum()) for f in ('base_salary', 'bonus', 'benefits_vt_vr',
+                                                                    'deductions_inss', 'deductions_irrf', 'net_pay')}
+            totals_after['gross_pay'] = float(simulated_gross.sum())
+
+            # Diferença por competência numa passada bincount sobre os códigos
+            codes, competencies = service.competency_codes()
+            codes = codes if everything else codes[positions]
+            n_codes = len(competencies)
+            gross_delta = np.bincount(codes, weights=simulated_gross - baseline_gross, minlength=n_codes)
+            net_delta = np.bincount(codes, weights=simulated['net_pay'] - baseline['net_pay'], minlength=n_codes)
+            present = np.bincount(codes, minlength=n_codes) > 0
+            by_competency = {
+                competencies[i]: {'gross_pay': round(float(gross_delta[i]), 2), 'net_pay': round(float(net_delta[i]), 2)}
+                for i in sorted(np.flatnonzero(present), key=lambda i: competencies[i])
+            }
+
+        SIMULATIONS_TOTAL.inc()
+        logger.info("🧮 Simulação em %d registros: proventos %+.2f, líquido %+.2f (%.0f ms)",
+                    len(positions), totals_after['gross_pay'] - totals_before['gross_pay'],
+                    totals_after['net_pay'] - totals_before['net_pay'], (time.perf_counter() - start) * 1000)
+        return SimulationResult(
+            scenario=scenario,
+            record_count=len(positions),
+            baseline={f: round(totals_before[f], 2) for f in SIMULATION_FIELDS},
+            simulated={f: round(totals_after[f], 2) for f in SIMULATION_FIELDS},
+            delta={f: round(totals_after[f] - totals_before[f], 2) for f in SIMULATION_FIELDS},
+            by_competency=by_competency,
+        )
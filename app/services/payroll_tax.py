@@ -0,0 +1,167 @@
+import json
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils.logger import get_logger
+from ..utils.metrics import metrics
+from ..utils.tracing import tracer
+
+logger = get_logger("tax")
+
+AUDIT_MISMATCHES_TOTAL = metrics.counter(
+    "chatbot_payroll_audit_mismatches_total",
+    "Divergências encontradas na auditoria da folha por campo",
+)
+
+# Campos recalculados e comparados com o que está gravado na folha
+AUDIT_FIELDS = ['deductions_inss', 'deductions_irrf', 'net_pay']
+
+
+class TaxTables:
+    """Tabelas progressivas de INSS e IRRF versionadas por competência.
+
+    Cada versão vale de valid_from até a próxima. As faixas de todas as
+    versões ficam empilhadas em matrizes (versão x faixa), então cada linha
+    da folha só precisa do índice da sua versão para o cálculo vetorizado.
+    """
+
+    def __init__(self, versions: Sequence[Dict]):
+        versions = sorted(versions, key=lambda v: v['valid_from'])
+        if not versions:
+            raise ValueError("Nenhuma versão de tabela de impostos")
+        self.valid_from: List[str] = [v['valid_from'] for v in versions]
+        self.inss_upper = np.array([v['inss']['upper'] for v in versions], dtype=np.float64)
+        self.inss_rates = np.array([v['inss']['rates'] for v in versions], dtype=np.float64)
+        self.irrf_upper = np.array([v['irrf']['upper'] for v in versions], dtype=np.float64)
+        self.irrf_rates = np.array([v['irrf']['rates'] for v in versions], dtype=np.float64)
+        self.irrf_deductions = np.array([v['irrf']['deductions'] for v in versions], dtype=np.float64)
+        self.simplified_discount = np.array([v['irrf'].get('simplified_discount', 0.0) for v in versions])
+        self.min_withholding = np.array([v['irrf'].get('min_withholding', 0.0) for v in versions])
+        # Limite inferior de cada faixa do INSS (0 na primeira)
+        self.inss_lower = np.hstack([np.zeros((len(versions), 1)), self.inss_upper[:, :-1]])
+
+    def __len__(self) -> int:
+        return len(self.valid_from)
+
+    def version_index(self, competencies: Sequence[str]) -> np.ndarray:
+        """Versão vigente em cada competência (-1 se anterior à primeira tabela)"""
+        return np.searchsorted(np.array(self.valid_from), np.asarray(competencies, dtype=str), side='right') - 1
+
+    def inss(self, contribution_base: np.ndarray, version: np.ndarray) -> np.ndarray:
+        """INSS progressivo: cada faixa tributa só a parte do salário dentro dela"""
+        lower, upper = self.inss_lower[version], self.inss_upper[version]
+        portions = np.clip(contribution_base[:, None], lower, upper) - lower
+        return np.round((portions * self.inss_rates[version]).sum(axis=1), 2)
+
+    def irrf(self, taxable: np.ndarray, inss: np.ndarray, version: np.ndarray) -> np.ndarray:
+        """IRRF pela alíquota e parcela a deduzir da faixa, com o desconto simplificado se for maior que o INSS"""
+        base = np.maximum(taxable - np.maximum(inss, self.simplified_discount[version]), 0.0)
+        bracket = (base[:, None] > self.irrf_upper[version]).sum(axis=1)
+        tax = np.round(base * self.irrf_rates[version, bracket] - self.irrf_deductions[version, bracket], 2)
+        # Imposto abaixo do mínimo não é retido
+        return np.where(tax < self.min_withholding[version], 0.0, tax)
+
+
+def load_tax_tables(path: str) -> TaxTables:
+    with open(path, encoding="utf-8") as f:
+        tables = TaxTables(json.load(f)['versions'])
+    logger.info("🧾 Tabelas de INSS/IRRF carregadas: %d versões (%s a %s)",
+                len(tables), tables.valid_from[0], tables.valid_from[-1])
+    return tables
+
+
+def recompute_payroll(tables: TaxTables, values: Mapping[str, np.ndarray], version: np.ndarray) -> Dict[str, np.ndarray]:
+    """INSS, IRRF e líquido recalculados para todas as linhas numa passada.
+
+    Base do INSS e do IRRF: salário base + bônus + outros proventos (VT/VR
+    não entram). Líquido: todos os proventos menos INSS, IRRF e outros
+    descontos. Linhas com version = -1 ficam NaN.
+    """
+    base_salary = np.asarray(values['base_salary'], dtype=np.float64)
+    taxable = base_salary + np.asarray(values['bonus'], dtype=np.float64) + np.asarray(values['other_earnings'], dtype=np.float64)
+    covered = version >= 0
+    safe_version = np.where(covered, version, 0)
+    inss = tables.inss(taxable, safe_version)
+    irrf = tables.irrf(taxable, inss, safe_version)
+    net_pay = np.round(
+        taxable + np.asarray(values['benefits_vt_vr'], dtype=np.float64)
+        - inss - irrf - np.asarray(values['other_deductions'], dtype=np.float64), 2
+    )
+    return {
+        'deductions_inss': np.where(covered, inss, np.nan),
+        'deductions_irrf': np.where(covered, irrf, np.nan),
+        'net_pay': np.where(covered, net_pay, np.nan),
+    }
+
+
+class AuditResult(NamedTuple):
+    rows: int                    # linhas auditadas (com tabela vigente)
+    skipped: int                 # linhas sem tabela para a competência
+    tolerance: float
+    mismatches: pd.DataFrame     # uma linha por (registro, campo) divergente
+
+    def counts(self) -> Dict[str, int]:
+        counts = self.mismatches['field'].value_counts()
+        return {field: int(counts.get(field, 0)) for field in AUDIT_FIELDS}
+
+    @property
+    def records_with_mismatch(self) -> int:
+        # Posições vêm ordenadas: cada registro novo é uma troca de valor
+        positions = self.mismatches['position'].to_numpy()
+        return int(len(positions) and (np.diff(positions) != 0).sum() + 1)
+
+
+class PayrollAuditor:
+    """Confere INSS, IRRF e líquido gravados contra o recálculo pelas tabelas oficiais"""
+
+    def __init__(self, tables: TaxTables, tolerance: float = 0.01):
+        self.tables = tables
+        self.tolerance = tolerance
+
+    def audit(self, data: pd.DataFrame, positions: Optional[np.ndarray] = None,
+              version: Optional[np.ndarray] = None) -> AuditResult:
+        """Audita as linhas em positions (todas por padrão).
+
+        version (versão da tabela por linha auditada) pode vir pronta de quem
+        já tem as competências codificadas; senão sai do factorize da coluna.
+        """
+        if positions is None:
+            positions = np.arange(len(data))
+        with tracer.start_span("payroll.audit", rows=len(positions)):
+            if version is None:
+                codes, competencies = pd.factorize(data['competency'].to_numpy()[positions])
+                version = self.tables.version_index(list(competencies))[codes] if len(codes) else codes
+            columns = {c: data[c].to_numpy(dtype=np.float64)[positions]
+                       for c in ('base_salary', 'bonus', 'benefits_vt_vr', 'other_earnings', 'other_deductions')}
+            expected = recompute_payroll(self.tables, columns, version)
+            covered = version >= 0
+            found = {'position': [], 'field': [], 'stored': [], 'expected': []}
+            for code, field in enumerate(AUDIT_FIELDS):
+                stored = data[field].to_numpy(dtype=np.float64)[positions]
+                # Comparação em centavos para não sinalizar ruído de ponto flutuante
+                difference = np.abs(np.round((stored - expected[field]) * 100))
+                flagged = np.flatnonzero(covered & (difference > round(self.tolerance * 100)))
+                if len(flagged):
+                    AUDIT_MISMATCHES_TOTAL.inc(len(flagged), field=field)
+                found['position'].append(positions[flagged])
+                found['field'].append(np.full(len(flagged), code))
+                found['stored'].append(stored[flagged])
+                found['expected'].append(expected[field][flagged])
+
+            # Ordena por linha da folha (estável: os campos de uma linha mantêm a ordem de AUDIT_FIELDS)
+            found = {key: np.concatenate(parts) for key, parts in found.items()}
+            order = np.argsort(found['position'], kind='stable')
+            found = {key: values[order] for key, values in found.items()}
+            mismatches = data[['employee_id', 'name', 'competency']].take(found['position']).reset_index(drop=True)
+            mismatches['position'] = found['position']
+            mismatches['field'] = pd.Categorical.from_codes(found['field'], AUDIT_FIELDS)
+            mismatches['stored'] = found['stored']
+            mismatches['expected'] = found['expected']
+            mismatches['difference'] = np.round(found['stored'] - found['expected'], 2)
+
+        skipped = int((~covered).sum())
+        logger.info("🔎 Auditoria: %d linhas, %d divergências (tolerância %.2f), %d sem tabela",
+                    len(positions) - skipped, len(mismatches), self.tolerance, skipped)
+        return AuditResult(len(positions) - skipped, skipped, self.tolerance, mismatches)
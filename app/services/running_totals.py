@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils.tracing import tracer
+
+
+def month_number(competency: str) -> int:
+    """'2025-03' -> número absoluto do mês (ano * 12 + mês - 1)"""
+    return int(competency[:4]) * 12 + int(competency[5:7]) - 1
+
+
+class RunningTotals:
+    """Somas acumuladas por funcionário e campo, em ordem de competência.
+
+    Cada funcionário guarda os meses ordenados e uma matriz cum com uma
+    linha de zeros no topo (cum[i] = soma das i primeiras linhas). O total
+    entre dois meses é cum[hi] - cum[lo], com lo e hi vindos de dois
+    searchsorted. Competências novas só estendem o final da matriz; uma
+    competência anterior à última recalcula apenas aquele funcionário.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = list(fields)
+        self.months: Dict[str, np.ndarray] = {}
+        self.cum: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def add_rows(self, keys: np.ndarray, months: np.ndarray, values: np.ndarray):
+        """Inclui linhas (chave do funcionário, mês absoluto, valores por campo)"""
+        if not len(keys):
+            return
+        with tracer.start_span("running_totals.add_rows", rows=len(keys)):
+            codes, uniques = pd.factorize(keys)
+            order = np.lexsort((months, codes))
+            codes, months, values = codes[order], months[order], values[order]
+            bounds = np.flatnonzero(np.diff(codes)) + 1
+            starts = np.concatenate([[0], bounds])
+            ends = np.concatenate([bounds, [len(codes)]])
+            # Cumulativo do lote inteiro de uma vez; cada funcionário é um trecho dele
+            batch_cum = np.vstack([np.zeros((1, len(self.fields))), np.cumsum(values, axis=0)])
+
+            keys_list = uniques.tolist()
+            for code, start, end in zip(codes[starts].tolist(), starts.tolist(), ends.tolist()):
+                key = keys_list[code]
+                new_months = months[start:end]
+                # Inclui a linha de zeros: cum[0] do funcionário = batch_cum[start] - batch_cum[start]
+                new_cum = batch_cum[start:end + 1] - batch_cum[start]
+                old_months = self.months.get(key)
+                if old_months is None:
+                    self.months[key] = new_months
+                    self.cum[key] = new_cum
+                elif new_months[0] >= old_months[-1]:
+                    # Caso comum: competências novas no fim
+                    old_cum = self.cum[key]
+                    self.months[key] = np.concatenate((old_months, new_months))
+                    self.cum[key] = np.concatenate((old_cum, old_cum[-1] + new_cum[1:]))
+                else:
+                    self._rebuild(key, new_months, values[start:end])
+
+    def _rebuild(self, key: str, new_months: np.ndarray, new_values: np.ndarray):
+        old_values = np.diff(self.cum[key], axis=0)
+        merged_months = np.concatenate([self.months[key], new_months])
+        merged_values = np.vstack([old_values, new_values])
+        order = np.argsort(merged_months, kind="stable")
+        self.months[key] = merged_months[order]
+        self.cum[key] = np.vstack([np.zeros((1, len(self.fields))), np.cumsum(merged_values[order], axis=0)])
+
+    def total(self, keys: Iterable[str], start_month: Optional[int] = None,
+              end_month: Optional[int] = None) -> Optional[np.ndarray]:
+        """Soma por campo entre dois meses absolutos (inclusive); None se nenhuma chave existe"""
+        result = None
+        for key in keys:
+            months = self.months.get(key)
+            if months is None:
+                continue
+            lo = 0 if start_month is None else int(np.searchsorted(months, start_month, side="left"))
+            hi = len(months) if end_month is None else int(np.searchsorted(months, end_month, side="right"))
+            cum = self.cum[key]
+            partial = cum[max(hi, lo)] - cum[lo]
+            result = partial if result is None else result + partial
+        return result
+
+    def last_month(self, keys: Iterable[str], year: Optional[int] = None) -> Optional[int]:
+        """Último mês com registro (opcionalmente dentro do ano)"""
+        last = None
+        for key in keys:
+            months = self.months.get(key)
+            if months is None or not len(months):
+                continue
+            if year is not None:
+                i = int(np.searchsorted(months, (year + 1) * 12, side="left")) - 1
+                if i < 0 or months[i] < year * 12:
+                    continue
+                candidate = int(months[i])
+            else:
+                candidate = int(months[-1])
+            last = candidate if last is None else max(last, candidate)
+        return last
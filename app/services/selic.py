@@ -0,0 +1,83 @@
+import json
+from datetime import date
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+logger = get_logger("selic")
+
+DateLike = Union[str, date, np.datetime64]
+
+
+class SelicSeries:
+    """Série diária da Selic com fatores acumulados para correção em O(1).
+
+    cum[i] é o fator acumulado do primeiro dia da série até o início do dia
+    first_day + i (dias corridos; fim de semana e feriado têm fator 1).
+    Corrigir um valor de d0 até d1 é amount * cum[d1] / cum[d0]: duas
+    leituras de array, sem percorrer os dias do intervalo.
+    """
+
+    def __init__(self, first_day: np.datetime64, daily_rates: np.ndarray, business_days: np.ndarray,
+                 basis: int = 252, version: str = ""):
+        self.first_day = np.datetime64(first_day, 'D')
+        self.last_day = self.first_day + len(daily_rates) - 1
+        self.daily_rates = daily_rates          # taxa anual (%) vigente em cada dia corrido
+        self.business_days = business_days
+        self.version = version
+        factors = np.where(business_days, (1 + daily_rates / 100) ** (1 / basis), 1.0)
+        self.cum = np.concatenate([[1.0], np.cumprod(factors)])
+
+    def __len__(self) -> int:
+        return len(self.daily_rates)
+
+    def _offset(self, day):
+        """Índice em cum (limitado à série) de uma data ou array de datas"""
+        if isinstance(day, (str, date, np.datetime64)):
+            offset = int((np.datetime64(day, 'D') - self.first_day).astype(np.int64))
+            return min(max(offset, 0), len(self.daily_rates))
+        offset = (np.asarray(day, dtype='datetime64[D]') - self.first_day).astype(np.int64)
+        return np.clip(offset, 0, len(self.daily_rates))
+
+    def clamp(self, day: DateLike) -> date:
+        """Data limitada ao intervalo coberto pela série"""
+        return min(max(np.datetime64(day, 'D'), self.first_day), self.last_day).astype(date)
+
+    def factor(self, start: DateLike, end: DateLike) -> Union[float, np.ndarray]:
+        """Fator de correção de start (inclusive) até end (exclusive); aceita arrays de datas"""
+        factors = self.cum[self._offset(end)] / self.cum[self._offset(start)]
+        return float(factors) if np.ndim(factors) == 0 else factors
+
+    def correct(self, amount: Union[float, np.ndarray], start: DateLike, end: DateLike):
+        return amount * self.factor(start, end)
+
+    def rate_on(self, day: DateLike) -> float:
+        """Selic efetiva anual (%) vigente no dia"""
+        return float(self.daily_rates[min(self._offset(day), len(self.daily_rates) - 1)])
+
+
+def build_selic_series(decisions: Sequence[Dict], start: str, end: str, holidays: Sequence[str] = (),
+                       basis: int = 252, effective_spread: float = 0.0, version: str = "") -> SelicSeries:
+    """Expande as decisões do Copom (meta vigente desde o dia seguinte à reunião) em série diária"""
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    decisions = sorted(decisions, key=lambda d: d['meeting'])
+    effective_from = np.array([np.datetime64(d['meeting'], 'D') + 1 for d in decisions])
+    targets = np.array([d['target'] for d in decisions], dtype=np.float64)
+    index = np.searchsorted(effective_from, days, side='right') - 1
+    if (index < 0).any():
+        raise ValueError(f"Série Selic começa em {start}, antes da primeira decisão do Copom")
+    rates = targets[index] - effective_spread
+    business_days = np.is_busday(days, holidays=np.array(holidays, dtype='datetime64[D]'))
+    return SelicSeries(days[0], rates, business_days, basis, version)
+
+
+def load_selic_series(path: str) -> SelicSeries:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    series = build_selic_series(raw['decisions'], raw['start'], raw['end'], raw.get('holidays', []),
+                                raw.get('basis', 252), raw.get('effective_spread', 0.0), raw.get('version', ''))
+    logger.info("📈 Série Selic carregada: %s a %s (versão %s, %d dias úteis)",
+                series.first_day, series.last_day, series.version, int(series.business_days.sum()))
+    return series
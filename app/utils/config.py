@@ -14,13 +14,102 @@ class Settings:
     
     # Web Search (Opcional)
     SERPER_API_KEY: str = os.getenv("SERPER_API_KEY", "")
+    SERPER_BASE_URL: str = os.getenv("SERPER_BASE_URL", "https://api.serper.dev")
+    SERPER_TIMEOUT_S: float = float(os.getenv("SERPER_TIMEOUT_S", "10"))
+    WEB_SEARCH_DEADLINE_S: float = float(os.getenv("WEB_SEARCH_DEADLINE_S", "5"))
+    WEB_SEARCH_MAX_WORKERS: int = int(os.getenv("WEB_SEARCH_MAX_WORKERS", "4"))
+    HTTP_POOL_CONNECTIONS: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+    # Resiliência: prazo por requisição e circuit breakers das dependências externas
+    REQUEST_DEADLINE_S: float = float(os.getenv("REQUEST_DEADLINE_S", "20"))
+    LLM_TIMEOUT_S: float = float(os.getenv("LLM_TIMEOUT_S", "15"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "1"))
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RECOVERY_S: float = float(os.getenv("BREAKER_RECOVERY_S", "30"))
+
+    # Cache de fatos da web (stale-while-revalidate, arquivos compartilhados entre workers)
+    WEB_CACHE_DIR: str = os.getenv("WEB_CACHE_DIR", "cache/web")
+    WEB_CACHE_TTL_S: float = float(os.getenv("WEB_CACHE_TTL_S", "3600"))
+    WEB_CACHE_MAX_AGE_S: float = float(os.getenv("WEB_CACHE_MAX_AGE_S", str(7 * 86400)))
+    SELIC_CACHE_TTL_S: float = float(os.getenv("SELIC_CACHE_TTL_S", str(6 * 3600)))
     
     # App
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE: str = os.getenv("LOG_FILE", "app.log")
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "3"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Taxas de amostragem de logs abaixo de WARNING por categoria, ex: "rag=0.1,observability=0.2"
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
     MAX_CONVERSATION_HISTORY: int = int(os.getenv("MAX_CONVERSATION_HISTORY", "10"))
-    
+
+    # Roteador de intenção local (n-gramas com hashing); abaixo do limiar de confiança usa palavras-chave
+    INTENT_ROUTER_ENABLED: bool = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+    INTENT_MODEL_PATH: str = os.getenv("INTENT_MODEL_PATH", "data/intent_router.npz")
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+
+    # Endpoint /query (PayrollQuery estruturada, avulsa ou em lote)
+    QUERY_MAX_BATCH: int = int(os.getenv("QUERY_MAX_BATCH", "1000"))
+    QUERY_MAX_EVIDENCE: int = int(os.getenv("QUERY_MAX_EVIDENCE", "100"))
+
+    # Consultas da empresa (folha total, top-N, médias e percentis) servidas por agregados parciais
+    ANALYTICS_PRELOAD: bool = os.getenv("ANALYTICS_PRELOAD", "true").lower() == "true"
+    ANALYTICS_TOP_N: int = int(os.getenv("ANALYTICS_TOP_N", "100"))
+    ANALYTICS_QUANTILE_ACCURACY: float = float(os.getenv("ANALYTICS_QUANTILE_ACCURACY", "0.01"))
+
+    # Auditoria de INSS/IRRF/líquido: divergência acima da tolerância (R$) é sinalizada
+    AUDIT_TOLERANCE: float = float(os.getenv("AUDIT_TOLERANCE", "0.01"))
+
+    # Execução especulativa: em roteamento ambíguo, RAG e LLM em paralelo (vale o primeiro válido)
+    SPECULATIVE_ENABLED: bool = os.getenv("SPECULATIVE_ENABLED", "true").lower() == "true"
+    SPECULATIVE_MAX_WORKERS: int = int(os.getenv("SPECULATIVE_MAX_WORKERS", "8"))
+
+    # Recuperação local (registros da folha + FAQ) usada como contexto do LLM
+    RETRIEVAL_ENABLED: bool = os.getenv("RETRIEVAL_ENABLED", "true").lower() == "true"
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+    RETRIEVAL_MIN_SCORE: float = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.2"))
+    RETRIEVAL_DIM: int = int(os.getenv("RETRIEVAL_DIM", "1024"))
+    RETRIEVAL_IVF_THRESHOLD: int = int(os.getenv("RETRIEVAL_IVF_THRESHOLD", "20000"))
+    RETRIEVAL_IVF_PROBES: int = int(os.getenv("RETRIEVAL_IVF_PROBES", "8"))
+
+    # Prompt do LLM: orçamento de tokens (estimados localmente) e histórico recente mantido inteiro
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+    PROMPT_RECENT_MESSAGES: int = int(os.getenv("PROMPT_RECENT_MESSAGES", "4"))
+    PROMPT_SUMMARY_CHARS: int = int(os.getenv("PROMPT_SUMMARY_CHARS", "160"))
+
+    # Streamlit (quantidade de mensagens exibidas por vez no histórico)
+    CHAT_HISTORY_WINDOW: int = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+
+    # Tracing (spans exportados em JSONL local)
+    TRACE_ENABLED: bool = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+    TRACE_SLOW_MS: float = float(os.getenv("TRACE_SLOW_MS", "1000"))
+    TRACE_DIR: str = os.getenv("TRACE_DIR", "traces")
+    TRACE_MAX_BYTES: int = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+    TRACE_BACKUP_COUNT: int = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+
+    # Profiling sob demanda (header X-Profile ou PROFILE_ALL_REQUESTS); o header vem desligado
+    # porque qualquer cliente poderia ligar a amostragem e gravar arquivos no servidor
+    PROFILE_HEADER_ENABLED: bool = os.getenv("PROFILE_HEADER_ENABLED", "false").lower() == "true"
+    PROFILE_ALL_REQUESTS: bool = os.getenv("PROFILE_ALL_REQUESTS", "false").lower() == "true"
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_MAX_CONCURRENT: int = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+
+    # Memória (tracemalloc e amostragem periódica para /metrics; 0 desliga o sampler)
+    MEMORY_TRACEMALLOC: bool = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+    MEMORY_TRACEMALLOC_FRAMES: int = int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "1"))
+    MEMORY_SAMPLER_INTERVAL_S: float = float(os.getenv("MEMORY_SAMPLER_INTERVAL_S", "0"))
+
+    # Token exigido nos endpoints /admin (vazio = endpoints desabilitados)
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
     # Paths
     DATA_DIR: str = "data"
     PAYROLL_FILE: str = "payroll.csv"
+    FAQ_FILE: str = os.getenv("FAQ_FILE", "faq.jsonl")
+    TAX_TABLES_FILE: str = os.getenv("TAX_TABLES_FILE", "tax_tables.json")
+    SELIC_SERIES_FILE: str = os.getenv("SELIC_SERIES_FILE", "selic.json")
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,25 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import settings
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Sessão HTTP compartilhada, com pool de conexões keep-alive (evita novo TCP/TLS por chamada)"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                                      pool_maxsize=settings.HTTP_POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
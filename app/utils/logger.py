@@ -1,17 +1,202 @@
-
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+import threading
+from typing import Dict, List, Optional
+
+from .config import settings
+from .metrics import metrics
+
+LOGGER_NAME = 'chatbot_payroll'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-# Configuração básica e direta
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('app.log', encoding='utf-8')
-    ]
+LOG_RECORDS_DROPPED = metrics.counter(
+    "chatbot_log_records_dropped_total",
+    "Registros de log descartados (fila cheia ou amostragem)",
 )
 
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Converte 'rag=0.1,observability=0.5' em {'rag': 0.1, 'observability': 0.5}"""
+    rates = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        category, rate = item.split('=', 1)
+        rates[category.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+def _category(logger_name: str) -> str:
+    # 'chatbot_payroll.rag' -> 'rag'; bibliotecas usam o primeiro componente
+    if logger_name.startswith(LOGGER_NAME + '.'):
+        return logger_name[len(LOGGER_NAME) + 1:]
+    return logger_name.split('.', 1)[0]
+
+
+class SamplingFilter(logging.Filter):
+    """Amostra registros abaixo de WARNING conforme a taxa de cada categoria"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rates.get(_category(record.name), 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.inc(reason="sampled")
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enfileira o registro sem formatá-lo: a formatação acontece na thread de escrita"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(reason="queue_full")
+
+
+class BatchingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que grava um lote inteiro com um único write/flush"""
+
+    def emit_batch(self, records: List[logging.LogRecord]):
+        try:
+            data = ''.join(self.format(record) + self.terminator for record in records)
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0:
+                self.stream.seek(0, 2)
+                # Tamanho em bytes (acentos e emojis ocupam mais de um byte)
+                size = len(data.encode(self.encoding or 'utf-8'))
+                if self.stream.tell() + size >= self.maxBytes and self.stream.tell() > 0:
+                    self.doRollover()
+                    if self.stream is None:
+                        self.stream = self._open()
+            self.stream.write(data)
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+
+
+class BackgroundLogWriter:
+    """Consome a fila de logs numa thread própria, agrupando registros em lotes"""
+
+    _SENTINEL = None
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 batch_size: int = 256, flush_interval: float = 0.5):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            try:
+                self.queue.put(self._SENTINEL, timeout=1)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if record is self._SENTINEL:
+                    running = False
+                    break
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[logging.LogRecord]):
+        for handler in self.handlers:
+            records = [r for r in batch if r.levelno >= handler.level]
+            if not records:
+                continue
+            if isinstance(handler, BatchingRotatingFileHandler):
+                handler.acquire()
+                try:
+                    handler.emit_batch(records)
+                finally:
+                    handler.release()
+            else:
+                for record in records:
+                    handler.handle(record)
+
+
+def setup_logging() -> BackgroundLogWriter:
+    """Configura o logger raiz com fila + escrita em background (idempotente)"""
+    root = logging.getLogger()
+    existing = getattr(root, '_chatbot_log_writer', None)
+    if existing is not None:
+        return existing
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler = BatchingRotatingFileHandler(
+        settings.LOG_FILE,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True,
+    )
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(settings.LOG_SAMPLE_RATES)))
+
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    writer = BackgroundLogWriter(log_queue, [stream_handler, file_handler])
+    writer.start()
+    atexit.register(writer.stop)
+    root._chatbot_log_writer = writer
+    return writer
+
+
+def get_logger(category: Optional[str] = None) -> logging.Logger:
+    """Logger da aplicação; a categoria define a taxa de amostragem"""
+    if category:
+        return logging.getLogger(f"{LOGGER_NAME}.{category}")
+    return logging.getLogger(LOGGER_NAME)
+
+
+setup_logging()
+
 # Logger global
-logger = logging.getLogger('chatbot_payroll')
-logger.info("✅ Logger inicializado")
\ No newline at end of file
+logger = get_logger()
+logger.info("✅ Logger inicializado")
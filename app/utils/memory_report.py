@@ -0,0 +1,263 @@
+import gc
+import sys
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import settings
+from .logger import get_logger
+from .metrics import metrics
+
+logger = get_logger("memory")
+
+MEMORY_RSS_BYTES = metrics.gauge(
+    "chatbot_memory_rss_bytes",
+    "Memória residente do processo",
+)
+MEMORY_STRUCTURE_BYTES = metrics.gauge(
+    "chatbot_memory_structure_bytes",
+    "Tamanho estimado das principais estruturas em memória",
+)
+MEMORY_STRUCTURE_ITEMS = metrics.gauge(
+    "chatbot_memory_structure_items",
+    "Quantidade de itens nas principais estruturas em memória",
+)
+MEMORY_TRACEMALLOC_BYTES = metrics.gauge(
+    "chatbot_memory_tracemalloc_bytes",
+    "Memória rastreada pelo tracemalloc (current/peak)",
+)
+
+
+# ================================
+# Tamanho de estruturas
+# ================================
+def deep_sizeof(obj: Any) -> int:
+    """Tamanho aproximado de um objeto e tudo que ele referencia (sem contar duas vezes)"""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        # DataFrame/Series: o pandas sabe medir (incluindo strings em colunas object)
+        memory_usage = getattr(current, "memory_usage", None)
+        if callable(memory_usage) and hasattr(current, "dtypes"):
+            usage = memory_usage(deep=True)
+            total += int(usage.sum() if hasattr(usage, "sum") else usage)
+            continue
+
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            stack.append(current.__dict__)
+    return total
+
+
+def _item_count(obj: Any) -> Optional[int]:
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+class StructureRegistry:
+    """Estruturas que crescem com o processo, medidas sob demanda.
+
+    Cada fonte é uma função sem argumentos que devolve o objeto a medir
+    (ou None, se ainda não existe).
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: Callable[[], Any]):
+        with self._lock:
+            self._sources[name] = source
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def measure(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            sources = list(self._sources.items())
+        sizes = {}
+        for name, source in sources:
+            try:
+                obj = source()
+            except Exception as e:
+                logger.warning("Falha ao medir estrutura %s: %s", name, e)
+                continue
+            if obj is None:
+                continue
+            sizes[name] = {"bytes": deep_sizeof(obj), "items": _item_count(obj)}
+        return sizes
+
+
+# Registro global de estruturas
+structures = StructureRegistry()
+
+
+# ================================
+# Processo e tracemalloc
+# ================================
+def rss_bytes() -> Optional[int]:
+    """Memória residente atual (Linux); cai para o pico via resource em outros sistemas"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def start_tracemalloc(nframes: int = 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+        logger.info("🧠 tracemalloc iniciado (%d frames)", nframes)
+
+
+def _stat_to_dict(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {"location": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count}
+
+
+def _diff_to_dict(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "size_diff_bytes": stat.size_diff,
+        "count_diff": stat.count_diff,
+    }
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    """Snapshot sem as alocações do próprio tracemalloc e do importlib"""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+class SnapshotStore:
+    """Snapshots nomeados do tracemalloc para comparação posterior (mantém os últimos N)"""
+
+    def __init__(self, max_snapshots: int = 5):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, name: str) -> tracemalloc.Snapshot:
+        start_tracemalloc()
+        snapshot = take_snapshot()
+        with self._lock:
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = snapshot
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, name: str) -> Optional[tracemalloc.Snapshot]:
+        return self._snapshots.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._snapshots)
+
+
+snapshots = SnapshotStore()
+
+
+def top_allocators(snapshot: tracemalloc.Snapshot, limit: int = 10) -> List[Dict[str, Any]]:
+    return [_stat_to_dict(stat) for stat in snapshot.statistics("lineno")[:limit]]
+
+
+def diff_snapshots(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = 10) -> List[Dict[str, Any]]:
+    """Maiores variações por linha de código entre dois snapshots"""
+    return [_diff_to_dict(stat) for stat in new.compare_to(old, "lineno")[:limit]]
+
+
+def memory_report(limit: int = 10, include_allocators: bool = True) -> Dict[str, Any]:
+    """Retrato da memória do processo: RSS, GC, estruturas e top alocadores (se tracemalloc ativo)"""
+    report: Dict[str, Any] = {
+        "rss_bytes": rss_bytes(),
+        "gc": {"counts": gc.get_count(), "objects": len(gc.get_objects())},
+        "structures": structures.measure(),
+        "tracemalloc": {"tracing": tracemalloc.is_tracing(), "snapshots": snapshots.names()},
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"].update({"current_bytes": current, "peak_bytes": peak})
+        if include_allocators:
+            report["tracemalloc"]["top"] = top_allocators(take_snapshot(), limit)
+    return report
+
+
+# ================================
+# Amostragem periódica para /metrics
+# ================================
+def record_memory_metrics() -> Dict[str, Any]:
+    report = memory_report(include_allocators=False)
+    if report["rss_bytes"] is not None:
+        MEMORY_RSS_BYTES.set(report["rss_bytes"])
+    for name, size in report["structures"].items():
+        MEMORY_STRUCTURE_BYTES.set(size["bytes"], structure=name)
+        if size["items"] is not None:
+            MEMORY_STRUCTURE_ITEMS.set(size["items"], structure=name)
+    if report["tracemalloc"]["tracing"]:
+        MEMORY_TRACEMALLOC_BYTES.set(report["tracemalloc"]["current_bytes"], kind="current")
+        MEMORY_TRACEMALLOC_BYTES.set(report["tracemalloc"]["peak_bytes"], kind="peak")
+    return report
+
+
+class MemorySampler:
+    """Thread daemon que atualiza as métricas de memória a cada interval_s"""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def start(self) -> "MemorySampler":
+        self._thread.start()
+        logger.info("🧠 Amostragem de memória a cada %.0fs", self.interval_s)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                report = record_memory_metrics()
+                logger.debug("Memória: RSS %s bytes | estruturas %s", report["rss_bytes"], report["structures"])
+            except Exception as e:
+                logger.warning("Falha na amostragem de memória: %s", e)
+            if self._stop.wait(self.interval_s):
+                return
+
+
+def start_memory_instrumentation() -> Optional[MemorySampler]:
+    """Liga tracemalloc e o sampler conforme a configuração"""
+    if settings.MEMORY_TRACEMALLOC:
+        start_tracemalloc(settings.MEMORY_TRACEMALLOC_FRAMES)
+    if settings.MEMORY_SAMPLER_INTERVAL_S > 0:
+        return MemorySampler(settings.MEMORY_SAMPLER_INTERVAL_S).start()
+    return None
@@ -0,0 +1,286 @@
+import threading
+from collections import deque
+from bisect import bisect_left
+from time import perf_counter_ns
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Buckets padrão (em segundos) para latências do pipeline
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monotônico com labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge:
+    """Valor instantâneo com labels (pode subir e descer)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class _HistogramSeries:
+    """Série de um histograma; observações entram numa fila sem lock
+    (deque.append é atômico) e são consolidadas nos buckets sob demanda"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "pending", "lock")
+
+    MAX_PENDING = 4096
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.pending: deque = deque()
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        self.pending.append(value)
+        if len(self.pending) > self.MAX_PENDING:
+            self.drain()
+
+    def drain(self):
+        with self.lock:
+            pending = self.pending
+            while True:
+                try:
+                    value = pending.popleft()
+                except IndexError:
+                    break
+                self.counts[bisect_left(self.buckets, value)] += 1
+                self.sum += value
+                self.count += 1
+
+
+class Histogram:
+    """Histograma de buckets fixos (valores em segundos)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._by_raw_key: Dict[tuple, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        self._series_for(labels).observe(value)
+
+    def observe_ns(self, elapsed_ns: int, **labels):
+        self._series_for(labels).observe(elapsed_ns / 1e9)
+
+    def _series_for(self, labels: Dict[str, str]) -> "_HistogramSeries":
+        # Cache pela ordem original dos labels: evita ordenar a cada observação
+        raw_key = tuple(labels.items())
+        series = self._by_raw_key.get(raw_key)
+        if series is None:
+            key = _label_key(labels)
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _HistogramSeries(self.buckets)
+                self._by_raw_key[raw_key] = series
+        return series
+
+    def time(self, **labels) -> "Timer":
+        """Context manager que mede a duração do bloco com perf_counter_ns"""
+        return Timer(self._series_for(labels))
+
+    def snapshot(self, **labels) -> Dict[str, float]:
+        """Retorna contagem e soma da série (útil em testes e relatórios)"""
+        series = self._series.get(_label_key(labels))
+        if series is None:
+            return {"count": 0, "sum": 0.0}
+        series.drain()
+        return {"count": series.count, "sum": series.sum}
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            series_items = list(self._series.items())
+
+        items = []
+        for key, series in series_items:
+            series.drain()
+            with series.lock:
+                items.append((key, list(series.counts), series.sum, series.count))
+
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Timer:
+    """Mede um bloco de código e registra no histograma ao sair"""
+
+    __slots__ = ("_series", "_start")
+
+    def __init__(self, series: _HistogramSeries):
+        self._series = series
+        self._start = 0
+
+    def __enter__(self) -> "Timer":
+        self._start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._series.observe((perf_counter_ns() - self._start) / 1e9)
+        return False
+
+
+class MetricsRegistry:
+    """Registro central de métricas exportadas em formato Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrica '{name}' já registrada com outro tipo")
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global
+metrics = MetricsRegistry()
+
+# Métricas compartilhadas pelo pipeline do chat
+STAGE_DURATION = metrics.histogram(
+    "chatbot_stage_duration_seconds",
+    "Duração de cada etapa do processamento de uma mensagem",
+)
+REQUEST_DURATION = metrics.histogram(
+    "chatbot_request_duration_seconds",
+    "Duração total das interações por status",
+)
+REQUESTS_TOTAL = metrics.counter(
+    "chatbot_requests_total",
+    "Total de interações por status",
+)
+RAG_QUERIES_TOTAL = metrics.counter(
+    "chatbot_rag_queries_total",
+    "Consultas processadas pelo RAGEngine por tipo",
+)
+GUARDRAIL_TRIGGERS_TOTAL = metrics.counter(
+    "chatbot_guardrail_triggers_total",
+    "Bloqueios de guardrails por motivo",
+)
@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from .config import settings
+from .metrics import metrics
+
+PROFILES_TOTAL = metrics.counter(
+    "chatbot_profiles_total",
+    "Requisições perfiladas por resultado (recorded/skipped)",
+)
+
+# Sampler da requisição em andamento (herdado pelas threads de executor via copy_context)
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+def _frame_label(frame) -> str:
+    """Nome do frame no formato 'função (pasta/arquivo.py:linha)'"""
+    code = frame.f_code
+    folder, filename = os.path.split(code.co_filename)
+    return f"{code.co_name} ({os.path.basename(folder)}/{filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Amostra periodicamente a pilha de uma thread (via sys._current_frames).
+
+    Roda em uma thread daemon separada, então a thread perfilada não é
+    instrumentada; o custo é uma captura de pilha a cada intervalo. Threads
+    de executor que rodam trabalho da requisição via run_sampled também são
+    amostradas enquanto esse trabalho dura, com o nome da thread como raiz
+    da pilha.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float = 0.005):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        # thread id -> prefixo da pilha (None para a thread da requisição)
+        self._threads: Dict[int, Optional[str]] = {thread_id: None}
+        self._threads_lock = threading.Lock()
+        self.stacks: StackCounter = StackCounter()
+        self.samples = 0
+        self.path: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def follow(self, thread_id: int, name: str):
+        with self._threads_lock:
+            self._threads[thread_id] = name
+
+    def unfollow(self, thread_id: int):
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+
+    def _run(self):
+        labels = {}
+        while not self._stop.wait(self.interval_s):
+            with self._threads_lock:
+                threads = list(self._threads.items())
+            frames = sys._current_frames()
+            for thread_id, prefix in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(frame)
+                    stack.append(label)
+                    frame = frame.f_back
+                if prefix is not None:
+                    stack.append(prefix)
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        """Pilhas no formato colapsado (flamegraph.pl, speedscope, inferno)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Perfila requisições individuais com um limite de perfis simultâneos"""
+
+    def __init__(self, directory: str = "profiles", interval_ms: float = 5.0, max_concurrent: int = 2):
+        self.directory = directory
+        self.interval_s = interval_ms / 1000.0
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[Optional[StackSampler]]:
+        """Amostra a thread atual durante o bloco e grava o perfil ao sair.
+
+        Se já houver max_concurrent perfis em andamento, o bloco roda sem
+        perfil e o valor retornado é None.
+        """
+        if not self._slots.acquire(blocking=False):
+            PROFILES_TOTAL.inc(outcome="skipped")
+            yield None
+            return
+        sampler = StackSampler(threading.get_ident(), self.interval_s).start()
+        token = _active_sampler.set(sampler)
+        try:
+            yield sampler
+        finally:
+            _active_sampler.reset(token)
+            sampler.stop()
+            self._slots.release()
+            sampler.path = self._write(name, sampler)
+            PROFILES_TOTAL.inc(outcome="recorded")
+
+    def _write(self, name: str, sampler: StackSampler) -> Optional[str]:
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{uuid.uuid4().hex[:8]}.collapsed"
+        path = os.path.join(self.directory, filename)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(sampler.collapsed())
+        except OSError:
+            return None
+        return path
+
+
+def run_sampled(fn: Callable, *args, **kwargs):
+    """Roda fn incluindo a thread atual no perfil da requisição que submeteu o trabalho.
+
+    Para tarefas de executor submetidas com contextvars.copy_context().run;
+    sem perfil ativo é só a chamada de fn.
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return fn(*args, **kwargs)
+    thread = threading.current_thread()
+    sampler.follow(thread.ident, f"thread {thread.name}")
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        sampler.unfollow(thread.ident)
+
+
+# Profiler global
+profiler = RequestProfiler(
+    settings.PROFILE_DIR,
+    interval_ms=settings.PROFILE_INTERVAL_MS,
+    max_concurrent=settings.PROFILE_MAX_CONCURRENT,
+)
@@ -0,0 +1,197 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .config import settings
+from .logger import get_logger
+from .metrics import metrics
+
+logger = get_logger("resilience")
+
+CIRCUIT_STATE = metrics.gauge(
+    "chatbot_circuit_breaker_state",
+    "Estado do circuit breaker por dependência (0=fechado, 1=meio-aberto, 2=aberto)",
+)
+CIRCUIT_TRANSITIONS_TOTAL = metrics.counter(
+    "chatbot_circuit_breaker_transitions_total",
+    "Mudanças de estado dos circuit breakers",
+)
+CIRCUIT_REJECTIONS_TOTAL = metrics.counter(
+    "chatbot_circuit_breaker_rejections_total",
+    "Chamadas recusadas na hora por circuito aberto",
+)
+DEADLINE_EXCEEDED_TOTAL = metrics.counter(
+    "chatbot_deadline_exceeded_total",
+    "Chamadas externas não feitas porque o prazo da requisição acabou",
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Dependência com circuito aberto: a chamada nem é tentada"""
+
+    def __init__(self, dependency: str, retry_after_s: float):
+        super().__init__(f"Circuito aberto para {dependency} (nova tentativa em {retry_after_s:.0f}s)")
+        self.dependency = dependency
+        self.retry_after_s = retry_after_s
+
+
+class DeadlineExceeded(Exception):
+    """O prazo da requisição acabou antes da chamada externa"""
+
+
+# ================================
+# Prazo da requisição
+# ================================
+# Instante (time.monotonic) em que a requisição atual expira
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[float]:
+    """Define o prazo da requisição; prazos aninhados nunca estendem o de fora"""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Segundos até o fim do prazo (None se não há prazo no contexto)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def outbound_timeout(max_timeout: float, dependency: str = "") -> float:
+    """Timeout de uma chamada externa: o menor entre o da dependência e o que resta do prazo"""
+    remaining = remaining_time()
+    if remaining is None:
+        return max_timeout
+    if remaining <= 0:
+        DEADLINE_EXCEEDED_TOTAL.inc(dependency=dependency)
+        raise DeadlineExceeded(f"Prazo da requisição esgotado antes de chamar {dependency or 'dependência'}")
+    return min(max_timeout, remaining)
+
+
+# ================================
+# Circuit breaker
+# ================================
+class CircuitBreaker:
+    """Abre após failure_threshold falhas seguidas; depois de recovery_timeout_s
+    deixa passar half_open_max_calls chamadas de teste (meio-aberto): sucesso
+    fecha o circuito, falha reabre."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout_s: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_s = recovery_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, dependency=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def is_open(self) -> bool:
+        """True se chamadas seriam recusadas agora (não consome a vaga de teste)"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state == OPEN or (
+                self._state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls
+            )
+
+    def retry_after_s(self) -> float:
+        return max(0.0, self._opened_at + self.recovery_timeout_s - self._clock())
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def before_call(self):
+        """Reserva a chamada ou levanta CircuitOpenError"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN or (
+                self._state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls
+            ):
+                CIRCUIT_REJECTIONS_TOTAL.inc(dependency=self.name)
+                raise CircuitOpenError(self.name, self.retry_after_s())
+            if self._state == HALF_OPEN:
+                self._half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                if self._state != OPEN:
+                    self._transition(OPEN)
+                else:
+                    self._half_open_calls = 0
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.recovery_timeout_s:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str):
+        previous, self._state = self._state, state
+        self._half_open_calls = 0
+        CIRCUIT_STATE.set(_STATE_VALUES[state], dependency=self.name)
+        CIRCUIT_TRANSITIONS_TOTAL.inc(dependency=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log("🔌 Circuito %s: %s → %s", self.name, previous, state)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def reset_breakers():
+    """Volta todos os breakers para fechado (usado em testes e após manutenção)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.record_success()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Breaker compartilhado da dependência (criado com os limites da configuração)"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout_s=settings.BREAKER_RECOVERY_S,
+            )
+        return breaker
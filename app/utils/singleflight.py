@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from .metrics import metrics
+from .resilience import DeadlineExceeded, remaining_time
+
+SINGLEFLIGHT_CALLS_TOTAL = metrics.counter(
+    "chatbot_singleflight_calls_total",
+    "Chamadas pelo single-flight por grupo e papel (leader executa, shared reaproveita)",
+)
+SINGLEFLIGHT_SAVED_TOTAL = metrics.counter(
+    "chatbot_singleflight_saved_calls_total",
+    "Chamadas externas evitadas por reaproveitar uma chamada idêntica em andamento",
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Agrupa chamadas idênticas simultâneas: só a primeira (leader) executa,
+    as demais esperam e recebem o mesmo resultado (ou a mesma exceção).
+
+    Não é cache: assim que a chamada termina, a próxima com a mesma chave
+    executa de novo.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLEFLIGHT_CALLS_TOTAL.inc(group=self.group, role="shared")
+            SINGLEFLIGHT_SAVED_TOTAL.inc(group=self.group)
+            # Quem espera respeita o próprio prazo, não o do leader
+            if not call.done.wait(remaining_time()):
+                raise DeadlineExceeded(f"Prazo esgotado aguardando chamada em andamento ({self.group})")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_CALLS_TOTAL.inc(group=self.group, role="leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
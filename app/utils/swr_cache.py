@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from .config import settings
+from .logger import get_logger
+from .metrics import metrics
+
+logger = get_logger("cache")
+
+WEB_CACHE_REQUESTS_TOTAL = metrics.counter(
+    "chatbot_web_cache_requests_total",
+    "Leituras do cache de fatos da web por chave e resultado (hit/stale/miss)",
+)
+WEB_CACHE_REFRESHES_TOTAL = metrics.counter(
+    "chatbot_web_cache_refreshes_total",
+    "Atualizações do cache de fatos da web por chave e status",
+)
+
+
+class CachedValue(NamedTuple):
+    value: Any
+    fetched_at: float   # epoch (s) em que o valor foi obtido na origem
+    stale: bool         # True se o TTL venceu e uma atualização foi disparada
+    source: str         # "memory", "file" ou "fetch"
+
+    @property
+    def age_s(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class SWRCache:
+    """Cache stale-while-revalidate em memória + arquivos JSON.
+
+    Os arquivos em `directory` são compartilhados entre workers: quem lê um
+    valor vencido devolve o valor antigo na hora e dispara a atualização em
+    background; um arquivo de lock garante que só um worker por vez busca
+    a mesma chave na origem. Valores mais velhos que max_age_s não são
+    servidos e a busca passa a ser síncrona.
+    """
+
+    def __init__(self, directory: str, ttl_s: float = 3600.0, max_age_s: float = 7 * 86400.0,
+                 lock_timeout_s: float = 60.0):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self.max_age_s = max_age_s
+        self.lock_timeout_s = lock_timeout_s
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    # -----------------------
+    # Leitura
+    # -----------------------
+    def get(self, key: str, fetch: Callable[[], Any], ttl_s: Optional[float] = None) -> CachedValue:
+        """Valor da chave; fetch só é chamado em falta (síncrono) ou no refresh (background)"""
+        ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        entry, source = self._memory.get(key), "memory"
+        if entry is None or time.time() - entry["fetched_at"] > ttl_s:
+            # Outro worker pode já ter atualizado o arquivo
+            file_entry = self._read_file(key)
+            if file_entry is not None and (entry is None or file_entry["fetched_at"] > entry["fetched_at"]):
+                entry, source = file_entry, "file"
+                self._memory[key] = entry
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age <= ttl_s:
+                WEB_CACHE_REQUESTS_TOTAL.inc(key=key, result="hit")
+                return CachedValue(entry["value"], entry["fetched_at"], False, source)
+            if age <= self.max_age_s:
+                WEB_CACHE_REQUESTS_TOTAL.inc(key=key, result="stale")
+                self._refresh_in_background(key, fetch)
+                return CachedValue(entry["value"], entry["fetched_at"], True, source)
+
+        WEB_CACHE_REQUESTS_TOTAL.inc(key=key, result="miss")
+        entry = self._fetch_and_store(key, fetch)
+        return CachedValue(entry["value"], entry["fetched_at"], False, "fetch")
+
+    def invalidate(self, key: str):
+        self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    # -----------------------
+    # Atualização
+    # -----------------------
+    def _fetch_and_store(self, key: str, fetch: Callable[[], Any]) -> Dict[str, Any]:
+        try:
+            value = fetch()
+        except Exception:
+            WEB_CACHE_REFRESHES_TOTAL.inc(key=key, status="error")
+            raise
+        entry = {"value": value, "fetched_at": time.time()}
+        self._memory[key] = entry
+        self._write_file(key, entry)
+        WEB_CACHE_REFRESHES_TOTAL.inc(key=key, status="ok")
+        return entry
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        thread = threading.Thread(target=self._refresh, args=(key, fetch), name=f"swr-refresh-{key}", daemon=True)
+        thread.start()
+
+    def _refresh(self, key: str, fetch: Callable[[], Any]):
+        try:
+            if not self._acquire_file_lock(key):
+                return  # outro worker já está atualizando
+            try:
+                self._fetch_and_store(key, fetch)
+                logger.info("🔄 Cache '%s' atualizado em background", key)
+            finally:
+                self._release_file_lock(key)
+        except Exception as e:
+            # O valor antigo continua sendo servido até max_age_s
+            logger.warning("⚠️ Falha ao atualizar cache '%s': %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # -----------------------
+    # Arquivos
+    # -----------------------
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _read_file(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("key") == key else None
+
+    def _write_file(self, key: str, entry: Dict[str, Any]):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, **entry}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # troca atômica: leitores nunca veem arquivo parcial
+        except OSError as e:
+            logger.warning("⚠️ Não foi possível gravar cache '%s': %s", key, e)
+
+    def _acquire_file_lock(self, key: str) -> bool:
+        lock_path = self._path(key) + ".lock"
+        os.makedirs(self.directory, exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) < self.lock_timeout_s:
+                        return False
+                    os.remove(lock_path)  # lock abandonado por um worker que morreu
+                except OSError:
+                    return False
+        return False
+
+    def _release_file_lock(self, key: str):
+        try:
+            os.remove(self._path(key) + ".lock")
+        except OSError:
+            pass
+
+
+# Cache global de fatos da web (Selic etc.)
+web_facts = SWRCache(settings.WEB_CACHE_DIR, ttl_s=settings.WEB_CACHE_TTL_S, max_age_s=settings.WEB_CACHE_MAX_AGE_S)
@@ -0,0 +1,264 @@
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+# Span ativo no contexto atual (propagado por contextvars)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+STATUS_UNSET = "STATUS_CODE_UNSET"
+STATUS_OK = "STATUS_CODE_OK"
+STATUS_ERROR = "STATUS_CODE_ERROR"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    """Converte um valor Python para o formato de atributo do OTLP/JSON"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_attribute_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+class _Trace:
+    """Spans de uma requisição, mantidos em memória até o span raiz terminar"""
+
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = _new_id(128)
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """Trecho de execução com início, fim, atributos e eventos"""
+
+    __slots__ = ("tracer", "trace", "span_id", "parent", "name", "attributes",
+                 "events", "status", "status_message", "start_ns", "end_ns",
+                 "_start_perf", "_token")
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, name: str,
+                 parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        self._start_perf = 0
+        self._token = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes})
+
+    def set_status(self, ok: bool, message: str = ""):
+        self.status = STATUS_OK if ok else STATUS_ERROR
+        self.status_message = message
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Duração medida com relógio monotônico; o início fica em epoch para exportação
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+        if exc is not None:
+            self.set_status(False, f"{exc_type.__name__}: {exc}")
+        _current_span.reset(self._token)
+        self.trace.spans.append(self)
+        if self.parent is None:
+            self.tracer._finish_trace(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Representação compatível com o OTLP/JSON do OpenTelemetry"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in self.attributes.items()],
+            "events": [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["timeUnixNano"]),
+                    "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in event["attributes"].items()],
+                }
+                for event in self.events
+            ],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    """Span usado quando o tracing está desligado ou não há requisição ativa"""
+
+    trace_id = ""
+    span_id = ""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def set_status(self, ok: bool, message: str = ""):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """Grava traces em JSONL local com rotação por tamanho"""
+
+    def __init__(self, directory: str, filename: str = "traces.jsonl",
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 service_name: str = "chatbot_payroll"):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        # Um registro por linha, no formato resourceSpans do OTLP
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{
+                    "scope": {"name": "chatbot_payroll.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }, ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._should_rotate(len(data)):
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+
+    def _should_rotate(self, incoming: int) -> bool:
+        try:
+            return os.path.getsize(self.path) + incoming > self.max_bytes
+        except OSError:
+            return False
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class Tracer:
+    """Cria spans por requisição e decide quais traces exportar.
+
+    A amostragem é decidida no início do trace (head sampling); traces lentos
+    ou com erro são sempre mantidos (tail sampling) quando o span raiz termina.
+    """
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None, enabled: bool = True,
+                 sample_rate: float = 0.1, slow_threshold_ms: float = 1000.0):
+        self.exporter = exporter
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+
+    def start_span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            trace = _Trace(sampled=random.random() < self.sample_rate)
+        else:
+            trace = parent.trace
+        return Span(self, trace, name, parent, attributes)
+
+    def _finish_trace(self, root: Span):
+        trace = root.trace
+        keep = (
+            trace.sampled
+            or root.duration_ms >= self.slow_threshold_ms
+            or any(span.status == STATUS_ERROR for span in trace.spans)
+        )
+        if keep and self.exporter is not None:
+            root.set_attribute("sampling.reason", "head" if trace.sampled else "tail")
+            try:
+                self.exporter.export(trace.spans)
+            except OSError:
+                pass
+
+
+def current_span():
+    """Span ativo (ou um span vazio, para que chamadores não precisem checar)"""
+    span = _current_span.get()
+    return span if span is not None else NOOP_SPAN
+
+
+# Tracer global
+tracer = Tracer(
+    exporter=JsonlSpanExporter(
+        settings.TRACE_DIR,
+        max_bytes=settings.TRACE_MAX_BYTES,
+        backup_count=settings.TRACE_BACKUP_COUNT,
+    ),
+    enabled=settings.TRACE_ENABLED,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    slow_threshold_ms=settings.TRACE_SLOW_MS,
+)
@@ -0,0 +1 @@
+# Suíte de benchmarks do pipeline do chatbot
@@ -0,0 +1,290 @@
+"""
+Microbenchmarks por etapa do pipeline do chat.
+
+Mede Guardrails, extração de nome/data, classificação, cada handler do
+RAGEngine, PayrollService.to_evidence, format_currency_brl e o
+Chatbot.process_message completo (com LLM simulado) em datasets de 12 linhas
+até milhões de linhas. O resultado é um JSON com mediana, p95, desvio etc.
+por caso e tamanho, que pode ser salvo como baseline e comparado depois.
+
+Exemplos:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 12,100000,2000000 --output bench.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.datasets import make_payroll_data
+from benchmarks.harness import bench
+
+DEFAULT_SIZES = [12, 10_000, 1_000_000]
+
+# Casos que não dependem do tamanho do dataset rodam só uma vez
+STATIC_SIZE = 0
+
+GUARDRAIL_INPUTS = [
+    "Qual salário Ana Souza?",
+    "Como fazer bolo?",
+    "Me mostre senhas",
+    "A" * 300,
+    "Taxa Selic atual",
+]
+NAME_QUERY = "Quanto recebi (líquido) em maio/2025? (Ana Souza)"
+DATE_QUERIES = [
+    "Quanto recebi (líquido) em maio/2025? (Ana Souza)",
+    "Qual o total líquido de Ana Souza no 1º trimestre de 2025?",
+    "Qual foi o desconto de INSS do Bruno em jun/2025?",
+]
+CLASSIFY_QUERIES = DATE_QUERIES + [
+    "Quando foi pago o salário de abril/2025 do Bruno e qual o líquido?",
+    "Qual foi o maior bônus do Bruno e em que mês?",
+]
+ANALYTICS_QUERIES = [
+    "Qual a folha total de junho?",
+    "Top 10 bônus do 2º trimestre",
+    "Média de IRRF por mês",
+    "Percentil 90 do salário líquido em 2025",
+]
+RUNNING_TOTAL_QUERIES = [
+    "Quanto a Ana recebeu até agora em 2025?",
+    "Acumulado de INSS da Ana no ano",
+    "Bônus da Ana de fevereiro a abril de 2025",
+]
+AUDIT_QUERIES = [
+    "O INSS da Ana está correto?",
+    "Auditar a folha de março de 2025",
+]
+SELIC_CORRECTION_QUERIES = [
+    "Quanto valeria o bônus de maio da Ana corrigido pela Selic?",
+    "Salário líquido da Ana em 2025 corrigido pela Selic",
+    "R$ 1.000 de janeiro de 2024 corrigidos pela Selic",
+]
+# Mensagens roteadas para o RAG e para o LLM, medidas em casos separados
+# (as duas rotas têm custos muito diferentes e misturadas dariam um tempo bimodal)
+RAG_CHAT_MESSAGES = [
+    "Quanto recebi (líquido) em maio/2025? (Ana Souza)",
+    "Qual foi o maior bônus do Bruno e em que mês?",
+]
+LLM_CHAT_MESSAGES = [
+    "Como funciona o décimo terceiro?",
+    "O que é o FGTS e como é calculado?",
+]
+CHAT_MESSAGES = RAG_CHAT_MESSAGES + LLM_CHAT_MESSAGES
+
+
+class FakeLLM:
+    """LLM simulado: mantém a extração de intenção real e responde na hora"""
+
+    def __init__(self):
+        from app.services.llm_service import LLMService
+        self.extract_intent = LLMService.extract_intent.__get__(self)
+
+    def generate_response(self, messages):
+        return "Resposta simulada"
+
+
+def _cycle(fn: Callable[[Any], Any], inputs: List[Any]) -> Callable[[], Any]:
+    """Alterna as entradas a cada chamada (evita medir só o melhor caso)"""
+    state = {"i": 0}
+
+    def run():
+        i = state["i"]
+        state["i"] = i + 1
+        return fn(inputs[i % len(inputs)])
+    return run
+
+
+def static_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """Casos independentes do dataset"""
+    from guardrails import Guardrails
+    from app.core.intent_router import IntentRouter
+    from app.core.rag_engine import RAGEngine
+    from app.services.formatter import format_currency_brl
+    from app.utils.config import settings
+
+    guardrails = Guardrails()
+    rag_engine = RAGEngine(payroll_service=None)
+    cases = [
+        ("guardrails.validate_input", _cycle(guardrails.validate_input, GUARDRAIL_INPUTS)),
+        ("rag.extract_employee_name", lambda: rag_engine._extract_employee_name(NAME_QUERY)),
+        ("rag.extract_date_info", _cycle(rag_engine._extract_date_info, DATE_QUERIES)),
+        ("rag.classify_query", _cycle(rag_engine._classify_query, CLASSIFY_QUERIES)),
+        ("formatter.format_currency_brl", lambda: format_currency_brl(1234567.891)),
+    ]
+    if os.path.exists(settings.INTENT_MODEL_PATH):
+        router = IntentRouter.load(settings.INTENT_MODEL_PATH)
+        batch = (CHAT_MESSAGES + CLASSIFY_QUERIES) * 8
+        cases += [
+            ("intent_router.predict", _cycle(router.predict, CHAT_MESSAGES + CLASSIFY_QUERIES)),
+            (f"intent_router.predict_batch[{len(batch)}]", lambda: router.predict_batch(batch)),
+        ]
+    return cases
+
+
+def dataset_cases(n_rows: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """Casos que escalam com o tamanho da folha"""
+    from app.core.chatbot import Chatbot
+    from app.core.rag_engine import RAGEngine
+    from app.models.schemas import SimulationScenario
+    from app.services.payroll_service import PayrollService
+
+    service = PayrollService(make_payroll_data(n_rows))
+    rag_engine = RAGEngine(service)
+    chatbot = Chatbot(rag_engine, FakeLLM())
+
+    competency = {"month": 5, "year": 2025, "competency": "2025-05"}
+    quarter = {"quarter": 1, "year": 2025}
+    year = {"year": 2025}
+    evidence_records = service.get_employee_records("Ana Souza").head(6)
+    service.analytics  # agregados montados fora da medição, como no startup da API
+    rag_engine.selic_series  # série Selic carregada no primeiro uso, fora da medição
+
+    return [
+        ("rag.handle_net_pay_specific",
+         lambda: rag_engine._handle_net_pay_specific("Ana Souza", competency, "líquido maio/2025")),
+        ("rag.handle_net_pay_aggregate",
+         lambda: rag_engine._handle_net_pay_aggregate("Ana Souza", quarter, "total no 1º trimestre")),
+        ("rag.handle_payment_date_query",
+         lambda: rag_engine._handle_payment_date_query("Bruno Lima", competency, "quando foi pago")),
+        ("rag.handle_deduction_query",
+         lambda: rag_engine._handle_deduction_query("Bruno Lima", competency, "desconto de inss")),
+        ("rag.handle_bonus_query",
+         lambda: rag_engine._handle_bonus_query("Bruno Lima", {}, "maior bônus")),
+        ("rag.handle_general_query",
+         lambda: rag_engine._handle_general_query("Ana Souza", "holerite")),
+        ("rag.handle_general_query_without_employee",
+         lambda: rag_engine._handle_general_query_without_employee("qual o salário?")),
+        ("rag.handle_running_total",
+         _cycle(lambda query: rag_engine._handle_running_total("Ana Souza", rag_engine._extract_date_info(query), query),
+                RUNNING_TOTAL_QUERIES)),
+        ("rag.handle_comparison",
+         lambda: rag_engine._handle_comparison(["Ana Souza", "Bruno Lima"], year, "compare o líquido em 2025")),
+        ("rag.handle_audit",
+         _cycle(lambda query: rag_engine._handle_audit(rag_engine._extract_employee_name(query),
+                                                       rag_engine._extract_date_info(query), query), AUDIT_QUERIES)),
+        ("rag.handle_selic_correction",
+         _cycle(rag_engine._handle_selic_correction, SELIC_CORRECTION_QUERIES)),
+        ("rag.handle_analytics",
+         _cycle(lambda query: rag_engine._handle_analytics(rag_engine._extract_date_info(query), query), ANALYTICS_QUERIES)),
+        ("simulation.run[salário +8%]",
+         lambda: rag_engine.simulator.run(SimulationScenario(base_salary_pct=8))),
+        ("payroll.to_evidence", lambda: service.to_evidence(evidence_records)),
+        ("chatbot.process_message[rag]",
+         _cycle(lambda message: chatbot.process_message(message, "bench"), RAG_CHAT_MESSAGES)),
+        ("chatbot.process_message[llm]",
+         _cycle(lambda message: chatbot.process_message(message, "bench"), LLM_CHAT_MESSAGES)),
+    ]
+
+
+def run_suite(sizes: List[int], rounds: int = 15, warmup: int = 3, min_round_ms: float = 20.0,
+              max_time_s: float = 10.0, only: Optional[str] = None, verbose: bool = True) -> Dict[str, Any]:
+    """Executa todos os casos e retorna {"meta": ..., "results": {"caso@tamanho": stats}}"""
+    import logging
+    from app.utils.tracing import tracer
+
+    # Sem amostragem de traces e sem logs no console durante a medição
+    app_logger = logging.getLogger("chatbot_payroll")
+    previous = (tracer.sample_rate, app_logger.level)
+    tracer.sample_rate = 0.0
+    app_logger.setLevel(logging.ERROR)
+
+    results: Dict[str, Dict[str, float]] = {}
+
+    def measure(size: int, cases: List[Tuple[str, Callable[[], Any]]]):
+        for name, fn in cases:
+            if only and only not in name:
+                continue
+            stats = bench(fn, warmup=warmup, rounds=rounds, min_round_ms=min_round_ms, max_time_s=max_time_s)
+            stats["size"] = size
+            results[f"{name}@{size}"] = stats
+            if verbose:
+                print(f"   {name:<45} {size:>9}  mediana {stats['median_us']:>12.1f}µs  "
+                      f"p95 {stats['p95_us']:>12.1f}µs  ±{stats['stdev_us']:.1f}")
+
+    try:
+        if verbose:
+            print("⚡ Casos independentes do dataset")
+        measure(STATIC_SIZE, static_cases())
+        for size in sizes:
+            if verbose:
+                print(f"⚡ Dataset com {size} linhas")
+            measure(size, dataset_cases(size))
+    finally:
+        tracer.sample_rate, level = previous
+        app_logger.setLevel(level)
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float = 0.5) -> List[str]:
+    """Casos cuja mediana piorou mais que max_regression (fração) em relação ao baseline"""
+    regressions = []
+    for key, stats in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or base["median_us"] <= 0:
+            continue
+        ratio = stats["median_us"] / base["median_us"]
+        if ratio > 1 + max_regression:
+            regressions.append(f"{key}: mediana {base['median_us']:.1f}µs → {stats['median_us']:.1f}µs ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks do pipeline do chat")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Tamanhos de dataset separados por vírgula")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-round-ms", type=float, default=20.0)
+    parser.add_argument("--max-time-s", type=float, default=10.0, help="Tempo máximo por caso")
+    parser.add_argument("--only", help="Roda só casos cujo nome contém este texto")
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="Baseline para comparação")
+    parser.add_argument("--save-baseline", help="Salva os resultados como novo baseline")
+    parser.add_argument("--max-regression", type=float, default=0.5,
+                        help="Piora tolerada na mediana (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_suite(sizes, rounds=args.rounds, warmup=args.warmup, min_round_ms=args.min_round_ms,
+                       max_time_s=args.max_time_s, only=args.only)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"💾 Resultados salvos em {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print("⚠️  Regressões em relação ao baseline:")
+            for item in regressions:
+                print(f"   - {item}")
+            return 1
+        print("✅ Sem regressões em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
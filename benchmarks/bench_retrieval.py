@@ -0,0 +1,127 @@
+"""
+Latência da recuperação local (app/core/retrieval.py) conforme o corpus cresce.
+
+Para cada tamanho de folha sintética, monta o índice (registros + FAQ) e mede
+a busca exaustiva e a busca IVF com as mesmas consultas geradas, além do
+recall@k do IVF em relação à exaustiva e do tempo de montagem.
+
+Exemplos:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --sizes 1000,100000 --probes 4,8,16 --output retrieval.json
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_pipeline import _cycle
+from benchmarks.datasets import make_payroll_data
+from benchmarks.harness import bench
+from benchmarks.query_generator import QueryGenerator
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def _queries(count: int, seed: int) -> List[str]:
+    return [q.message for q in QueryGenerator(seed).generate(count * 2) if q.guardrail == "allowed"][:count]
+
+
+def recall_at_k(exact, approximate, queries: Sequence[str], k: int) -> float:
+    """Fração do top-k aproximado com score >= k-ésimo score exato (empates contam como acerto)"""
+    hits = total = 0
+    for query in queries:
+        expected = exact.search(query, k)
+        if not expected:
+            continue
+        threshold = expected[-1][1] - 1e-6
+        hits += sum(score >= threshold for _, score in approximate.search(query, k))
+        total += len(expected)
+    return hits / total if total else 1.0
+
+
+def run_retrieval_bench(sizes: Sequence[int], probes: Sequence[int] = (8,), k: int = 4,
+                        n_queries: int = 200, seed: int = 42, dim: int = 1024,
+                        max_time_s: float = 5.0, verbose: bool = True) -> Dict[str, Any]:
+    from app.core.retrieval import PayrollRetriever, load_faq
+    from app.services.payroll_service import PayrollService
+    from app.utils.config import settings
+
+    app_logger = logging.getLogger("chatbot_payroll")
+    previous_level = app_logger.level
+    app_logger.setLevel(logging.ERROR)
+    queries = _queries(n_queries, seed)
+    passages = load_faq(os.path.join(settings.DATA_DIR, settings.FAQ_FILE))
+    results: Dict[str, Any] = {}
+    try:
+        for n_rows in sizes:
+            service = PayrollService(make_payroll_data(n_rows))
+            start = time.perf_counter()
+            retriever = PayrollRetriever(service, passages, dim=dim, ivf_threshold=10 ** 12)
+            build_s = time.perf_counter() - start
+            exact = retriever.index
+
+            start = time.perf_counter()
+            ivf = copy.copy(exact)
+            ivf.build_ivf()
+            ivf_build_s = time.perf_counter() - start
+
+            entry = {
+                "docs": len(exact),
+                "matrix_mb": round(exact.matrix.nbytes / 2 ** 20, 1),
+                "build_s": round(build_s, 3),
+                "ivf_build_s": round(ivf_build_s, 3),
+                "ivf_lists": len(ivf.centroids),
+                "exact": bench(_cycle(lambda q: exact.search(q, k), queries), max_time_s=max_time_s),
+                "ivf": {},
+            }
+            for n_probe in probes:
+                ivf.n_probe = n_probe
+                entry["ivf"][str(n_probe)] = {
+                    **bench(_cycle(lambda q: ivf.search(q, k), queries), max_time_s=max_time_s),
+                    "recall": round(recall_at_k(exact, ivf, queries, k), 4),
+                }
+            results[str(n_rows)] = entry
+
+            if verbose:
+                print(f"📚 {entry['docs']:>9} docs  matriz {entry['matrix_mb']:>7.1f} MB  "
+                      f"montagem {build_s:.2f}s (+IVF {ivf_build_s:.2f}s, {entry['ivf_lists']} listas)")
+                print(f"   exaustiva          mediana {entry['exact']['median_us']:>10.1f}µs  "
+                      f"p95 {entry['exact']['p95_us']:>10.1f}µs")
+                for n_probe, stats in entry["ivf"].items():
+                    print(f"   ivf n_probe={n_probe:<4}    mediana {stats['median_us']:>10.1f}µs  "
+                          f"p95 {stats['p95_us']:>10.1f}µs  recall@{k} {stats['recall']:.1%}")
+    finally:
+        app_logger.setLevel(previous_level)
+    return {"k": k, "dim": dim, "queries": len(queries), "seed": seed, "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latência da recuperação local por tamanho de corpus")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--probes", default="8", help="Valores de n_probe do IVF separados por vírgula")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    report = run_retrieval_bench(
+        [int(s) for s in args.sizes.split(",")], [int(p) for p in args.probes.split(",")],
+        k=args.k, n_queries=args.queries, seed=args.seed, dim=args.dim,
+    )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório salvo em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
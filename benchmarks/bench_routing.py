@@ -0,0 +1,154 @@
+"""
+Vazão e acurácia de roteamento do RAGEngine e dos Guardrails.
+
+Usa o gerador de consultas rotuladas para medir, no mesmo passe, quantas
+consultas por segundo cada etapa processa e quantas foram roteadas como o
+esperado (query_type, funcionário, período e decisão dos guardrails).
+
+Exemplos:
+    python -m benchmarks.bench_routing --count 100000
+    python -m benchmarks.bench_routing --count 1000000 --output routing.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.query_generator import LabeledQuery, QueryGenerator
+
+
+def route(rag_engine, message: str) -> Dict[str, Any]:
+    """Rota que o RAGEngine tomaria (RAGEngine.route), no formato dos rótulos do gerador"""
+    routed = rag_engine.route(message)
+    if routed.query_type in ("web_search", "employee_not_found"):
+        return {"query_type": routed.query_type, "employee": None}
+    return {
+        "query_type": routed.query_type,
+        "employee": routed.employee_name,
+        "competency": routed.date_info.get("competency"),
+        "quarter": routed.date_info.get("quarter"),
+        "year": routed.date_info.get("year"),
+    }
+
+
+def _period_ok(expected: LabeledQuery, routed: Dict[str, Any]) -> bool:
+    if expected.quarter is not None:
+        return routed.get("quarter") == expected.quarter and routed.get("year") == expected.year
+    if expected.competency is not None:
+        return routed.get("competency") == expected.competency
+    return True
+
+
+def _ratio(hits: int, total: int) -> float:
+    return round(hits / total, 4) if total else 0.0
+
+
+def run_routing_bench(count: int, seed: int = 42, verbose: bool = True) -> Dict[str, Any]:
+    from guardrails import Guardrails
+    from app.core.rag_engine import RAGEngine
+
+    app_logger = logging.getLogger("chatbot_payroll")
+    previous_level = app_logger.level
+    app_logger.setLevel(logging.ERROR)
+    try:
+        guardrails = Guardrails()
+        rag_engine = RAGEngine(payroll_service=None)
+        queries = list(QueryGenerator(seed).generate(count))
+
+        # Guardrails: todas as consultas
+        start = time.perf_counter()
+        decisions = [guardrails.validate_input(q.message)[0] for q in queries]
+        guardrails_s = time.perf_counter() - start
+
+        # RAGEngine: só o que deveria passar pelos guardrails
+        routable = [q for q in queries if q.guardrail == "allowed"]
+        start = time.perf_counter()
+        routes = [route(rag_engine, q.message) for q in routable]
+        routing_s = time.perf_counter() - start
+    finally:
+        app_logger.setLevel(previous_level)
+
+    guardrail_hits = sum((q.guardrail == "allowed") == allowed for q, allowed in zip(queries, decisions))
+    by_category: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for q, allowed in zip(queries, decisions):
+        stats = by_category[q.category]
+        stats["count"] += 1
+        stats["guardrail_ok"] += (q.guardrail == "allowed") == allowed
+
+    type_hits = employee_hits = period_hits = exact_hits = 0
+    confusion: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for q, routed in zip(routable, routes):
+        type_ok = routed["query_type"] == q.query_type
+        employee_ok = routed["employee"] == q.employee
+        period_ok = _period_ok(q, routed)
+        type_hits += type_ok
+        employee_hits += employee_ok
+        period_hits += period_ok
+        exact_hits += type_ok and employee_ok and period_ok
+        confusion[q.query_type][routed["query_type"]] += 1
+        stats = by_category[q.category]
+        stats["routed"] += 1
+        stats["route_ok"] += type_ok and employee_ok and period_ok
+
+    report = {
+        "count": count,
+        "seed": seed,
+        "guardrails": {
+            "queries_per_s": round(len(queries) / guardrails_s, 1) if guardrails_s else 0.0,
+            "accuracy": _ratio(guardrail_hits, len(queries)),
+        },
+        "routing": {
+            "queries_per_s": round(len(routable) / routing_s, 1) if routing_s else 0.0,
+            "query_type_accuracy": _ratio(type_hits, len(routable)),
+            "employee_accuracy": _ratio(employee_hits, len(routable)),
+            "period_accuracy": _ratio(period_hits, len(routable)),
+            "exact_accuracy": _ratio(exact_hits, len(routable)),
+        },
+        "by_category": {
+            name: {
+                "count": stats["count"],
+                "guardrail_accuracy": _ratio(stats["guardrail_ok"], stats["count"]),
+                "route_accuracy": _ratio(stats["route_ok"], stats["routed"]) if stats["routed"] else None,
+            }
+            for name, stats in sorted(by_category.items())
+        },
+        "confusion": {expected: dict(got) for expected, got in sorted(confusion.items())},
+    }
+
+    if verbose:
+        print(f"🛡️  Guardrails: {report['guardrails']['queries_per_s']:.0f} consultas/s, "
+              f"acurácia {report['guardrails']['accuracy']:.1%}")
+        routing = report["routing"]
+        print(f"🧭 Roteamento: {routing['queries_per_s']:.0f} consultas/s, "
+              f"tipo {routing['query_type_accuracy']:.1%}, funcionário {routing['employee_accuracy']:.1%}, "
+              f"período {routing['period_accuracy']:.1%}, exato {routing['exact_accuracy']:.1%}")
+        for name, stats in report["by_category"].items():
+            route_acc = stats["route_accuracy"]
+            route_text = f"{route_acc:.1%}" if route_acc is not None else "-"
+            print(f"   {name:<20} {stats['count']:>8}  guardrails {stats['guardrail_accuracy']:.1%}  rota {route_text}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vazão e acurácia de roteamento")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    report = run_routing_bench(args.count, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório salvo em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
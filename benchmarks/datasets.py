@@ -0,0 +1,73 @@
+"""
+Datasets de folha para benchmarks.
+
+O tamanho 12 usa o data/payroll.csv real; tamanhos maiores geram uma folha
+sintética (vetorizada com NumPy) em que Ana Souza e Bruno Lima continuam
+presentes, para que as consultas de exemplo encontrem registros.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from app.models.payroll import PayrollData
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+REAL_DATASET = os.path.join(ROOT_DIR, 'data', 'payroll.csv')
+
+# 24 competências: 2024-01 a 2025-12
+COMPETENCIES = [f"{year}-{month:02d}" for year in (2024, 2025) for month in range(1, 13)]
+
+
+def make_payroll_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Gera uma folha com aproximadamente n_rows linhas (funcionário x competência)"""
+    if n_rows <= 12:
+        return pd.read_csv(REAL_DATASET).head(n_rows)
+
+    rng = np.random.default_rng(seed)
+    n_months = len(COMPETENCIES)
+    n_employees = max(2, -(-n_rows // n_months))
+
+    employee_idx = np.repeat(np.arange(n_employees), n_months)[:n_rows]
+    month_idx = np.tile(np.arange(n_months), n_employees)[:n_rows]
+
+    names = np.array(["Ana Souza", "Bruno Lima"] + [f"Colaborador {i:07d}" for i in range(2, n_employees)], dtype=object)
+    ids = np.array([f"E{i + 1:07d}" for i in range(n_employees)], dtype=object)
+    competencies = np.array(COMPETENCIES, dtype=object)
+    payment_dates = np.array([f"{c}-28" for c in COMPETENCIES], dtype=object)
+
+    base_by_employee = np.round(rng.uniform(1500, 20000, n_employees), -2)
+    base_by_employee[:2] = (8000, 6000)
+    base_salary = base_by_employee[employee_idx]
+
+    bonus = np.where(rng.random(n_rows) < 0.4, np.round(rng.uniform(100, 2000, n_rows), -2), 0.0)
+    benefits = np.where(rng.random(n_rows) < 0.5, 600.0, 650.0)
+    other_earnings = np.where(rng.random(n_rows) < 0.2, 200.0, 0.0)
+    other_deductions = np.where(rng.random(n_rows) < 0.05, 200.0, 0.0)
+
+    gross = base_salary + bonus + benefits + other_earnings
+    inss = np.minimum(np.round(base_salary * 0.11, 2), 908.85)
+    irrf = np.round(np.maximum(gross - inss - 1620.0, 0.0) * 0.075, 2)
+    net_pay = np.round(gross - inss - irrf - other_deductions, 2)
+
+    return pd.DataFrame({
+        'employee_id': ids[employee_idx],
+        'name': names[employee_idx],
+        'competency': competencies[month_idx],
+        'base_salary': base_salary,
+        'bonus': bonus,
+        'benefits_vt_vr': benefits,
+        'other_earnings': other_earnings,
+        'deductions_inss': inss,
+        'deductions_irrf': irrf,
+        'other_deductions': other_deductions,
+        'net_pay': net_pay,
+        'payment_date': payment_dates[month_idx],
+    })
+
+
+@lru_cache(maxsize=4)
+def make_payroll_data(n_rows: int, seed: int = 42) -> PayrollData:
+    """PayrollData em memória (cacheado entre casos do mesmo tamanho)"""
+    return PayrollData.from_dataframe(make_payroll_frame(n_rows, seed))
@@ -0,0 +1,67 @@
+"""Medição de funções com aquecimento, calibração e resumo estatístico"""
+import gc
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+
+def calibrate(fn: Callable[[], Any], min_round_ns: int) -> int:
+    """Quantidade de chamadas por rodada para que cada rodada dure ~min_round_ns"""
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_round_ns or loops >= 1_000_000:
+            return loops
+        loops *= 10 if elapsed < min_round_ns / 10 else 2
+
+
+def summarize(samples_ns: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ns)
+    n = len(ordered)
+    median = statistics.median(ordered)
+    return {
+        "rounds": n,
+        "mean_us": statistics.fmean(ordered) / 1e3,
+        "median_us": median / 1e3,
+        "min_us": ordered[0] / 1e3,
+        "max_us": ordered[-1] / 1e3,
+        "p95_us": ordered[min(n - 1, int(0.95 * n))] / 1e3,
+        "stdev_us": (statistics.stdev(ordered) if n > 1 else 0.0) / 1e3,
+        "ops_per_s": 1e9 / median if median > 0 else 0.0,
+    }
+
+
+def bench(fn: Callable[[], Any], warmup: int = 3, rounds: int = 15,
+          min_round_ms: float = 20.0, max_time_s: float = 10.0) -> Dict[str, float]:
+    """Mede fn: aquece, calibra o número de chamadas por rodada e resume as rodadas.
+
+    Os tempos são por chamada; rodadas param antes se max_time_s estourar
+    (casos lentos em datasets grandes).
+    """
+    for _ in range(warmup):
+        fn()
+
+    loops = calibrate(fn, int(min_round_ms * 1e6))
+    samples: List[float] = []
+    deadline = time.perf_counter() + max_time_s
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter_ns() - start) / loops)
+            if time.perf_counter() > deadline and len(samples) >= 3:
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    result = {key: round(value, 3) for key, value in summarize(samples).items()}
+    result["loops"] = loops
+    return result
@@ -3,7 +3,10 @@ from typing import Tuple, Dict, Any
 from datetime import datetime
 import logging
 
-logger = logging.getLogger('chatbot_payroll')
+from app.utils.metrics import STAGE_DURATION
+from app.utils.tracing import tracer
+
+logger = logging.getLogger('chatbot_payroll.guardrails')
 
 
 class Guardrails:
@@ -59,6 +62,15 @@ class Guardrails:
     # ---------------------------------------------------------------
     def validate_input(self, user_input: str) -> Tuple[bool, str, Dict[str, Any]]:
         """Valida o texto inserido pelo usuário com base em regras pré-definidas."""
+        with STAGE_DURATION.time(stage="guardrails"), \
+                tracer.start_span("guardrails.validate_input", input_length=len(user_input)) as span:
+            is_valid, message, metadata = self._validate_input(user_input)
+            span.set_attribute("decision", "allowed" if is_valid else "blocked")
+            if metadata['failed_checks']:
+                span.set_attribute("failed_checks", metadata['failed_checks'])
+            return is_valid, message, metadata
+
+    def _validate_input(self, user_input: str) -> Tuple[bool, str, Dict[str, Any]]:
         user_input_clean = user_input.lower()
         validation_metadata = {
             'failed_checks': [],
@@ -71,27 +83,28 @@ class Guardrails:
         # Verifica tamanho máximo
         if len(user_input) > self.max_input_length:
             validation_metadata['failed_checks'].append('max_length')
-            logger.warning(f"🚫 Input muito longo ({len(user_input)} chars)")
+            logger.warning("🚫 Input muito longo (%d chars)", len(user_input))
             return False, f"Pergunta muito longa. Máximo permitido: {self.max_input_length} caracteres.", validation_metadata
 
         # Verifica se o tema é relevante
         if not self._is_relevant_question(user_input):
             validation_metadata['failed_checks'].append('domain')
-            logger.warning(f"🚫 Pergunta fora de contexto: {user_input}")
+            logger.warning("🚫 Pergunta fora de contexto (%d chars)", len(user_input))
+            logger.debug("Pergunta fora de contexto: %s", user_input)
             return False, "Por favor, faça perguntas sobre folha de pagamento ou funcionários", validation_metadata
 
         # Verifica conteúdo sensível
         for topic in self.sensitive_topics:
             if topic in user_input_clean:
                 validation_metadata['failed_checks'].append('sensitive_content')
-                logger.warning(f"🚫 Conteúdo sensível detectado: {topic}")
+                logger.warning("🚫 Conteúdo sensível detectado: %s", topic)
                 return False, "Tópico sensível detectado. Não posso ajudar com isso.", validation_metadata
 
         # Extrai o nome do funcionário conforme digitado
         employee_name = self.extract_employee_name(user_input)
         if employee_name:
             validation_metadata['employee_name'] = employee_name
-            logger.info(f"👤 Funcionário identificado: {employee_name}")
+            logger.debug("👤 Funcionário identificado: %s", employee_name)
 
         logger.info("✅ Validação bem-sucedida")
         return True, "Validação bem-sucedida", validation_metadata
@@ -1,17 +1,3 @@
-
-import logging
-import sys
-
-# Configuração básica e direta
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('app.log', encoding='utf-8')
-    ]
-)
-
-# Logger global
-logger = logging.getLogger('chatbot_payroll')
-logger.info("✅ Logger inicializado")
\ No newline at end of file
+# Mantido por compatibilidade com `from logger import logger`:
+# a configuração (fila, escrita em lote, rotação e amostragem) fica em app/utils/logger.py
+from app.utils.logger import logger, get_logger
@@ -3,12 +3,15 @@ from datetime import datetime
 from typing import Dict, Any
 import logging
 
-logger = logging.getLogger('chatbot_payroll')
+from app.utils.metrics import REQUEST_DURATION, REQUESTS_TOTAL, GUARDRAIL_TRIGGERS_TOTAL
+from app.utils.tracing import current_span
+
+logger = logging.getLogger('chatbot_payroll.observability')
 
 class Observability:
     def __init__(self, app_name: str = "chatbot_payroll"):
         self.app_name = app_name
-        logger.info(f"🔍 Observabilidade inicializada para {app_name}")
+        logger.info("🔍 Observabilidade inicializada para %s", app_name)
     
     def log_interaction(self, 
                        session_id: str,
@@ -20,17 +23,23 @@ class Observability:
                        guardrail_metadata: Dict[str, Any] = None):
         
         interaction_id = str(uuid.uuid4())[:8]
+
+        REQUESTS_TOTAL.inc(status=status)
+        REQUEST_DURATION.observe(response_time, status=status)
+
+        # Anexa a interação ao span da requisição (se houver)
+        span = current_span()
+        span.set_attributes(interaction_id=interaction_id, status=status, tokens_used=tokens_used)
+        if status == "error":
+            span.set_status(False, response[:200])
         
         if status == "success":
-            log_message = f"✅ SUCCESS | Sessão: {session_id} | Tempo: {response_time:.2f}s"
-            logger.info(log_message)
+            logger.info("✅ SUCCESS | Sessão: %s | Tempo: %.2fs", session_id, response_time)
         elif status == "blocked":
             motivo = guardrail_metadata.get('failed_checks', ['unknown']) if guardrail_metadata else ['unknown']
-            log_message = f"🚫 BLOCKED | Sessão: {session_id} | Motivo: {', '.join(motivo)}"
-            logger.warning(log_message)
+            logger.warning("🚫 BLOCKED | Sessão: %s | Motivo: %s", session_id, ', '.join(motivo))
         else:
-            log_message = f"❌ ERROR | Sessão: {session_id}"
-            logger.error(log_message)
+            logger.error("❌ ERROR | Sessão: %s", session_id)
         
         return interaction_id
     
@@ -43,8 +52,9 @@ class Observability:
         
         trigger_id = str(uuid.uuid4())[:8]
         motivo = ', '.join(details.get('failed_checks', ['unknown']))
+        GUARDRAIL_TRIGGERS_TOTAL.inc(type=guardrail_type, reason=motivo)
+        current_span().add_event("guardrail_triggered", type=guardrail_type, reason=motivo, trigger_id=trigger_id)
         
-        log_message = f"🛡️ GUARDRAIL | Tipo: {guardrail_type} | Motivo: {motivo}"
-        logger.warning(log_message)
+        logger.warning("🛡️ GUARDRAIL | Tipo: %s | Motivo: %s", guardrail_type, motivo)
         
         return trigger_id
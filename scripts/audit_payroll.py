@@ -0,0 +1,100 @@
+"""
+Audita INSS, IRRF e líquido das folhas em data/ contra as tabelas oficiais.
+
+Cada CSV com as colunas da folha é recalculado numa passada vetorizada com
+as tabelas versionadas de TAX_TABLES_FILE. Divergências acima da tolerância
+são listadas (as maiores primeiro) e podem ser exportadas em CSV. Com
+--fail-on-mismatch o código de saída é 1 quando há divergência.
+
+Exemplos:
+    python -m scripts.audit_payroll
+    python -m scripts.audit_payroll --data-dir data --tolerance 0.05 --output divergencias.csv
+    python -m scripts.audit_payroll --synthetic 1000000
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.payroll import PayrollData
+from app.services.payroll_tax import AUDIT_FIELDS, PayrollAuditor, load_tax_tables
+from app.utils.config import settings
+
+FIELD_LABELS = {'deductions_inss': 'INSS', 'deductions_irrf': 'IRRF', 'net_pay': 'líquido'}
+
+
+def _payroll_files(data_dir: str) -> List[str]:
+    """CSVs do diretório que têm as colunas da folha"""
+    files = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        try:
+            PayrollData.from_dataframe(pd.read_csv(path, nrows=0))
+        except ValueError:
+            continue
+        files.append(path)
+    return files
+
+
+def audit_frame(auditor: PayrollAuditor, label: str, df: pd.DataFrame, limit: int):
+    start = time.perf_counter()
+    result = auditor.audit(df)
+    elapsed = time.perf_counter() - start
+    counts = result.counts()
+    print(f"🔎 {label}: {result.rows} linhas auditadas em {elapsed * 1000:.0f} ms | "
+          f"{result.records_with_mismatch} com divergência | "
+          + " · ".join(f"{FIELD_LABELS[f]} {counts[f]}" for f in AUDIT_FIELDS)
+          + (f" | {result.skipped} sem tabela vigente" if result.skipped else ""))
+    if limit and not result.mismatches.empty:
+        mismatches = result.mismatches
+        largest = mismatches.loc[mismatches['difference'].abs().nlargest(limit).index]
+        for row in largest.to_dict('records'):
+            print(f"   {row['competency']}  {row['name']:<25} {FIELD_LABELS[row['field']]:<8} "
+                  f"folha {row['stored']:>12,.2f}  recalculado {row['expected']:>12,.2f}  "
+                  f"diferença {row['difference']:>+12,.2f}")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Audita INSS/IRRF/líquido da folha contra as tabelas oficiais")
+    parser.add_argument("--data-dir", default=settings.DATA_DIR)
+    parser.add_argument("--tables", default=os.path.join(settings.DATA_DIR, settings.TAX_TABLES_FILE))
+    parser.add_argument("--tolerance", type=float, default=settings.AUDIT_TOLERANCE, help="Diferença máxima em R$")
+    parser.add_argument("--limit", type=int, default=10, help="Maiores divergências listadas por arquivo")
+    parser.add_argument("--output", help="CSV com todas as divergências")
+    parser.add_argument("--synthetic", type=int, default=0, help="Audita uma folha sintética com N linhas")
+    parser.add_argument("--fail-on-mismatch", action="store_true")
+    args = parser.parse_args(argv)
+
+    auditor = PayrollAuditor(load_tax_tables(args.tables), args.tolerance)
+    if args.synthetic:
+        from benchmarks.datasets import make_payroll_frame
+        sources = [(f"sintética ({args.synthetic} linhas)", make_payroll_frame(args.synthetic))]
+    else:
+        files = _payroll_files(args.data_dir)
+        if not files:
+            print(f"❌ Nenhum CSV de folha em {args.data_dir}")
+            return 1
+        sources = [(os.path.basename(path), pd.read_csv(path)) for path in files]
+
+    reports = []
+    for label, df in sources:
+        result = audit_frame(auditor, label, df, args.limit)
+        reports.append(result.mismatches.assign(source=label))
+
+    mismatches = pd.concat(reports, ignore_index=True)
+    if args.output:
+        mismatches.to_csv(args.output, index=False)
+        print(f"💾 {len(mismatches)} divergências salvas em {args.output}")
+    if mismatches.empty:
+        print(f"✅ Nenhuma divergência acima de R$ {args.tolerance:.2f}")
+    return 1 if args.fail_on_mismatch and not mismatches.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Teste de carga do endpoint /chat.
+
+Reproduz um log de requisições (JSONL, um objeto por linha com o campo
+"message" e, opcionalmente, "query_type", "conversation_id" e "offset_ms")
+ou gera requisições sintéticas, contra a API FastAPI em processo (ASGI) ou
+via HTTP. Gera um relatório JSON com vazão, latências p50/p95/p99 e taxa de
+erro por query_type, que pode ser comparado com um relatório anterior.
+
+Exemplos:
+    python -m scripts.load_test --generate 500 --concurrency 8 --output report.json
+    python -m scripts.load_test --requests logs.jsonl --rate 20 --compare baseline.json
+    python -m scripts.load_test --requests logs.jsonl --url http://localhost:8000
+    python -m scripts.load_test --generate 500 --stub-servers --tokens-per-s 40 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Perguntas usadas quando não há log para reproduzir
+SAMPLE_MESSAGES = [
+    "Quanto recebi (líquido) em maio/2025? (Ana Souza)",
+    "Qual o total líquido de Ana Souza no 1º trimestre de 2025?",
+    "Qual foi o desconto de INSS do Bruno em jun/2025?",
+    "Quando foi pago o salário de abril/2025 do Bruno e qual o líquido?",
+    "Qual foi o maior bônus do Bruno e em que mês?",
+    "Qual a taxa Selic atual?",
+    "Mostre o holerite da Ana Souza",
+    "Qual o salário do Carlos?",
+    "Como funciona o décimo terceiro?",
+]
+
+
+# ================================
+# Entrada
+# ================================
+def load_requests(path: str) -> List[Dict[str, Any]]:
+    """Lê um log JSONL de requisições (linhas sem 'message' são ignoradas)"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("message"):
+                records.append(record)
+    return records
+
+
+def generate_requests(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera requisições sintéticas a partir das perguntas de exemplo"""
+    rng = random.Random(seed)
+    return [{"message": rng.choice(SAMPLE_MESSAGES)} for _ in range(count)]
+
+
+_classifier = None
+
+
+def classify_request(message: str) -> str:
+    """Rótulo de query_type usado no relatório (a rota do RAGEngine.route)"""
+    global _classifier
+    if _classifier is None:
+        from app.core.rag_engine import RAGEngine
+        _classifier = RAGEngine(payroll_service=None)
+    return _classifier.route(message).query_type
+
+
+# ================================
+# Stubs de LLM e busca web
+# ================================
+def install_stubs(llm_latency_ms: float, search_latency_ms: float):
+    """Substitui OpenAI e Serper por respostas locais com latência simulada"""
+    os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+    from app.services.llm_service import LLMService
+    from app.core.rag_engine import RAGEngine
+
+    def fake_generate_response(self, messages):
+        time.sleep(llm_latency_ms / 1000)
+        return "Resposta simulada do LLM para teste de carga."
+
+    def fake_fetch_selic_web(self):
+        time.sleep(search_latency_ms / 1000)
+        return "💰 **Taxa Selic atual:** 15,00% a.a. (simulada)\n\n🔗 **Fonte oficial:** https://www.bcb.gov.br", []
+
+    LLMService.generate_response = fake_generate_response
+    RAGEngine._fetch_selic_web = fake_fetch_selic_web
+
+
+def start_stub_servers(llm_latency_ms: float, search_latency_ms: float, tokens_per_s: float,
+                       error_rate: float, seed: int) -> list:
+    """Sobe os servidores stub (HTTP de verdade) e aponta o chatbot para eles.
+
+    Precisa rodar antes de importar o app, que lê as variáveis na importação.
+    """
+    from scripts.stub_servers import OpenAIStub, SerperStub, StubBehavior, stub_environment
+
+    openai = OpenAIStub(StubBehavior(llm_latency_ms, tokens_per_s=tokens_per_s,
+                                     error_rate=error_rate, seed=seed)).start()
+    serper = SerperStub(StubBehavior(search_latency_ms, error_rate=error_rate, seed=seed)).start()
+    os.environ.update(stub_environment(openai, serper))
+    # Cache da Selic isolado: o valor do stub não pode ficar no cache real
+    os.environ["WEB_CACHE_DIR"] = tempfile.mkdtemp(prefix="loadtest-cache-")
+    return [openai, serper]
+
+
+# ================================
+# Execução
+# ================================
+def _schedule(records: List[Dict[str, Any]], rate: Optional[float], poisson: bool,
+              speedup: float, seed: int) -> List[Optional[float]]:
+    """Instante (s) de envio de cada requisição; None = assim que houver vaga (malha fechada)"""
+    if rate:
+        rng = random.Random(seed)
+        offsets, t = [], 0.0
+        for _ in records:
+            offsets.append(t)
+            t += rng.expovariate(rate) if poisson else 1.0 / rate
+        return offsets
+    if records and all("offset_ms" in r for r in records):
+        start = records[0]["offset_ms"]
+        return [(r["offset_ms"] - start) / 1000 / speedup for r in records]
+    return [None] * len(records)
+
+
+async def _run(records: List[Dict[str, Any]], client, concurrency: int,
+               offsets: List[Optional[float]]) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict[str, Any]] = []
+    start = time.perf_counter()
+
+    async def send(record, offset):
+        if offset is not None:
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        async with semaphore:
+            payload = {"message": record["message"]}
+            if record.get("conversation_id"):
+                payload["conversation_id"] = record["conversation_id"]
+            t0 = time.perf_counter()
+            try:
+                response = await client.post("/chat", json=payload)
+                ok = response.status_code == 200
+                status = response.status_code
+            except Exception as e:
+                ok, status = False, type(e).__name__
+            results.append({
+                "query_type": record["query_type"],
+                "latency_ms": (time.perf_counter() - t0) * 1000,
+                "ok": ok,
+                "status": status,
+            })
+
+    await asyncio.gather(*(send(r, o) for r, o in zip(records, offsets)))
+    return results
+
+
+async def run_load_test(records: List[Dict[str, Any]], url: Optional[str] = None,
+                        concurrency: int = 4, rate: Optional[float] = None,
+                        poisson: bool = False, speedup: float = 1.0, seed: int = 42,
+                        timeout: float = 30.0) -> Dict[str, Any]:
+    """Executa o teste e retorna o relatório (dicionário serializável)"""
+    import httpx
+
+    for record in records:
+        record.setdefault("query_type", classify_request(record["message"]))
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=timeout)
+        target = url
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+        target = "in-process"
+
+    offsets = _schedule(records, rate, poisson, speedup, seed)
+    started = time.perf_counter()
+    async with client:
+        results = await _run(records, client, concurrency, offsets)
+    elapsed = time.perf_counter() - started
+
+    report = build_report(results, elapsed)
+    report["config"] = {
+        "target": target,
+        "requests": len(records),
+        "concurrency": concurrency,
+        "rate": rate,
+        "poisson": poisson,
+        "seed": seed,
+    }
+    return report
+
+
+# ================================
+# Relatório
+# ================================
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por posto mais próximo (valores já ordenados)"""
+    if not values:
+        return 0.0
+    rank = min(max(1, math.ceil(pct / 100 * len(values))), len(values))
+    return values[rank - 1]
+
+
+def _summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(r["latency_ms"] for r in results)
+    errors = sum(1 for r in results if not r["ok"])
+    return {
+        "count": len(results),
+        "errors": errors,
+        "error_rate": errors / len(results) if results else 0.0,
+        "throughput_rps": len(results) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+    }
+
+
+def build_report(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_type.setdefault(result["query_type"], []).append(result)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration_s": elapsed,
+        "overall": _summarize(results, elapsed),
+        "by_query_type": {qt: _summarize(rs, elapsed) for qt, rs in sorted(by_type.items())},
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any],
+                    max_regression: float = 0.2) -> List[str]:
+    """Lista as regressões de latência/vazão/erro acima da tolerância"""
+    regressions = []
+    sections = {"overall": (current["overall"], baseline["overall"])}
+    for qt, stats in current["by_query_type"].items():
+        if qt in baseline["by_query_type"]:
+            sections[qt] = (stats, baseline["by_query_type"][qt])
+
+    for name, (cur, base) in sections.items():
+        for pct in ("p50", "p95", "p99"):
+            before, after = base["latency_ms"][pct], cur["latency_ms"][pct]
+            if before > 0 and after > before * (1 + max_regression):
+                regressions.append(f"{name}: {pct} {before:.1f}ms -> {after:.1f}ms")
+        if base["throughput_rps"] > 0 and cur["throughput_rps"] < base["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: vazão {base['throughput_rps']:.1f} -> {cur['throughput_rps']:.1f} req/s")
+        if cur["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: taxa de erro {base['error_rate']:.2%} -> {cur['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 {report['config']['requests']} requisições em {report['duration_s']:.2f}s "
+          f"({report['overall']['throughput_rps']:.1f} req/s) - alvo: {report['config']['target']}")
+    print(f"   {'query_type':24} {'n':>6} {'erro%':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = list(report["by_query_type"].items()) + [("TOTAL", report["overall"])]
+    for name, stats in rows:
+        lat = stats["latency_ms"]
+        print(f"   {name:24} {stats['count']:>6} {stats['error_rate']:>7.1%} "
+              f"{lat['p50']:>7.1f}ms {lat['p95']:>7.1f}ms {lat['p99']:>7.1f}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do /chat")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--requests", help="Log JSONL de requisições para reproduzir")
+    source.add_argument("--generate", type=int, default=200, help="Quantidade de requisições sintéticas")
+    parser.add_argument("--url", help="URL base da API (padrão: em processo, via ASGI)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, help="Taxa de chegada (req/s); padrão: malha fechada")
+    parser.add_argument("--poisson", action="store_true", help="Chegadas com intervalo exponencial")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Acelera o offset_ms original do log")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-stubs", action="store_true", help="Usa LLM e busca web reais (em processo)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--search-latency-ms", type=float, default=150.0)
+    parser.add_argument("--stub-servers", action="store_true",
+                        help="Usa servidores HTTP locais compatíveis com OpenAI/Serper em vez de monkeypatch")
+    parser.add_argument("--tokens-per-s", type=float, default=50.0, help="Vazão de tokens do LLM stub")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de erros injetados pelos stubs")
+    parser.add_argument("--output", help="Arquivo JSON do relatório")
+    parser.add_argument("--compare", help="Relatório anterior para comparação")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    records = load_requests(args.requests) if args.requests else generate_requests(args.generate, args.seed)
+    servers = []
+    if args.stub_servers:
+        servers = start_stub_servers(args.llm_latency_ms, args.search_latency_ms, args.tokens_per_s,
+                                     args.error_rate, args.seed)
+    elif not args.url and not args.no_stubs:
+        install_stubs(args.llm_latency_ms, args.search_latency_ms)
+
+    try:
+        report = asyncio.run(run_load_test(
+            records, url=args.url, concurrency=args.concurrency, rate=args.rate,
+            poisson=args.poisson, speedup=args.speedup, seed=args.seed,
+        ))
+    finally:
+        for server in servers:
+            server.close()
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Relatório salvo em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.max_regression)
+        if regressions:
+            print("\n⚠️ Regressões em relação ao baseline:")
+            for item in regressions:
+                print(f"   - {item}")
+            return 1
+        print("\n✅ Sem regressões em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Relatório de memória do chatbot.
+
+Com --url, consulta o /admin/memory de um servidor em execução (e, com
+--snapshot/--compare-to, tira snapshots do tracemalloc lá). Sem --url, monta
+o pipeline em processo, roda consultas geradas em várias conversas e mostra o
+crescimento das estruturas e o diff do tracemalloc entre antes e depois.
+
+Exemplos:
+    python -m scripts.memory_report --queries 5000 --conversations 200
+    python -m scripts.memory_report --url http://localhost:8000
+    python -m scripts.memory_report --url http://localhost:8000 --snapshot depois --compare-to antes
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _format_bytes(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:,.1f} {unit}"
+        value /= 1024
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"🧠 RSS: {_format_bytes(report.get('rss_bytes'))}")
+    structures = report.get("structures", {})
+    if structures:
+        print("📦 Estruturas:")
+        for name, size in structures.items():
+            items = size.get("items")
+            print(f"   {name:<25} {_format_bytes(size['bytes']):>12}  {items if items is not None else '-':>8} itens")
+    tracing = report.get("tracemalloc", {})
+    if tracing.get("current_bytes") is not None:
+        print(f"🔎 tracemalloc: atual {_format_bytes(tracing['current_bytes'])} | pico {_format_bytes(tracing['peak_bytes'])}")
+    for title, key in (("Top alocadores", "top"), ("Maiores variações", "diff")):
+        rows = report.get(key) or tracing.get(key) or []
+        if rows:
+            print(f"📈 {title}:")
+            for row in rows:
+                change = f" ({_format_bytes(row['size_diff_bytes'])})" if "size_diff_bytes" in row else ""
+                print(f"   {_format_bytes(row['size_bytes']):>12}{change}  {row['location']}")
+
+
+def run_remote(url: str, limit: int, snapshot: Optional[str], compare_to: Optional[str],
+               token: Optional[str]) -> Dict[str, Any]:
+    import requests
+
+    headers = {"X-Admin-Token": token} if token else {}
+    base = url.rstrip("/")
+    if snapshot:
+        params = {"limit": limit}
+        if compare_to:
+            params["compare_to"] = compare_to
+        resp = requests.post(f"{base}/admin/memory/snapshots/{snapshot}", params=params, headers=headers, timeout=30)
+    else:
+        resp = requests.get(f"{base}/admin/memory", params={"limit": limit}, headers=headers, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def run_local(queries: int, conversations: int, limit: int, seed: int) -> Dict[str, Any]:
+    """Roda consultas geradas pelo pipeline em processo e mede o crescimento de memória"""
+    import tracemalloc
+    from app.core.chatbot import Chatbot
+    from app.core.rag_engine import RAGEngine
+    from app.models.payroll import PayrollData
+    from app.services.payroll_service import PayrollService
+    from app.utils.config import settings
+    from app.utils.memory_report import diff_snapshots, memory_report, snapshots, structures
+    from benchmarks.bench_pipeline import FakeLLM
+    from benchmarks.query_generator import QueryGenerator
+
+    payroll_data = PayrollData(os.path.join(settings.DATA_DIR, settings.PAYROLL_FILE))
+    chatbot = Chatbot(RAGEngine(PayrollService(payroll_data)), FakeLLM())
+    structures.register("conversations", lambda: chatbot.memory.conversations)
+    structures.register("payroll_table", lambda: payroll_data.df)
+
+    before_structures = structures.measure()
+    before = snapshots.take("before")
+    for i, query in enumerate(QueryGenerator(seed).generate(queries)):
+        chatbot.process_message(query.message, f"conv-{i % conversations}")
+    after = snapshots.take("after")
+
+    report = memory_report(limit)
+    report["structures_before"] = before_structures
+    report["diff"] = diff_snapshots(before, after, limit)
+    tracemalloc.stop()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Relatório de memória do chatbot")
+    parser.add_argument("--url", help="URL base de um servidor em execução")
+    parser.add_argument("--snapshot", help="(com --url) nome do snapshot a tirar")
+    parser.add_argument("--compare-to", help="(com --url) snapshot anterior para o diff")
+    parser.add_argument("--token", default=os.getenv("ADMIN_TOKEN"), help="Token de administração")
+    parser.add_argument("--queries", type=int, default=2000, help="(em processo) consultas a executar")
+    parser.add_argument("--conversations", type=int, default=100, help="(em processo) conversas distintas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        report = run_remote(args.url, args.limit, args.snapshot, args.compare_to, args.token)
+    else:
+        report = run_local(args.queries, args.conversations, args.limit, args.seed)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório salvo em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+Servidores locais que imitam a API da OpenAI (chat completions, com e sem
+streaming) e a da Serper (/search), para testes de carga e benchmarks sem
+rede nem custo.
+
+Latência, jitter, vazão de tokens e taxa de erro são configuráveis. Aponte
+o chatbot para eles com:
+    LLM_BASE_URL=http://127.0.0.1:8081/v1  OPENAI_API_KEY=stub-key
+    SERPER_BASE_URL=http://127.0.0.1:8082  SERPER_API_KEY=stub-key
+
+Exemplos:
+    python -m scripts.stub_servers --openai-port 8081 --serper-port 8082
+    python -m scripts.stub_servers --latency-ms 400 --tokens-per-s 40 --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.prompt_builder import estimate_tokens
+
+DEFAULT_REPLY = (
+    "Esta é uma resposta simulada do servidor local de testes. "
+    "Ela tem o tamanho típico de uma resposta curta sobre folha de pagamento, "
+    "com valores em R$ e uma explicação breve."
+)
+DEFAULT_SELIC_SNIPPET = "A taxa Selic está em 15,00% a.a., definida pelo Copom em 18/06/2025."
+
+
+class StubBehavior:
+    """Comportamento simulado: latência até o primeiro byte, vazão de tokens e erros"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, tokens_per_s: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_s = tokens_per_s     # 0 = sem limite
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_byte_delay_s(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def token_delay_s(self, tokens: int) -> float:
+        return tokens / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+class StubServer:
+    """ThreadingHTTPServer em thread daemon; porta 0 escolhe uma livre"""
+
+    name = "stub"
+
+    def __init__(self, behavior: Optional[StubBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        self.behavior = behavior or StubBehavior()
+        self.requests = 0
+        self.errors = 0
+        self._count_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _count(self, error: bool = False):
+        with self._count_lock:
+            self.requests += 1
+            self.errors += int(error)
+
+    def handle_post(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    stub._count(error=True)
+                    return send_json(self, 400, {"error": {"message": "JSON inválido"}})
+                time.sleep(stub.behavior.first_byte_delay_s())
+                if stub.behavior.should_fail():
+                    stub._count(error=True)
+                    return send_json(self, stub.behavior.error_status,
+                                     {"error": {"message": "Erro injetado pelo stub", "type": "server_error"}})
+                stub._count()
+                stub.handle_post(self, body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def send_json(handler: BaseHTTPRequestHandler, status: int, payload: Dict[str, Any]):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+# ================================
+# OpenAI (chat completions)
+# ================================
+class OpenAIStub(StubServer):
+    """POST /v1/chat/completions (e /chat/completions), com "stream": true em SSE"""
+
+    name = "openai"
+
+    def __init__(self, behavior: Optional[StubBehavior] = None, reply: str = DEFAULT_REPLY, **kwargs):
+        super().__init__(behavior, **kwargs)
+        self.reply = reply
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def handle_post(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]):
+        if not handler.path.rstrip("/").endswith("/chat/completions"):
+            return send_json(handler, 404, {"error": {"message": f"Rota desconhecida: {handler.path}"}})
+
+        pieces = self._reply_pieces(body.get("max_tokens"))
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "stub-model")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+
+        if body.get("stream"):
+            return self._stream(handler, pieces, completion_id, model)
+
+        time.sleep(self.behavior.token_delay_s(len(pieces)))
+        send_json(handler, 200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(pieces)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _reply_pieces(self, max_tokens: Optional[int]) -> List[str]:
+        """Resposta quebrada em "tokens" (palavra + espaço), cortada em max_tokens"""
+        words = self.reply.split(" ")
+        pieces = [w + " " for w in words[:-1]] + words[-1:]
+        return pieces[:max_tokens] if max_tokens else pieces
+
+    def _stream(self, handler: BaseHTTPRequestHandler, pieces: List[str], completion_id: str, model: str):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send_event(data: str):
+            payload = f"data: {data}\n\n".encode("utf-8")
+            handler.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+            handler.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+            return json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }, ensure_ascii=False)
+
+        delay = self.behavior.token_delay_s(1)
+        send_event(chunk({"role": "assistant", "content": ""}))
+        for piece in pieces:
+            time.sleep(delay)
+            send_event(chunk({"content": piece}))
+        send_event(chunk({}, "stop"))
+        send_event("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+# ================================
+# Serper (/search)
+# ================================
+class SerperStub(StubServer):
+    """POST /search com o formato "organic" da Serper; exige X-API-KEY se api_key for definido"""
+
+    name = "serper"
+
+    def __init__(self, behavior: Optional[StubBehavior] = None, snippet: str = DEFAULT_SELIC_SNIPPET,
+                 link: str = "https://www.bcb.gov.br/controleinflacao/taxaselic",
+                 api_key: Optional[str] = None, **kwargs):
+        super().__init__(behavior, **kwargs)
+        self.snippet = snippet
+        self.link = link
+        self.api_key = api_key
+
+    def handle_post(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]):
+        if handler.path.rstrip("/") != "/search":
+            return send_json(handler, 404, {"message": f"Rota desconhecida: {handler.path}"})
+        if self.api_key and handler.headers.get("X-API-KEY") != self.api_key:
+            return send_json(handler, 403, {"message": "Unauthorized."})
+        send_json(handler, 200, {
+            "searchParameters": {"q": body.get("q", ""), "num": body.get("num", 10)},
+            "organic": [{"title": "Taxa Selic", "link": self.link, "snippet": self.snippet, "position": 1}],
+        })
+
+
+def stub_environment(openai: OpenAIStub, serper: SerperStub) -> Dict[str, str]:
+    """Variáveis de ambiente que apontam o chatbot para os stubs"""
+    return {
+        "LLM_BASE_URL": openai.base_url,
+        "OPENAI_API_KEY": "stub-key",
+        "SERPER_BASE_URL": serper.url,
+        "SERPER_API_KEY": serper.api_key or "stub-key",
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidores locais compatíveis com OpenAI e Serper")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--openai-port", type=int, default=8081)
+    parser.add_argument("--serper-port", type=int, default=8082)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Latência do LLM até o primeiro token")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-s", type=float, default=50.0, help="Vazão de tokens do LLM (0 = sem limite)")
+    parser.add_argument("--search-latency-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas com erro (ambos)")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    openai = OpenAIStub(StubBehavior(args.latency_ms, args.jitter_ms, args.tokens_per_s,
+                                     args.error_rate, args.error_status, args.seed),
+                        host=args.host, port=args.openai_port).start()
+    serper = SerperStub(StubBehavior(args.search_latency_ms, args.jitter_ms / 2, 0.0,
+                                     args.error_rate, args.error_status, args.seed),
+                        host=args.host, port=args.serper_port).start()
+
+    print(f"🤖 OpenAI stub em {openai.base_url}")
+    print(f"🔎 Serper stub em {serper.url}")
+    print("\nExporte antes de subir a API:")
+    for key, value in stub_environment(openai, serper).items():
+        print(f"   export {key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\n⏹️ Encerrando ({openai.requests} chamadas ao LLM, {serper.requests} à Serper)")
+    finally:
+        openai.close()
+        serper.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Treina o roteador de intenção local (app/core/intent_router.py).
+
+Os exemplos vêm do gerador de consultas rotuladas dos benchmarks (folha e
+Selic) mais paráfrases que não usam as palavras-chave do LLMService
+("ganhou", "caiu na conta", "contracheque"...), perguntas sobre a empresa
+inteira ("folha total", "top 10 bônus"), cenários what-if ("e se o salário
+base subir 8%?"), valores corrigidos pela Selic e perguntas gerais que
+precisam do LLM. Consultas que os guardrails bloqueiam ficam de fora.
+Mostra acurácia e latência num conjunto separado antes de salvar.
+
+Exemplos:
+    python -m scripts.train_intent_router
+    python -m scripts.train_intent_router --count 50000 --output data/intent_router.npz
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.intent_router import GENERAL_LABEL, IntentRouter
+from app.utils.config import settings
+from benchmarks.query_generator import EMPLOYEES, MONTH_ABBR, MONTHS, OUT_OF_DOMAIN, QueryGenerator, strip_accents
+
+# Paráfrases respondíveis pela folha sem as palavras-chave do extract_intent
+PAYROLL_PARAPHRASES = [
+    "{emp} ganhou quanto em {month}?",
+    "Quanto {emp} ganhou em {month}?",
+    "Quanto caiu na conta de {emp} em {month}?",
+    "Quanto entrou pra {emp} em {month}?",
+    "Contracheque de {emp} de {month}",
+    "Qual foi o pagamento de {emp} em {month}?",
+    "{emp} recebeu em {month}?",
+    "Quanto foi descontado de {emp} em {month}?",
+    "Qual o valor pago a {emp} em {month}?",
+    "Me mostra os ganhos de {emp} em {month}",
+    "Quanto o {emp} levou pra casa em {month}?",
+    "Quanto sobrou pro {emp} em {month} depois dos descontos?",
+    "Qual a remuneração de {emp}?",
+    "Quanto {emp} ganha?",
+    "Quanto a {emp} tirou de imposto de renda em {month}?",
+    "Que dia {emp} foi paga em {month}?",
+    "{emp} ganhou gratificação?",
+    "Qual a maior gratificação da {emp}?",
+]
+# Perguntas sobre a empresa inteira (sem funcionário), respondidas pelos agregados da folha
+COMPANY_PARAPHRASES = [
+    "Qual a folha total de {month}?",
+    "Quanto a empresa pagou de {field} em {month}?",
+    "Total de {field} da empresa no {quarter}º trimestre",
+    "Top {n} {field} do trimestre",
+    "Top {n} maiores {field} de {month}",
+    "Quais os {n} maiores {field} em {year}?",
+    "Média de {field} por mês",
+    "Qual a média de {field} em {month}?",
+    "{field} médio dos funcionários em {year}",
+    "Qual a mediana do {field} em {year}?",
+    "Percentil 90 do {field} em {month}",
+    "Total mensal de {field} em {year}",
+    "Quanto foi pago de {field} para todos os funcionários em {month}?",
+]
+COMPANY_FIELDS = ["bônus", "IRRF", "INSS", "salário líquido", "salário base", "líquido", "imposto de renda", "desconto"]
+# Cenários what-if sobre a folha (simulação com INSS/IRRF recalculados)
+SIMULATION_PARAPHRASES = [
+    "E se o salário base subir {pct}%?",
+    "E se o {field} aumentar {pct}%?",
+    "Qual o impacto de um bônus de R$ {amount} para todos em {month}?",
+    "Simule um reajuste de {pct}% no salário",
+    "Simula um aumento de {pct}% no salário de {emp}",
+    "E se os benefícios caírem {pct}%?",
+    "Cenário com reajuste de {pct}% em {year}",
+    "Quanto custaria um aumento de {pct}% para todos?",
+    "Impacto na folha de um bônus de {amount} reais em {month}",
+    "E se cortarmos {pct}% do VT/VR?",
+    "E se o {field} de {emp} subir R$ {amount}?",
+]
+SIMULATION_FIELDS = ["salário base", "salário", "bônus", "benefício", "vale-refeição"]
+# Valores da folha corrigidos pela série Selic local (respondidos pelo RAG, não pela busca na web)
+CORRECTION_PARAPHRASES = [
+    "Quanto valeria meu bônus de {month} corrigido pela Selic?",
+    "Quanto valeria o {field} de {month} de {emp} corrigido pela Selic?",
+    "{field} de {emp} em {year} corrigido pela Selic",
+    "Corrige pela Selic o {field} da {emp} de {month}",
+    "R$ {amount} de {month} corrigidos pela Selic",
+    "Quanto renderia na Selic o {field} de {emp}?",
+    "Atualiza pela Selic o pagamento de {emp} de {month}",
+]
+WEB_PARAPHRASES = [
+    "Quanto está a Selic?",
+    "Qual o valor da taxa básica de juros hoje?",
+    "A Selic subiu?",
+    "Qual a taxa de juros do Banco Central agora?",
+    "taxa selic vigente",
+]
+# Perguntas que a base da folha não responde: vão para o LLM
+GENERAL_QUESTIONS = OUT_OF_DOMAIN + [
+    "Olá, tudo bem?",
+    "Oi!",
+    "Bom dia",
+    "Obrigado pela ajuda",
+    "Quem é você?",
+    "O que você consegue fazer?",
+    "Como funciona o décimo terceiro?",
+    "Como é calculado o décimo terceiro salário?",
+    "O que é FGTS?",
+    "Como funcionam as férias na CLT?",
+    "Quantos dias de férias um funcionário tem direito?",
+    "O que é o aviso prévio?",
+    "Como funciona a hora extra?",
+    "Qual a diferença entre salário bruto e líquido?",
+    "O que significa INSS?",
+    "Para que serve o IRRF?",
+    "Como funciona o vale-transporte?",
+    "O que é PLR?",
+    "Qual a capital do Brasil?",
+    "Quanto é 15% de 200?",
+    "Escreva um e-mail de boas-vindas para um novo funcionário",
+    "Me explique o que é uma folha de pagamento",
+    "Como calcular rescisão de contrato?",
+    "O que é adicional noturno?",
+    "Quais documentos preciso para admissão?",
+    "Qual o horário de funcionamento do RH?",
+    "Conte uma piada",
+    "Qual a melhor linguagem de programação?",
+    "Resuma as regras do seguro-desemprego",
+    "O que é banco de horas?",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    emp = rng.choice(EMPLOYEES[rng.choice(list(EMPLOYEES))])
+    month = rng.randrange(12)
+    period = rng.choice([MONTHS[month], f"{MONTHS[month]}/{rng.choice((2024, 2025))}",
+                         f"{MONTH_ABBR[month]}/{rng.choice((24, 25))}"])
+    return template.format(emp=emp, month=period)
+
+
+def _fill_company(template: str, rng: random.Random) -> str:
+    month = rng.randrange(12)
+    return template.format(
+        month=rng.choice([MONTHS[month], f"{MONTHS[month]}/{rng.choice((2024, 2025))}"]),
+        field=rng.choice(COMPANY_FIELDS), quarter=rng.randint(1, 4), n=rng.choice((5, 10, 20)),
+        year=rng.choice((2024, 2025)),
+    )
+
+
+def _fill_simulation(template: str, rng: random.Random) -> str:
+    month = rng.randrange(12)
+    return template.format(
+        pct=rng.choice((3, 5, 8, 10, 12.5, 15)), amount=rng.choice(("500", "1.000", "1.500,00", "2000")),
+        month=rng.choice([MONTHS[month], f"{MONTHS[month]}/{rng.choice((2024, 2025))}"]),
+        field=rng.choice(SIMULATION_FIELDS), year=rng.choice((2024, 2025)),
+        emp=rng.choice(EMPLOYEES[rng.choice(list(EMPLOYEES))]),
+    )
+
+
+def _noisy(text: str, rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        text = strip_accents(text)
+    if rng.random() < 0.3:
+        text = text.lower()
+    return text
+
+
+def build_training_set(count: int, seed: int = 42) -> Tuple[List[str], List[str]]:
+    """(mensagens, rótulos) com cerca de count exemplos"""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for query in QueryGenerator(seed).generate(count):
+        if query.guardrail == "blocked":
+            continue
+        texts.append(query.message)
+        labels.append("web_search" if query.query_type == "web_search" else "payroll")
+
+    # Classes pouco representadas no gerador ganham peso parecido com a folha
+    extra = count // 4
+    for _ in range(extra):
+        texts.append(_noisy(_fill(rng.choice(PAYROLL_PARAPHRASES), rng), rng))
+        labels.append("payroll")
+    for _ in range(extra // 2):
+        texts.append(_noisy(_fill_company(rng.choice(COMPANY_PARAPHRASES), rng), rng))
+        labels.append("payroll")
+    for _ in range(extra // 4):
+        texts.append(_noisy(_fill_simulation(rng.choice(SIMULATION_PARAPHRASES), rng), rng))
+        labels.append("payroll")
+    for _ in range(extra // 8):
+        texts.append(_noisy(_fill_simulation(rng.choice(CORRECTION_PARAPHRASES), rng), rng))
+        labels.append("payroll")
+    for _ in range(extra // 4):
+        texts.append(_noisy(rng.choice(WEB_PARAPHRASES), rng))
+        labels.append("web_search")
+    for _ in range(extra):
+        texts.append(_noisy(rng.choice(GENERAL_QUESTIONS), rng))
+        labels.append(GENERAL_LABEL)
+    return texts, labels
+
+
+def evaluate(router: IntentRouter, texts: List[str], labels: List[str]) -> dict:
+    start = time.perf_counter()
+    predictions = [router.predict(t) for t in texts]
+    single_us = (time.perf_counter() - start) / len(texts) * 1e6
+    start = time.perf_counter()
+    router.predict_batch(texts)
+    batch_us = (time.perf_counter() - start) / len(texts) * 1e6
+    correct = sum(p.label == label for p, label in zip(predictions, labels))
+    confident = [p for p in predictions if p.confidence >= settings.INTENT_CONFIDENCE_THRESHOLD]
+    return {
+        "accuracy": correct / len(texts),
+        "coverage": len(confident) / len(texts),
+        "single_us": single_us,
+        "batch_us": batch_us,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Treina o roteador de intenção local")
+    parser.add_argument("--count", type=int, default=20000, help="Consultas do gerador (antes das paráfrases)")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--features", type=int, default=2 ** 16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=settings.INTENT_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    texts, labels = build_training_set(args.count, args.seed)
+    test_texts, test_labels = build_training_set(max(1000, args.count // 10), args.seed + 1)
+    print(f"🧭 Treinando com {len(texts)} exemplos ({', '.join(f'{l}={labels.count(l)}' for l in sorted(set(labels)))})")
+
+    start = time.perf_counter()
+    router = IntentRouter.fit(texts, labels, n_features=args.features, epochs=args.epochs, seed=args.seed)
+    print(f"   treino em {time.perf_counter() - start:.1f}s")
+
+    report = evaluate(router, test_texts, test_labels)
+    print(f"📊 Acurácia {report['accuracy']:.1%} | cobertura (conf ≥ {settings.INTENT_CONFIDENCE_THRESHOLD}) "
+          f"{report['coverage']:.1%} | {report['single_us']:.1f} µs/msg ({report['batch_us']:.1f} µs/msg em lote)")
+
+    router.save(args.output)
+    print(f"💾 Modelo salvo em {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import os
 import re
 import sys
 import json
+import time
 import pandas as pd
 import streamlit as st
 from datetime import datetime
@@ -18,6 +19,8 @@ try:
     from app.services.llm_service import LLMService
     from app.core.chatbot import Chatbot
     from app.utils.config import settings
+    from app.utils.tracing import tracer
+    from app.utils.resilience import request_deadline
 
 except ImportError as e:
     st.error(f"❌ Erro ao carregar módulos locais: {e}")
@@ -28,7 +31,7 @@ try:
     from guardrails import Guardrails
     from observability import Observability
     import logging
-    logger = logging.getLogger('chatbot_payroll')
+    logger = logging.getLogger('chatbot_payroll.streamlit')
 
 except ImportError as e:
     st.warning(f"⚠️ Módulos de segurança não encontrados: {e}")
@@ -84,14 +87,19 @@ class StreamlitChatbot:
         if not self.initialized:
             return {"response": "Chatbot não inicializado corretamente.", "evidence": [], "sources": []}
 
-        start_time = datetime.now()
+        with tracer.start_span("streamlit.process_message", session_id=self.session_id), \
+                request_deadline(settings.REQUEST_DEADLINE_S):
+            return self._process_message(message)
+
+    def _process_message(self, message: str) -> dict:
+        start_time = time.perf_counter()
         
         try:
             # === 1. VALIDAÇÃO COM GUARDRAILS ===
             is_valid, validation_message, guardrail_metadata = self.guardrails.validate_input(message)
             
             if not is_valid:
-                response_time = (datetime.now() - start_time).total_seconds()
+                response_time = time.perf_counter() - start_time
                 
                 # Log do bloqueio
                 self.observability.log_guardrail_trigger(
@@ -122,7 +130,7 @@ class StreamlitChatbot:
                 response_text = response_text.replace(f"**{employee_name}**", f"**{formatted_name}**")
 
             # === 4. CALCULO DE TEMPO DE RESPOSTA E LOG ===
-            response_time = (datetime.now() - start_time).total_seconds()
+            response_time = time.perf_counter() - start_time
             self.observability.log_interaction(
                 session_id=self.session_id,
                 user_input=message,
@@ -134,7 +142,14 @@ class StreamlitChatbot:
             return {"response": response_text, "evidence": evidence, "sources": []}
 
         except Exception as e:
-            logger.error(f"Erro ao processar mensagem: {e}")
+            logger.error("Erro ao processar mensagem: %s", e)
+            self.observability.log_interaction(
+                session_id=self.session_id,
+                user_input=message,
+                response=str(e),
+                response_time=time.perf_counter() - start_time,
+                status="error"
+            )
             return {"response": f"❌ Erro ao processar mensagem: {e}", "evidence": [], "sources": []}
 
     # === Utilitários ===
@@ -229,11 +244,95 @@ def initialize_session_state():
 
     st.session_state.setdefault("messages", [])
     st.session_state.setdefault("conversation_id", f"session_{datetime.now():%Y%m%d_%H%M%S}")
+    st.session_state.setdefault("next_message_id", 0)
+    # Caches por id de mensagem: mensagens nunca mudam depois de criadas
+    st.session_state.setdefault("render_cache", {})
+    st.session_state.setdefault("export_cache", {})
+    st.session_state.setdefault("history_window", settings.CHAT_HISTORY_WINDOW)
 
 
 def clear_conversation():
     """Limpa todas as mensagens da conversa."""
-    st.session_state.update({"messages": [], "initial_question": None, "selected_suggestion": None})
+    st.session_state.update({
+        "messages": [],
+        "initial_question": None,
+        "selected_suggestion": None,
+        "render_cache": {},
+        "export_cache": {},
+        "history_window": settings.CHAT_HISTORY_WINDOW,
+    })
+
+
+def append_message(role: str, content: str, evidence: list = None):
+    """Adiciona mensagem ao histórico com um id estável."""
+    message_id = st.session_state.next_message_id
+    st.session_state.next_message_id += 1
+    message = {"id": message_id, "role": role, "content": content}
+    if evidence:
+        message["evidence"] = evidence
+    st.session_state.messages.append(message)
+
+
+def get_rendered_message(msg: dict) -> dict:
+    """Retorna o markdown da mensagem (e das evidências), memoizado por id."""
+    cache = st.session_state.render_cache
+    rendered = cache.get(msg["id"])
+    if rendered is None:
+        content = msg["content"]
+        if "🚫 **Guardrail Ativado**" in content:
+            css_class = "guardrail-blocked"
+        elif "❌ Não foi possível compreender" in content:
+            css_class = "not-understood-message"
+        else:
+            css_class = "success-message"
+
+        rendered = {
+            "content": f'<div class="{css_class}">{content}</div>',
+            "evidence": st.session_state.chatbot.format_evidence(msg["evidence"]) if msg.get("evidence") else "",
+        }
+        cache[msg["id"]] = rendered
+    return rendered
+
+
+def get_export_payload(msg: dict) -> dict:
+    """Gera (uma única vez) o JSON de exportação da mensagem."""
+    cache = st.session_state.export_cache
+    payload = cache.get(msg["id"])
+    if payload is None:
+        json_data = st.session_state.chatbot.generate_json_download([msg], st.session_state.conversation_id)
+        payload = {
+            "data": json.dumps(json_data, indent=2, ensure_ascii=False),
+            "file_name": f"folha_{datetime.now():%Y%m%d_%H%M%S}.json",
+        }
+        cache[msg["id"]] = payload
+    return payload
+
+
+def render_message(msg: dict):
+    """Renderiza uma mensagem do histórico usando os caches da sessão."""
+    rendered = get_rendered_message(msg)
+
+    with st.chat_message(msg["role"]):
+        st.markdown(rendered["content"], unsafe_allow_html=True)
+
+        if rendered["evidence"]:
+            with st.expander("📊 Ver Evidências", expanded=False):
+                st.markdown(rendered["evidence"])
+
+                # Exportação das evidências: o JSON só é montado quando solicitado
+                if msg["id"] in st.session_state.export_cache:
+                    payload = st.session_state.export_cache[msg["id"]]
+                    st.download_button(
+                        label="📥 Baixar JSON",
+                        data=payload["data"],
+                        file_name=payload["file_name"],
+                        mime="application/json",
+                        key=f"download_{msg['id']}",
+                        use_container_width=True,
+                    )
+                elif st.button("📦 Preparar JSON", key=f"prepare_{msg['id']}", use_container_width=True):
+                    get_export_payload(msg)
+                    st.rerun()
 
 
 # === CSS Personalizado ===
@@ -297,46 +396,30 @@ def main():
                 """
             )
 
-    # ===== Chat =====
-    for i, msg in enumerate(st.session_state.messages):
-        with st.chat_message(msg["role"]):
-            # Aplica estilos diferentes para tipos de mensagens
-            if "🚫 **Guardrail Ativado**" in msg["content"]:
-                st.markdown(f'<div class="guardrail-blocked">{msg["content"]}</div>', unsafe_allow_html=True)
-            elif "❌ Não foi possível compreender" in msg["content"]:
-                st.markdown(f'<div class="not-understood-message">{msg["content"]}</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="success-message">{msg["content"]}</div>', unsafe_allow_html=True)
-
-            if msg.get("evidence"):
-                with st.expander("📊 Ver Evidências", expanded=False):
-                    formatted = st.session_state.chatbot.format_evidence(msg["evidence"])
-                    st.markdown(formatted)
-
-                    # Exportação das evidências
-                    json_data = st.session_state.chatbot.generate_json_download([msg], st.session_state.conversation_id)
-                    st.download_button(
-                        label="📥 Baixar JSON",
-                        data=json.dumps(json_data, indent=2, ensure_ascii=False),
-                        file_name=f"folha_{datetime.now():%Y%m%d_%H%M%S}.json",
-                        mime="application/json",
-                        key=f"download_{i}",
-                        use_container_width=True,
-                    )
+    # ===== Chat (janela das mensagens mais recentes) =====
+    messages = st.session_state.messages
+    window = st.session_state.history_window
+    hidden = max(len(messages) - window, 0)
+
+    if hidden:
+        if st.button(f"⬆️ Carregar mensagens anteriores ({hidden} ocultas)", key="btn_load_more"):
+            st.session_state.history_window += settings.CHAT_HISTORY_WINDOW
+            st.rerun()
+
+    for msg in messages[hidden:]:
+        render_message(msg)
 
     # ===== Input do Usuário =====
     user_input = st.chat_input("💬 Escreva sua pergunta sobre folha de pagamento...")
 
     # ===== Processamento da Mensagem =====
     if user_input:
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        append_message("user", user_input)
 
         with st.spinner("🛡️ Validando e processando..."):
             result = st.session_state.chatbot.process_message(user_input)
 
-        st.session_state.messages.append(
-            {"role": "assistant", "content": result["response"], "evidence": result["evidence"]}
-        )
+        append_message("assistant", result["response"], result["evidence"])
 
         st.rerun()
 
@@ -0,0 +1,35 @@
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.llm_service import LLMService
+
+
+class FakeLLM:
+    """LLM simulado: mantém a extração de intenção real, guarda os prompts e responde após delay_s"""
+
+    extract_intent = LLMService.extract_intent
+
+    def __init__(self, delay_s: float = 0.0, response: str = "Resposta simulada"):
+        self.delay_s = delay_s
+        self.response = response
+        self.prompts = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    def generate_response(self, messages):
+        self.prompts.append(messages)
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return self.response
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeLLM()
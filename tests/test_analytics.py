@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.chatbot import Chatbot
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from benchmarks.datasets import make_payroll_data
+
+
+def test_agregados_parciais_batem_com_pandas():
+    """Totais exatos, top-N exato e quantis dentro do erro relativo do sketch"""
+    service = PayrollService(make_payroll_data(20000))
+    df = service.data
+    quarter = ["2025-04", "2025-05", "2025-06"]
+    rows = df[df["competency"].isin(quarter)]
+
+    summary = service.analytics.summary("net_pay", quarter, quantiles=(0.5, 0.9, 0.99))
+    assert summary["count"] == len(rows)
+    assert abs(summary["total"] - rows["net_pay"].sum()) < 0.05
+    assert summary["max"] == rows["net_pay"].max()
+    for q in (0.5, 0.9, 0.99):
+        exact = rows["net_pay"].quantile(q, interpolation="lower")
+        assert abs(summary[f"p{round(q * 100)}"] - exact) <= 0.011 * exact
+
+    top = service.analytics.top("bonus", quarter, 10)
+    assert [value for value, _ in top] == rows["bonus"].nlargest(10).tolist()
+    assert all(df.iloc[position]["competency"] in quarter for _, position in top)
+
+    monthly = service.analytics.by_competency("deductions_irrf", quarter)
+    assert [m["total"] for m in monthly] == [
+        round(rows[rows["competency"] == c]["deductions_irrf"].sum(), 2) for c in quarter
+    ]
+    print("✅ Agregados parciais OK")
+
+
+def test_perguntas_da_empresa_sem_llm(fake_llm):
+    """Folha total, top-N e média por mês respondidas pelo RAG, sem especular com o LLM"""
+    llm = fake_llm
+    chatbot = Chatbot(RAGEngine(PayrollService(PayrollData("data/payroll.csv"))), llm)
+
+    response = chatbot.process_message("Qual a folha total de junho?", "a1")
+    assert "R$ 13.542,50 em 2 registros" in response.response
+
+    response = chatbot.process_message("Top 10 bônus do trimestre", "a2")
+    assert "2º trimestre de 2025" in response.response and len(response.evidence) == 6
+    assert response.evidence[0].bonus == 1200
+
+    response = chatbot.process_message("Média de IRRF por mês", "a3")
+    assert "| Janeiro/2025 | R$ 420,00 | 2 |" in response.response
+    assert llm.calls == 0
+    print("✅ Perguntas da empresa respondidas pelos agregados")
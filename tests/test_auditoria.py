@@ -0,0 +1,57 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from app.services.payroll_tax import PayrollAuditor, load_tax_tables
+from scripts import audit_payroll
+
+
+def _row(competency, base_salary, inss, irrf, net_pay):
+    return {
+        'employee_id': 'E900', 'name': 'Teste', 'competency': competency, 'base_salary': base_salary,
+        'bonus': 0.0, 'benefits_vt_vr': 0.0, 'other_earnings': 0.0, 'deductions_inss': inss,
+        'deductions_irrf': irrf, 'other_deductions': 0.0, 'net_pay': net_pay,
+        'payment_date': f"{competency}-28",
+    }
+
+
+def test_recalculo_usa_a_tabela_vigente_e_tolerancia_em_centavos():
+    """Faixas progressivas, troca de tabela em maio/2025, teto do INSS e tolerância de 1 centavo"""
+    df = pd.DataFrame([
+        _row('2025-01', 3000.0, 253.41, 13.20, 2733.39),      # desconto simplificado de R$ 564,80
+        _row('2025-05', 3000.0, 253.41, 0.0, 2746.59),        # nova faixa de isenção: IRRF zerado
+        _row('2024-03', 20000.0, 908.85, 4354.06, 14737.09),  # teto do INSS: 1 centavo dentro da tolerância
+        _row('2025-06', 5000.0, 509.60, 312.91, 4177.51),     # IRRF 2 centavos acima
+        _row('2022-12', 5000.0, 0.0, 0.0, 5000.0),            # sem tabela vigente
+    ])
+    auditor = PayrollAuditor(load_tax_tables("data/tax_tables.json"), tolerance=0.01)
+    result = auditor.audit(df)
+
+    assert result.rows == 4 and result.skipped == 1
+    assert result.counts() == {'deductions_inss': 0, 'deductions_irrf': 1, 'net_pay': 0}
+    mismatch = result.mismatches.iloc[0]
+    assert mismatch['competency'] == '2025-06' and mismatch['expected'] == 312.89
+    assert mismatch['difference'] == 0.02
+    print("✅ INSS/IRRF recalculados pela tabela de cada competência")
+
+
+def test_auditoria_no_chatbot_e_na_cli(tmp_path):
+    """O RAG responde a auditoria com os valores recalculados; a CLI falha quando há divergência"""
+    rag = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    response, evidence = rag.process_query("O INSS da Ana está correto?")
+    assert "6 de 6 registros" in response and "R$ 951,63" in response
+    assert len(evidence) == 6
+
+    response, _ = rag.process_query("Auditar a folha de março de 2025")
+    assert "2 de 2 registros" in response
+
+    output = tmp_path / "divergencias.csv"
+    assert audit_payroll.main(["--output", str(output), "--fail-on-mismatch", "--limit", "0"]) == 1
+    assert len(pd.read_csv(output)) == 36
+    print("✅ Auditoria disponível no chatbot e na linha de comando")
@@ -0,0 +1,64 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_pipeline import compare, run_suite
+from benchmarks.datasets import make_payroll_frame
+
+
+def test_dataset_sintetico():
+    """Folha sintética mantém as colunas do CSV real e os funcionários de exemplo"""
+    real = make_payroll_frame(12)
+    synthetic = make_payroll_frame(5000)
+
+    assert len(real) == 12
+    assert len(synthetic) == 5000
+    assert list(synthetic.columns) == list(real.columns)
+    assert {"Ana Souza", "Bruno Lima"} <= set(synthetic['name'])
+    print("✅ Dataset sintético OK")
+
+
+def test_suite_e_comparacao_com_baseline():
+    """Roda a suíte em modo rápido e detecta regressão na mediana"""
+    report = run_suite([12, 2000], rounds=2, warmup=1, min_round_ms=0.1, verbose=False)
+
+    expected = ["guardrails.validate_input@0", "rag.handle_bonus_query@12",
+                "payroll.to_evidence@2000", "chatbot.process_message[rag]@2000",
+                "chatbot.process_message[llm]@2000"]
+    for key in expected:
+        assert report["results"][key]["median_us"] > 0
+
+    slower = {"results": {key: dict(stats, median_us=stats["median_us"] * 3)
+                          for key, stats in report["results"].items()}}
+    assert compare(report, report) == []
+    assert len(compare(slower, report)) == len(report["results"])
+    print("✅ Suíte de benchmarks OK")
+
+
+def test_gerador_de_consultas_rotuladas():
+    """Mesma seed gera as mesmas consultas; rótulos cobrem todas as categorias"""
+    from benchmarks.query_generator import CATEGORY_WEIGHTS, generate_queries
+
+    queries = generate_queries(2000, seed=7)
+    assert queries == generate_queries(2000, seed=7)
+    assert queries != generate_queries(2000, seed=8)
+    assert {q.category for q in queries} == {name for name, _ in CATEGORY_WEIGHTS}
+    for q in queries:
+        if q.guardrail == "blocked":
+            assert q.query_type == "blocked"
+        if q.competency:
+            assert q.competency.startswith(str(q.year))
+    print("✅ Gerador de consultas OK")
+
+
+def test_vazao_e_acuracia_de_roteamento():
+    """Benchmark de roteamento mede vazão e acurácia no mesmo passe"""
+    from benchmarks.bench_routing import run_routing_bench
+
+    report = run_routing_bench(1000, seed=1, verbose=False)
+    assert report["guardrails"]["queries_per_s"] > 0
+    assert report["routing"]["employee_accuracy"] > 0.95
+    for category in ("out_of_domain", "sensitive", "too_long"):
+        assert report["by_category"][category]["guardrail_accuracy"] == 1.0
+    print("✅ Benchmark de roteamento OK")
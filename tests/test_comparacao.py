@@ -0,0 +1,39 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.models.schemas import PayrollQuery
+from app.services.payroll_query import PayrollQueryService
+from app.services.payroll_service import PayrollService
+
+
+def test_rag_compara_ana_e_bruno():
+    """Dois funcionários na pergunta: ranking, diferença mês a mês e evidências dos dois lados"""
+    engine = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    response, evidence = engine.process_query("compare o líquido da Ana e do Bruno em 2025")
+
+    assert "1º **Ana Souza**: R$ 46.812,50" in response
+    assert "2º **Bruno Lima**: R$ 36.832,50 (R$ 9.980,00 a menos que Ana Souza)" in response
+    assert "| Abril/2025 | R$ 7.586,25 | R$ 5.756,25 | R$ 1.830,00 |" in response
+    assert {e.name for e in evidence} == {"Ana Souza", "Bruno Lima"} and len(evidence) == 12
+
+    response, evidence = engine.process_query("Compare o INSS de Ana e Bruno no 2º trimestre")
+    assert "**INSS**" in response and len(evidence) == 6
+    print("✅ Comparação entre funcionários OK")
+
+
+def test_payroll_query_comparison():
+    """query_type 'comparison' devolve agregados por funcionário e o total dos dois"""
+    service = PayrollQueryService(PayrollService(PayrollData("data/payroll.csv")), max_evidence=4)
+    result = service.run(PayrollQuery(employee_names=["Ana Souza", "Bruno Lima"], year=2025, query_type="comparison"))
+
+    assert result.error is None
+    assert result.groups["Ana Souza"]["net_pay_total"] == 46812.5
+    assert result.groups["Bruno Lima"]["net_pay_total"] == 36832.5
+    assert result.aggregates["net_pay_total"] == 46812.5 + 36832.5
+    assert [e.name for e in result.evidence] == ["Ana Souza"] * 2 + ["Bruno Lima"] * 2
+    assert service.run(PayrollQuery(employee_names=["Ana Souza"], query_type="comparison")).error
+    print("✅ PayrollQuery comparison OK")
@@ -50,4 +50,21 @@ def test_dados_payroll():
     assert len(df) > 0
     assert 'name' in df.columns
     assert 'net_pay' in df.columns
-    print("✅ Dados payroll OK")
\ No newline at end of file
+    print("✅ Dados payroll OK")
+
+def test_route_espelha_process_query():
+    """RAGEngine.route devolve a rota do process_query sem executar o handler"""
+    from app.core.rag_engine import RAGEngine
+    from app.models.payroll import PayrollData
+    from app.services.payroll_service import PayrollService
+
+    engine = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    routed = engine.route("Quanto recebi em maio/2025? (Ana Souza)")
+    assert routed.query_type == "net_pay_specific" and routed.employee_name == "ana souza"
+    assert routed.date_info.get("competency") == "2025-05"
+
+    assert engine.route("compare o líquido da Ana e do Bruno em 2025").query_type == "comparison"
+    assert engine.route("Qual o total da folha em 2025?").query_type == "analytics"
+    assert engine.route("Qual o salário do Carlos Pereira?").query_type == "employee_not_found"
+    assert engine.route("Bom dia, tudo bem?").query_type == "general_without_employee"
+    print("✅ RAGEngine.route OK")
@@ -0,0 +1,49 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.chatbot import Chatbot
+from app.core.intent_router import IntentRouter
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.llm_service import LLMService
+from app.services.payroll_service import PayrollService
+from scripts.train_intent_router import build_training_set
+
+
+def test_treino_lote_e_persistencia(tmp_path):
+    """Modelo pequeno aprende as rotas; lote e arquivo dão o mesmo resultado"""
+    texts, labels = build_training_set(2000, seed=1)
+    router = IntentRouter.fit(texts, labels, n_features=2 ** 14, epochs=3)
+
+    queries = ["Bruno ganhou quanto em abril?", "Qual a taxa Selic atual?", "Como fazer bolo de cenoura?"]
+    predictions = [router.predict(q) for q in queries]
+    assert [p.label for p in predictions] == ["payroll", "web_search", "general"]
+    assert [p.route for p in predictions] == ["rag", "rag", "llm"]
+
+    path = str(tmp_path / "router.npz")
+    router.save(path)
+    loaded = IntentRouter.load(path)
+    for single, batched in zip(predictions, loaded.predict_batch(queries)):
+        assert single.label == batched.label
+        assert abs(single.confidence - batched.confidence) < 1e-6
+    print(f"✅ Confianças: {[round(p.confidence, 3) for p in predictions]}")
+
+
+def test_chatbot_responde_com_dados_sem_llm(fake_llm):
+    """Pergunta sem palavra-chave vai para o RAG em vez de custar uma chamada ao LLM"""
+    assert not LLMService.extract_intent(None, "Ana ganhou quanto em março?")["is_payroll_related"]
+
+    llm = fake_llm
+    rag_engine = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    chatbot = Chatbot(rag_engine, llm)
+    assert chatbot.intent_router is not None
+
+    response = chatbot.process_message("Ana ganhou quanto em março?")
+    assert llm.calls == 0
+    assert response.evidence
+
+    chatbot.process_message("Qual é a capital do Brasil?")
+    assert llm.calls == 1
+    print("✅ Roteamento local evitou a chamada ao LLM")
@@ -0,0 +1,58 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from scripts.load_test import (
+    build_report, compare_reports, generate_requests, percentile, run_load_test,
+)
+
+
+def test_percentis_e_comparacao():
+    """Percentis por posto e detecção de regressão entre relatórios"""
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([], 95) == 0.0
+
+    base = build_report([{"query_type": "bonus_query", "latency_ms": 10.0, "ok": True}] * 10, 1.0)
+    slow = build_report([{"query_type": "bonus_query", "latency_ms": 20.0, "ok": True}] * 10, 1.0)
+    assert compare_reports(base, base) == []
+    assert any("p95" in item for item in compare_reports(slow, base))
+    print("✅ Relatório e comparação OK")
+
+
+def test_carga_em_processo(monkeypatch, fake_llm):
+    """Executa o harness contra o app FastAPI em processo com LLM simulado"""
+    import app.main as main
+    from app.core.chatbot import Chatbot
+
+    monkeypatch.setattr(main, "chatbot", Chatbot(main.rag_engine, fake_llm))
+    monkeypatch.setattr(main.rag_engine, "_fetch_selic_web", lambda: ("Selic simulada", []))
+
+    report = asyncio.run(run_load_test(generate_requests(30), concurrency=4))
+
+    assert report["overall"]["count"] == 30
+    assert report["overall"]["error_rate"] == 0.0
+    assert "net_pay_specific" in report["by_query_type"]
+    assert report["overall"]["latency_ms"]["p99"] >= report["overall"]["latency_ms"]["p50"]
+    print("✅ Teste de carga em processo OK")
+
+
+def test_requisicoes_concorrentes_nao_serializam(monkeypatch):
+    """/chat roda no threadpool: requisições lentas em paralelo não esperam umas pelas outras"""
+    import time
+    import app.main as main
+
+    def slow_process_chat(request, conversation_id):
+        time.sleep(0.3)
+        return {"response": "ok", "evidence": [], "sources": [], "conversation_id": conversation_id, "tokens_used": 0}
+
+    monkeypatch.setattr(main, "_process_chat", slow_process_chat)
+
+    report = asyncio.run(run_load_test(generate_requests(4), concurrency=4))
+
+    assert report["overall"]["error_rate"] == 0.0
+    # Serializado levaria ~1,2 s
+    assert report["duration_s"] < 0.9
+    print("✅ Concorrência real no /chat OK")
@@ -0,0 +1,71 @@
+import sys
+import os
+import queue
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.logger import (
+    BackgroundLogWriter, BatchingRotatingFileHandler, LazyQueueHandler,
+    SamplingFilter, parse_sample_rates,
+)
+
+
+def test_amostragem_por_categoria():
+    """INFO é amostrado por categoria; WARNING nunca é descartado"""
+    sampling = SamplingFilter(parse_sample_rates("rag=0, api=1"))
+
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+    assert not sampling.filter(record("chatbot_payroll.rag", logging.INFO))
+    assert sampling.filter(record("chatbot_payroll.rag", logging.WARNING))
+    assert sampling.filter(record("chatbot_payroll.api", logging.INFO))
+    assert sampling.filter(record("chatbot_payroll.guardrails", logging.INFO))
+    print("✅ Amostragem OK")
+
+
+def test_escrita_em_lote_com_rotacao(tmp_path):
+    """Registros passam pela fila, são formatados na thread de escrita e rotacionados por tamanho"""
+    path = str(tmp_path / "app.log")
+    file_handler = BatchingRotatingFileHandler(path, maxBytes=2000, backupCount=2, encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter('%(name)s - %(message)s'))
+
+    log_queue = queue.Queue()
+    writer = BackgroundLogWriter(log_queue, [file_handler], batch_size=10)
+    writer.start()
+
+    test_logger = logging.getLogger("test_logging.batch")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(LazyQueueHandler(log_queue))
+    for i in range(200):
+        test_logger.info("mensagem %d %s", i, "x" * 20)
+
+    writer.stop()
+    file_handler.close()
+
+    assert os.path.exists(path + ".1")
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines[-1] == "test_logging.batch - mensagem 199 " + "x" * 20
+    print("✅ Escrita em lote OK")
+
+
+def test_rotacao_conta_bytes_nao_caracteres(tmp_path):
+    """Linhas com acentos e emojis não passam do maxBytes do arquivo"""
+    path = str(tmp_path / "app.log")
+    file_handler = BatchingRotatingFileHandler(path, maxBytes=1000, backupCount=5, encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    def record(i):
+        return logging.LogRecord("t", logging.INFO, __file__, 1, "✅ ção %d " + "é" * 40, (i,), None)
+
+    for start in range(0, 60, 3):
+        file_handler.emit_batch([record(i) for i in range(start, start + 3)])
+    file_handler.close()
+
+    assert os.path.exists(path + ".1")
+    for name in (path, path + ".1", path + ".2"):
+        assert os.path.getsize(name) < 1000
+    print("✅ Rotação por bytes OK")
@@ -0,0 +1,72 @@
+import sys
+import os
+import tracemalloc
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.memory_report import (
+    MEMORY_STRUCTURE_BYTES, StructureRegistry, deep_sizeof, diff_snapshots, record_memory_metrics,
+    snapshots, structures,
+)
+from app.utils.metrics import metrics
+
+
+def test_tamanho_de_estruturas():
+    """deep_sizeof mede DataFrames pelo pandas e percorre containers sem contar duas vezes"""
+    df = pd.DataFrame({"name": ["Ana Souza"] * 1000, "net_pay": [1.0] * 1000})
+    assert deep_sizeof(df) == int(df.memory_usage(deep=True).sum())
+
+    text = "x" * 10_000
+    assert deep_sizeof([text, text]) < 2 * sys.getsizeof(text)
+
+    registry = StructureRegistry()
+    registry.register("conversations", lambda: {"c1": [{"role": "user", "content": text}]})
+    registry.register("ainda_nao_existe", lambda: None)
+    sizes = registry.measure()
+    assert sizes["conversations"]["items"] == 1
+    assert sizes["conversations"]["bytes"] > 10_000
+    assert "ainda_nao_existe" not in sizes
+    print("✅ Tamanho de estruturas OK")
+
+
+def test_metricas_e_diff_de_snapshots():
+    """Sampler publica gauges por estrutura; snapshots do tracemalloc mostram o crescimento"""
+    conversations = {}
+    structures.register("teste_conversas", lambda: conversations)
+    try:
+        before = snapshots.take("teste_antes")
+        conversations.update({f"c{i}": ["mensagem " * 20 for _ in range(10)] for i in range(200)})
+        after = snapshots.take("teste_depois")
+
+        diff = diff_snapshots(before, after, limit=5)
+        assert any(__file__ in row["location"] for row in diff)
+
+        record_memory_metrics()
+        assert MEMORY_STRUCTURE_BYTES.value(structure="teste_conversas") > 0
+        assert 'chatbot_memory_structure_bytes{structure="teste_conversas"}' in metrics.render_prometheus()
+    finally:
+        structures.unregister("teste_conversas")
+        tracemalloc.stop()
+    print("✅ Métricas de memória OK")
+
+
+def test_endpoints_admin_exigem_token(monkeypatch):
+    """Sem ADMIN_TOKEN os endpoints /admin ficam fechados; com ele, só o token certo passa"""
+    from fastapi.testclient import TestClient
+    import app.main as main
+
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "")
+    assert client.get("/admin/memory").status_code == 403
+    assert client.get("/admin/memory", headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.post("/admin/memory/snapshots/aberto").status_code == 403
+    assert "aberto" not in snapshots.names()
+
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "segredo")
+    assert client.get("/admin/memory").status_code == 403
+    assert client.get("/admin/memory", headers={"X-Admin-Token": "errado"}).status_code == 403
+    response = client.get("/admin/memory", params={"limit": 1}, headers={"X-Admin-Token": "segredo"})
+    assert response.status_code == 200
+    print("✅ Autenticação do /admin OK")
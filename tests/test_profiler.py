@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.profiler import RequestProfiler, run_sampled
+
+
+def _trabalho_pesado(segundos):
+    fim = time.perf_counter() + segundos
+    total = 0
+    while time.perf_counter() < fim:
+        total += sum(range(200))
+    return total
+
+
+def test_perfil_em_pilhas_colapsadas(tmp_path):
+    """O perfil grava pilhas colapsadas (formato flamegraph) da thread perfilada"""
+    profiler = RequestProfiler(str(tmp_path), interval_ms=1)
+
+    with profiler.profile("chat-teste") as sampler:
+        _trabalho_pesado(0.1)
+
+    assert sampler.samples > 10
+    with open(sampler.path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_trabalho_pesado" in line.split(";")[-1] for line in lines)
+    print("✅ Pilhas colapsadas OK")
+
+
+def test_perfil_inclui_threads_de_executor(tmp_path):
+    """Trabalho submetido com run_sampled entra no perfil da requisição, com o nome da thread"""
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+
+    profiler = RequestProfiler(str(tmp_path), interval_ms=1)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative") as executor:
+        with profiler.profile("chat-executor") as sampler:
+            executor.submit(contextvars.copy_context().run, run_sampled, _trabalho_pesado, 0.1).result()
+        # Fora do perfil a thread não é mais acompanhada
+        executor.submit(run_sampled, _trabalho_pesado, 0.01).result()
+
+    worker_stacks = [stack for stack in sampler.stacks if stack.startswith("thread speculative")]
+    assert worker_stacks
+    assert any("_trabalho_pesado" in stack.split(";")[-1] for stack in worker_stacks)
+    print("✅ Threads de executor no perfil OK")
+
+
+def test_limite_de_perfis_simultaneos(tmp_path):
+    """Acima do limite a requisição roda sem perfil"""
+    profiler = RequestProfiler(str(tmp_path), max_concurrent=1)
+
+    with profiler.profile("primeiro") as first:
+        with profiler.profile("segundo") as second:
+            assert second is None
+    assert first is not None
+    assert len(os.listdir(tmp_path)) == 1
+    print("✅ Limite de perfis OK")
+
+
+def test_header_x_profile_no_chat(tmp_path, monkeypatch, fake_llm):
+    """Header X-Profile perfila só aquela requisição e devolve o arquivo gerado"""
+    from fastapi.testclient import TestClient
+    import app.main as main
+    from app.core.chatbot import Chatbot
+
+    monkeypatch.setattr(main, "chatbot", Chatbot(main.rag_engine, fake_llm))
+    monkeypatch.setattr(main, "profiler", RequestProfiler(str(tmp_path), interval_ms=1))
+    client = TestClient(main.app)
+    body = {"message": "Quanto recebi (líquido) em maio/2025? (Ana Souza)"}
+
+    # Desligado por padrão: o header sozinho não liga o perfil
+    assert "X-Profile-File" not in client.post("/chat", json=body, headers={"X-Profile": "1"}).headers
+
+    monkeypatch.setattr(main.settings, "PROFILE_HEADER_ENABLED", True)
+    assert "X-Profile-File" not in client.post("/chat", json=body).headers
+    response = client.post("/chat", json=body, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert os.path.exists(tmp_path / response.headers["X-Profile-File"])
+    print("✅ Header X-Profile OK")
@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.chatbot import Chatbot
+from app.core.prompt_builder import PromptBuilder, count_message_tokens, estimate_tokens, strip_evidence
+
+EVIDENCE_ANSWER = (
+    "**Ana Souza** recebeu R$ 8.418,75 em maio/2025.\n\n"
+    "| Competência | Líquido | Data |\n"
+    "|---|---|---|\n"
+    + "".join(f"| 2025-{m:02d} | R$ 8.418,75 | 2025-{m:02d}-28 |\n" for m in range(1, 13))
+    + "🔗 **Fonte:** payroll.csv"
+)
+
+
+def test_strip_evidence_e_orcamento():
+    """Histórico sem tabelas de evidência e prompt dentro do orçamento"""
+    stripped = strip_evidence(EVIDENCE_ANSWER)
+    assert stripped == "Ana Souza recebeu R$ 8.418,75 em maio/2025."
+
+    history = []
+    for i in range(30):
+        history.append({"role": "user", "content": f"Quanto a Ana recebeu no mês {i}? " * 3})
+        history.append({"role": "assistant", "content": EVIDENCE_ANSWER})
+
+    builder = PromptBuilder("""
+        Você é um assistente de folha.
+        Responda em português.
+        """, max_tokens=300, recent_messages=4)
+    prompt = builder.build(history, "E o bônus dela?")
+
+    assert prompt.tokens <= 300
+    assert prompt.tokens == count_message_tokens(prompt.messages)
+    assert prompt.messages[0]["content"] == "Você é um assistente de folha.\nResponda em português."
+    assert prompt.messages[-1] == {"role": "user", "content": "E o bônus dela?"}
+    assert prompt.dropped > 0
+    assert not any("|" in m["content"] for m in prompt.messages)
+    print(f"✅ Prompt com {prompt.tokens} tokens ({prompt.summarized} resumidas, {prompt.dropped} descartadas)")
+
+
+def test_chatbot_nao_duplica_mensagem_e_registra_tokens(fake_llm):
+    """A mensagem atual entra uma vez só no prompt e os tokens vão para a resposta"""
+    llm = fake_llm
+    chatbot = Chatbot(None, llm)  # perguntas gerais não passam pelo RAG
+    chatbot.process_message("Olá, tudo bem?", "c1")
+    response = chatbot.process_message("Qual é a capital do Brasil?", "c1")
+
+    contents = [m["content"] for m in llm.prompts[-1]]
+    assert contents.count("Qual é a capital do Brasil?") == 1
+    assert "Olá, tudo bem?" in contents
+    assert response.tokens_used == count_message_tokens(llm.prompts[-1]) + estimate_tokens("Resposta simulada")
+    print(f"✅ tokens_used={response.tokens_used}")
@@ -0,0 +1,104 @@
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.resilience import (
+    CIRCUIT_STATE, CircuitBreaker, CircuitOpenError, DeadlineExceeded, get_breaker,
+    outbound_timeout, remaining_time, request_deadline, reset_breakers,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _falha():
+    raise ConnectionError("upstream fora do ar")
+
+
+def test_circuit_breaker_meio_aberto():
+    """Abre após falhas seguidas, testa uma chamada após o tempo de recuperação e fecha com sucesso"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("teste_breaker", failure_threshold=3, recovery_timeout_s=10, clock=clock)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(_falha)
+    assert breaker.state == "open"
+    assert CIRCUIT_STATE.value(dependency="teste_breaker") == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "não deveria rodar")
+
+    # Meio-aberto: uma chamada de teste; falha reabre o circuito
+    clock.now = 10
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        breaker.call(_falha)
+    assert breaker.state == "open"
+
+    clock.now = 20
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # só uma chamada de teste por vez
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert CIRCUIT_STATE.value(dependency="teste_breaker") == 0
+    print("✅ Circuit breaker OK")
+
+
+def test_prazo_da_requisicao():
+    """Prazos aninhados não estendem o externo; timeout das chamadas respeita o que resta"""
+    assert remaining_time() is None
+    assert outbound_timeout(10) == 10
+
+    with request_deadline(0.5):
+        with request_deadline(60):
+            assert remaining_time() <= 0.5
+        assert outbound_timeout(10) <= 0.5
+
+    with request_deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            outbound_timeout(10, "openai")
+    print("✅ Prazo da requisição OK")
+
+
+def test_llm_degradado_com_circuito_aberto():
+    """Com o OpenAI fora do ar o circuito abre e as respostas degradadas saem na hora"""
+    from app.services.llm_service import DEGRADED_RESPONSE, LLMService
+
+    calls = []
+
+    class BrokenCompletions:
+        def create(self, **kwargs):
+            calls.append(kwargs["timeout"])
+            raise TimeoutError("timeout simulado")
+
+    llm = LLMService.__new__(LLMService)
+    llm.model = "modelo-teste"
+    llm.client = type("Client", (), {"chat": type("Chat", (), {"completions": BrokenCompletions()})()})()
+
+    reset_breakers()
+    try:
+        messages = [{"role": "user", "content": "Olá"}]
+        threshold = get_breaker("openai").failure_threshold
+        for _ in range(threshold):
+            assert llm.generate_response(messages) != DEGRADED_RESPONSE
+        assert llm.generate_response(messages) == DEGRADED_RESPONSE
+        assert len(calls) == threshold
+
+        reset_breakers()
+        with request_deadline(0.0):
+            assert llm.generate_response(messages) == DEGRADED_RESPONSE
+        assert len(calls) == threshold
+    finally:
+        reset_breakers()
+    print("✅ Resposta degradada do LLM OK")
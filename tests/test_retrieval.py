@@ -0,0 +1,59 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.chatbot import Chatbot
+from app.core.retrieval import HashingEmbedder, PayrollRetriever, VectorIndex, load_faq
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from benchmarks.datasets import make_payroll_data
+
+
+def test_ivf_com_todas_as_listas_igual_a_busca_exaustiva():
+    """Sondando todas as listas, o IVF devolve o mesmo top-k da busca exaustiva"""
+    service = PayrollService(make_payroll_data(2000))
+    texts = [f"{row['name']} {row['competency']}" for row in service.data.to_dict("records")]
+
+    ivf = VectorIndex(HashingEmbedder(256), ivf_threshold=100, n_lists=16, n_probe=16).build(texts)
+    plain = VectorIndex(HashingEmbedder(256), ivf_threshold=10 ** 9).build(texts)
+    assert ivf.uses_ivf and not plain.uses_ivf
+
+    for query in ["Ana Souza 2025-05", "Colaborador 0000042 2024-11", "Bruno Lima março"]:
+        assert [round(s, 5) for _, s in ivf.search(query, 4)] == [round(s, 5) for _, s in plain.search(query, 4)]
+    print("✅ IVF com n_probe = n_lists bate com a busca exaustiva")
+
+
+def test_matriz_em_blocos_igual_a_bloco_unico():
+    """Montar a matriz em blocos pequenos dá o mesmo resultado que um bloco só (inclusive texto vazio)"""
+    texts = ["Ana Souza maio 2025", "", "de da do", "Bruno Lima holerite junho", "13º salário"] * 7
+
+    whole = HashingEmbedder(128)
+    chunked = HashingEmbedder(128)
+    chunked.chunk_rows = 3
+    matrix = chunked.fit_transform(texts)
+
+    assert matrix.dtype == np.float32
+    assert np.array_equal(matrix, whole.fit_transform(texts))
+    assert np.array_equal(chunked.idf, whole.idf)
+    print("✅ Matriz em blocos OK")
+
+
+def test_chatbot_envia_contexto_recuperado_ao_llm(fake_llm):
+    """Pergunta geral recebe o trecho da FAQ no prompt; pergunta fora do domínio não recebe nada"""
+    service = PayrollService(PayrollData("data/payroll.csv"))
+    retriever = PayrollRetriever(service, load_faq("data/faq.jsonl"))
+    llm = fake_llm
+    chatbot = Chatbot(None, llm, retriever=retriever)
+
+    response = chatbot.process_message("Como funciona o décimo terceiro?", "c1")
+    context = [m["content"] for m in llm.prompts[-1] if m["content"].startswith("Dados recuperados")]
+    assert context and "13º salário" in context[0]
+    assert "faq.jsonl" in response.sources
+
+    response = chatbot.process_message("Qual é a capital do Brasil?", "c2")
+    assert not any(m["content"].startswith("Dados recuperados") for m in llm.prompts[-1])
+    assert response.sources == [] and response.evidence == []
+    print("✅ Contexto recuperado só quando relevante")
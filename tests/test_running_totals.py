@@ -0,0 +1,53 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from benchmarks.datasets import make_payroll_data
+
+
+def test_acumulados_batem_com_pandas_apos_inclusao_de_competencia():
+    """YTD e total entre meses iguais ao filtro+soma, antes e depois de incluir uma competência nova"""
+    full = make_payroll_data(20000).df
+    service = PayrollService(make_payroll_data(20000))
+    service.data = full[full["competency"] < "2025-12"].reset_index(drop=True)
+    name = "Colaborador 0000042"
+    # Sem until_month, o acumulado vai até a última competência do funcionário no ano
+    assert service.last_competency(name, 2025) == "2025-11"
+    assert service.ytd_totals(name, 2025) == service.ytd_totals(name, 2025, until_month=11)
+    assert service.ytd_totals(name, 2030) is None
+
+    # Competência nova só estende as somas acumuladas já materializadas
+    service.append_records(full[full["competency"] == "2025-12"])
+    assert service.last_competency(name, 2025) == "2025-12"
+
+    rows = full[full["name"] == name]
+    ytd = service.ytd_totals(name, 2025)
+    expected = rows[rows["competency"].str.startswith("2025")]
+    for field in ("net_pay", "deductions_inss", "bonus"):
+        assert abs(ytd[field] - expected[field].sum()) < 0.01
+
+    between = service.period_totals(name, "2024-11", "2025-02")
+    expected = rows[(rows["competency"] >= "2024-11") & (rows["competency"] <= "2025-02")]
+    assert abs(between["net_pay"] - expected["net_pay"].sum()) < 0.01
+    assert service.period_totals("Fulano Inexistente") is None
+    print("✅ Somas acumuladas iguais ao pandas, inclusive após a competência nova")
+
+
+def test_rag_responde_acumulado_do_ano_e_intervalo():
+    """'Até agora' soma o ano até a última competência; 'de X a Y' soma só o intervalo"""
+    rag = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+
+    response, evidence = rag.process_query("Quanto a Ana recebeu até agora em 2025?")
+    assert "R$ 46.812,50" in response and "Junho/2025" in response
+    assert len(evidence) == 6
+
+    response, evidence = rag.process_query("Acumulado de INSS do Bruno no ano")
+    assert "INSS" in response and "R$ 3.960,00" in response
+
+    response, evidence = rag.process_query("Bônus da Ana de fevereiro a abril de 2025")
+    assert "R$ 800,00" in response and len(evidence) == 3
+    print("✅ Acumulados respondidos pelo RAG")
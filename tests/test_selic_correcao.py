@@ -0,0 +1,60 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from app.services.selic import build_selic_series, load_selic_series
+
+
+def test_fator_acumulado_igual_a_capitalizacao_dia_a_dia():
+    """cum[d1] / cum[d0] bate com o produto dos fatores diários; feriado e fim de semana não rendem"""
+    series = load_selic_series("data/selic.json")
+
+    # 19/06/2025 é feriado (Corpus Christi) e a meta de 15% vale desde esse dia: 4 dias úteis até 26/06
+    assert series.rate_on("2025-06-19") == 14.9
+    assert abs(series.factor("2025-06-19", "2025-06-26") - 1.149 ** (4 / 252)) < 1e-12
+
+    start, end = np.datetime64("2024-03-01"), np.datetime64("2025-06-01")
+    expected = 1.0
+    for day in np.arange(start, end):
+        i = int((day - series.first_day).astype(int))
+        if series.business_days[i]:
+            expected *= (1 + series.daily_rates[i] / 100) ** (1 / 252)
+    assert abs(series.factor(start, end) - expected) < 1e-12
+    assert abs(series.factor(start, "2024-09-10") * series.factor("2024-09-10", end) - expected) < 1e-12
+
+    payments = np.array(["2024-01-28", "2025-05-28"], dtype="datetime64[D]")
+    vectorized = series.factor(payments, "2026-01-01")
+    assert abs(vectorized[1] - series.factor("2025-05-28", "2026-01-01")) < 1e-15
+
+    # Série com outra versão das decisões: o fator muda só a partir da nova meta
+    other = build_selic_series([{"meeting": "2022-12-01", "target": 10.0}, {"meeting": "2023-06-30", "target": 20.0}],
+                               "2023-01-01", "2023-12-31")
+    assert other.rate_on("2023-06-30") == 10.0 and other.rate_on("2023-07-01") == 20.0
+    print("✅ Correção pela Selic em O(1) igual à capitalização diária")
+
+
+def test_rag_corrige_bonus_pela_selic():
+    """'Bônus de maio da Ana corrigido pela Selic' usa o pagamento de 28/05/2025 e a série local"""
+    rag = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    series = rag.selic_series
+    until = series.clamp(date.today())
+    corrected = 1200 * series.factor("2025-05-28", np.datetime64(until) + 1)
+
+    response, evidence = rag.process_query("Quanto valeria o bônus de maio da Ana corrigido pela Selic?")
+    expected = f"R$ {corrected:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    assert expected in response and "28/05/2025" in response
+    assert len(evidence) == 1
+
+    response, evidence = rag.process_query("Bônus do Bruno em 2025 corrigidos pela Selic")
+    assert "Total: R$ 2.800,00" in response and len(evidence) == 4
+
+    response, _ = rag.process_query("quanto valeria meu bônus de maio corrigido pela Selic")
+    assert "informe o funcionário" in response
+    print("✅ Valores da folha corrigidos pela Selic no RAG")
@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.models.schemas import SimulationScenario
+from app.services.payroll_service import PayrollService
+from app.services.payroll_simulation import PayrollSimulator
+from app.services.payroll_tax import recompute_payroll
+from benchmarks.datasets import make_payroll_data
+
+
+def test_simulacao_bate_com_recalculo_sobre_copia_da_folha():
+    """Totais do cenário iguais ao recálculo de uma cópia alterada; base em cache acompanha append_records"""
+    full = make_payroll_data(20000).df
+    service = PayrollService(make_payroll_data(20000))
+    service.data = full[full["competency"] < "2025-12"].reset_index(drop=True)
+    simulator = PayrollSimulator(service)
+
+    assert all(v == 0 for v in simulator.run(SimulationScenario(year=2025)).delta.values())
+    service.append_records(full[full["competency"] == "2025-12"])
+    result = simulator.run(SimulationScenario(base_salary_pct=8, bonus_amount=100, year=2025))
+
+    # Mesmo cenário aplicado numa cópia da folha
+    copy = full[full["competency"].str.startswith("2025")].copy()
+    copy["base_salary"] = (copy["base_salary"] * 1.08).round(2)
+    copy["bonus"] = copy["bonus"] + 100
+    tables = service.auditor.tables
+    expected = recompute_payroll(tables, copy, tables.version_index(copy["competency"].tolist()))
+
+    assert result.record_count == len(copy)
+    assert abs(result.simulated["net_pay"] - expected["net_pay"].sum()) < 0.05
+    assert abs(result.simulated["deductions_irrf"] - expected["deductions_irrf"].sum()) < 0.05
+    assert abs(result.delta["bonus"] - 100 * len(copy)) < 0.01
+    assert abs(sum(c["net_pay"] for c in result.by_competency.values()) - result.delta["net_pay"]) < 0.05
+    print("✅ Cenário vetorizado igual ao recálculo da cópia")
+
+
+def test_rag_responde_cenario_what_if():
+    """'E se o salário base subir 8%?' e bônus fixo num mês viram SimulationScenario"""
+    rag = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+
+    response, _ = rag.process_query("E se o salário base subir 8%?")
+    assert "Simulação" in response and "12 registros" in response
+    assert "R$ 6.720,00" in response
+
+    response, _ = rag.process_query("Qual o impacto de um bônus de R$ 1.000 para todos em junho?")
+    assert "Junho/2025" in response and "R$ 2.000,00" in response
+
+    response, _ = rag.process_query("Simula um cenário")
+    assert "Informe a mudança" in response
+    print("✅ Simulações respondidas pelo RAG")
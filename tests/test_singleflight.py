@@ -0,0 +1,62 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.singleflight import SINGLEFLIGHT_SAVED_TOTAL, SingleFlight
+
+
+def test_chamadas_identicas_compartilham_resultado():
+    """Chamadas simultâneas com a mesma chave executam uma vez só"""
+    flight = SingleFlight("teste_sf")
+    calls = []
+    release = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        release.wait(2)
+        return {"taxa": "15.00%"}
+
+    saved_before = SINGLEFLIGHT_SAVED_TOTAL.value(group="teste_sf")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "selic", slow_call) for _ in range(8)]
+        deadline = time.time() + 2
+        while SINGLEFLIGHT_SAVED_TOTAL.value(group="teste_sf") - saved_before < 7 and time.time() < deadline:
+            time.sleep(0.005)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(r == {"taxa": "15.00%"} for r in results)
+    assert SINGLEFLIGHT_SAVED_TOTAL.value(group="teste_sf") - saved_before == 7
+    assert flight.in_flight() == 0
+
+    # Depois de concluída, a próxima chamada executa de novo (não é cache)
+    flight.do("selic", slow_call)
+    assert len(calls) == 2
+    print("✅ Single-flight OK")
+
+
+def test_erro_propagado_para_quem_espera():
+    """Exceção do leader chega a todos que estavam esperando"""
+    flight = SingleFlight("teste_sf_erro")
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise ConnectionError("Serper fora do ar")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "selic", failing)
+        started.wait(1)
+        follower = pool.submit(flight.do, "selic", failing)
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result()
+    print("✅ Erro compartilhado OK")
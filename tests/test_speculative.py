@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import app.core.chatbot as chatbot_module
+from app.core.chatbot import (
+    SPECULATIVE_SAVED_SECONDS, SPECULATIVE_TOTAL, SPECULATIVE_WASTED_TOKENS, Chatbot, PathResult,
+    is_valid_result,
+)
+from app.core.rag_engine import RAGEngine
+from app.models.payroll import PayrollData
+from app.services.payroll_service import PayrollService
+from app.utils.config import settings
+from tests.conftest import FakeLLM
+
+
+def _chatbot(llm):
+    return Chatbot(RAGEngine(PayrollService(PayrollData("data/payroll.csv"))), llm)
+
+
+def test_llm_responde_quando_rag_nao_resolve():
+    """Palavra de folha sem funcionário: o RAG pede mais dados e a resposta do LLM é usada"""
+    llm_wins = SPECULATIVE_TOTAL.value(winner="llm")
+    saved = SPECULATIVE_SAVED_SECONDS.snapshot()["count"]
+
+    llm = FakeLLM(delay_s=0.05)
+    response = _chatbot(llm).process_message("Qual foi o desconto de INSS no holerite?", "s1")
+
+    assert response.response == "Resposta simulada"
+    assert llm.calls == 1 and response.tokens_used > 0
+    assert SPECULATIVE_TOTAL.value(winner="llm") == llm_wins + 1
+    assert SPECULATIVE_SAVED_SECONDS.snapshot()["count"] == saved + 1
+    print("✅ Sem a ida e volta do 'funcionário não encontrado'")
+
+
+def test_rag_vence_e_tokens_do_llm_sao_contabilizados(monkeypatch):
+    """Modelo sem confiança: o RAG responde sem esperar o LLM, cujo custo vira desperdício"""
+    monkeypatch.setattr(settings, "INTENT_CONFIDENCE_THRESHOLD", 1.01)
+    rag_wins = SPECULATIVE_TOTAL.value(winner="rag")
+    wasted = SPECULATIVE_WASTED_TOKENS.value()
+
+    llm = FakeLLM(delay_s=0.5)
+    start = time.perf_counter()
+    response = _chatbot(llm).process_message("Qual o salário líquido da Ana Souza em maio de 2025?", "s2")
+    assert time.perf_counter() - start < 0.5
+
+    assert response.evidence and response.tokens_used == 0
+    assert SPECULATIVE_TOTAL.value(winner="rag") == rag_wins + 1
+
+    deadline = time.time() + 5
+    while SPECULATIVE_WASTED_TOKENS.value() == wasted and time.time() < deadline:
+        time.sleep(0.05)
+    assert SPECULATIVE_WASTED_TOKENS.value() > wasted
+    print("✅ RAG venceu; LLM descartado entrou na conta de tokens desperdiçados")
+
+
+def test_sem_modelo_pergunta_resolvivel_vai_direto_ao_rag(monkeypatch):
+    """Roteador desligado: palavra de folha com funcionário vai ao RAG sem chamar o LLM"""
+    monkeypatch.setattr(settings, "INTENT_ROUTER_ENABLED", False)
+    speculated = sum(SPECULATIVE_TOTAL.value(winner=w) for w in ("rag", "llm", "none"))
+
+    llm = FakeLLM()
+    chatbot = _chatbot(llm)
+    assert chatbot.intent_router is None
+
+    response = chatbot.process_message("Qual o salário líquido da Ana Souza em maio de 2025?", "s3")
+    assert response.evidence and response.tokens_used == 0
+    assert llm.calls == 0
+
+    # Sem funcionário o RAG não resolve: aí sim corre junto com o LLM
+    response = chatbot.process_message("Qual foi o desconto de INSS no holerite?", "s4")
+    assert response.response == "Resposta simulada"
+    assert sum(SPECULATIVE_TOTAL.value(winner=w) for w in ("rag", "llm", "none")) == speculated + 1
+    print("✅ Sem modelo, só especula quando o RAG não resolve")
+
+
+def test_pedidos_de_mais_dados_nao_sao_resposta_valida():
+    """Respostas do RAG que pedem para perguntar de novo perdem para o LLM na especulação"""
+    rag_engine = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+
+    def rag_result(query):
+        answer = rag_engine.answer(query)
+        return PathResult("rag", answer.text, answer.evidence, [], 0, None, 0.0, answer.resolved)
+
+    assert not is_valid_result(rag_result("E se a folha mudar?"))
+    assert is_valid_result(rag_result("E se o salário base subir 8%?"))
+    assert not is_valid_result(rag_result("Quanto vale corrigido pela Selic?"))
+    assert is_valid_result(rag_result("R$ 1.000 de janeiro de 2024 corrigidos pela Selic"))
+    assert not is_valid_result(rag_result("Qual o salário do Carlos Pereira?"))
+    assert not is_valid_result(rag_result("Bom dia, tudo bem?"))
+    print("✅ Pedidos de mais dados do RAG não contam como resposta")
+
+
+def test_periodo_sem_registros_e_resposta_resolvida():
+    """'Não foram encontrados registros' é uma resposta fundamentada na folha, não um pedido de mais dados"""
+    rag_engine = RAGEngine(PayrollService(PayrollData("data/payroll.csv")))
+    answer = rag_engine.answer("Qual o salário líquido da Ana em maio de 2019?")
+
+    assert answer.text.startswith("Não foram encontrados registros") and answer.resolved
+    assert rag_engine.process_query("Qual o salário líquido da Ana em maio de 2019?") == (answer.text, answer.evidence)
+    print("✅ Período sem registros conta como resposta do RAG")
+
+
+def test_chatbots_compartilham_o_executor_especulativo(fake_llm):
+    """O pool de threads da especulação é do módulo, não um por instância de Chatbot"""
+    assert not hasattr(_chatbot(fake_llm), "_executor")
+    assert chatbot_module._speculative_executor() is chatbot_module._speculative_executor()
+    print("✅ Executor especulativo compartilhado")
@@ -0,0 +1,63 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.payroll import PayrollData
+from app.models.schemas import PayrollQuery
+from app.services.payroll_query import PayrollQueryService
+from app.services.payroll_service import PayrollService
+from benchmarks.datasets import make_payroll_data
+
+
+def test_lote_igual_ao_filtro_do_pandas():
+    """Agregados do lote (reduceat) batem com o filtro direto no DataFrame; consulta inválida não derruba o lote"""
+    service = PayrollService(make_payroll_data(5000))
+    df = service.data
+    queries = [
+        PayrollQuery(employee_name="Ana Souza", competency="2025-05", query_type="specific"),
+        PayrollQuery(employee_name="bruno", year=2024, query_type="aggregate"),
+        PayrollQuery(year=2025, month=3, query_type="aggregate"),
+        PayrollQuery(employee_name="Ninguém", query_type="aggregate"),
+        PayrollQuery(employee_name="Ana Souza", query_type="specific"),
+    ]
+    results = PayrollQueryService(service, max_evidence=10).run_many(queries)
+
+    expected = [
+        df[(df["name"] == "Ana Souza") & (df["competency"] == "2025-05")],
+        df[(df["name"] == "Bruno Lima") & df["competency"].str.startswith("2024")],
+        df[df["competency"] == "2025-03"],
+    ]
+    for result, rows in zip(results, expected):
+        assert result.error is None and result.record_count == len(rows)
+        assert abs(result.aggregates["net_pay_total"] - rows["net_pay"].sum()) < 0.01
+        assert abs(result.aggregates["bonus_total"] - rows["bonus"].sum()) < 0.01
+        assert result.aggregates["net_pay_max"] == rows["net_pay"].max()
+        assert len(result.evidence) == min(10, len(rows))
+    assert results[2].evidence_truncated
+    assert results[3].record_count == 0 and results[3].error is None
+    assert results[4].error and "specific" in results[4].error
+    print("✅ Lote de consultas estruturadas OK")
+
+
+def test_endpoint_query_avulsa_e_em_lote(monkeypatch):
+    """/query aceita uma PayrollQuery ou uma lista, sem passar pelo chatbot"""
+    from fastapi.testclient import TestClient
+    import app.main as main
+
+    monkeypatch.setattr(main, "query_service", PayrollQueryService(PayrollService(PayrollData("data/payroll.csv"))))
+    client = TestClient(main.app)
+
+    response = client.post("/query", json={"employee_name": "Ana Souza", "competency": "2025-05", "query_type": "specific"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["evidence"][0]["net_pay"] == body["aggregates"]["net_pay_total"]
+
+    response = client.post("/query", json=[{"employee_name": "Bruno Lima", "year": 2025, "query_type": "aggregate"},
+                                           {"query_type": "comparison"}])
+    assert response.status_code == 200
+    batch = response.json()
+    assert batch[0]["record_count"] == 6 and batch[1]["error"]
+
+    assert client.post("/query", json={"query_type": "comparison"}).status_code == 400
+    print("✅ /query OK")
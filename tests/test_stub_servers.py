@@ -0,0 +1,48 @@
+import sys
+import os
+
+import requests
+from openai import OpenAI
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import llm_service as llm_module
+from app.services.llm_service import LLMService
+from app.utils.resilience import reset_breakers
+from scripts.stub_servers import OpenAIStub, SerperStub, StubBehavior
+
+
+def test_llm_service_fala_com_stub_openai(monkeypatch):
+    """LLMService chama o stub via LLM_BASE_URL; streaming chega em pedaços"""
+    with OpenAIStub(StubBehavior(latency_ms=5, tokens_per_s=2000), reply="Olá do stub local.") as stub:
+        monkeypatch.setattr(llm_module.settings, "LLM_BASE_URL", stub.base_url)
+        monkeypatch.setattr(llm_module.settings, "OPENAI_API_KEY", "stub-key")
+        reset_breakers()
+
+        service = LLMService()
+        assert service.generate_response([{"role": "user", "content": "Oi"}]) == "Olá do stub local."
+
+        client = OpenAI(api_key="stub-key", base_url=stub.base_url)
+        stream = client.chat.completions.create(
+            model="stub-model", messages=[{"role": "user", "content": "Oi"}], stream=True
+        )
+        deltas = [chunk.choices[0].delta.content for chunk in stream if chunk.choices[0].delta.content]
+        assert len(deltas) == 4
+        assert "".join(deltas) == "Olá do stub local."
+        assert stub.requests == 2
+    print(f"✅ Stream com {len(deltas)} pedaços")
+
+
+def test_injecao_de_erros_e_serper():
+    """error_rate=1 sempre falha; Serper responde no formato organic e exige a chave"""
+    with OpenAIStub(StubBehavior(error_rate=1.0, error_status=503)) as failing:
+        resp = requests.post(f"{failing.base_url}/chat/completions", json={"messages": []}, timeout=5)
+        assert resp.status_code == 503
+        assert failing.errors == 1
+
+    with SerperStub(api_key="chave") as serper:
+        ok = requests.post(f"{serper.url}/search", json={"q": "selic"}, headers={"X-API-KEY": "chave"}, timeout=5)
+        denied = requests.post(f"{serper.url}/search", json={"q": "selic"}, timeout=5)
+        assert ok.json()["organic"][0]["snippet"].startswith("A taxa Selic")
+        assert denied.status_code == 403
+    print("✅ Erros injetados e Serper stub ok")
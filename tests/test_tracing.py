@@ -0,0 +1,68 @@
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.tracing import Tracer, JsonlSpanExporter, current_span
+
+
+def _read_traces(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_aninhados_exportados(tmp_path):
+    """Spans filhos herdam o trace do span raiz via contextvars"""
+    exporter = JsonlSpanExporter(str(tmp_path))
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with tracer.start_span("POST /chat") as root:
+        with tracer.start_span("rag.process_query", query_type="net_pay_specific"):
+            current_span().set_attribute("employee", "ana souza")
+
+    traces = _read_traces(exporter.path)
+    spans = traces[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, parent = spans
+    assert parent["name"] == "POST /chat"
+    assert child["traceId"] == parent["traceId"] == root.trace_id
+    assert child["parentSpanId"] == parent["spanId"]
+    assert {"key": "employee", "value": {"stringValue": "ana souza"}} in child["attributes"]
+    print("✅ Spans aninhados OK")
+
+
+def test_tail_sampling_mantem_requisicoes_lentas(tmp_path):
+    """Com amostragem 0, só traces lentos ou com erro são exportados"""
+    exporter = JsonlSpanExporter(str(tmp_path))
+    tracer = Tracer(exporter, sample_rate=0.0, slow_threshold_ms=20)
+
+    with tracer.start_span("rapida"):
+        pass
+    with tracer.start_span("lenta"):
+        time.sleep(0.03)
+    try:
+        with tracer.start_span("com_erro"):
+            raise ValueError("falha")
+    except ValueError:
+        pass
+
+    names = [t["resourceSpans"][0]["scopeSpans"][0]["spans"][-1]["name"] for t in _read_traces(exporter.path)]
+    assert names == ["lenta", "com_erro"]
+    print("✅ Tail sampling OK")
+
+
+def test_rotacao_por_tamanho(tmp_path):
+    """O arquivo de traces é rotacionado ao atingir o tamanho máximo"""
+    exporter = JsonlSpanExporter(str(tmp_path), max_bytes=2000, backup_count=2)
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    for _ in range(30):
+        with tracer.start_span("span", payload="x" * 200):
+            pass
+
+    assert os.path.exists(exporter.path + ".1")
+    assert os.path.exists(exporter.path + ".2")
+    assert not os.path.exists(exporter.path + ".3")
+    assert os.path.getsize(exporter.path) <= 2000
+    print("✅ Rotação OK")
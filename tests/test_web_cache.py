@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.swr_cache import SWRCache
+
+
+class SerperStandIn:
+    """Servidor local que imita o endpoint /search da Serper"""
+
+    def __init__(self, snippet="A taxa Selic está em 15,00% a.a."):
+        self.snippet = snippet
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                stand_in.requests += 1
+                if self.headers.get("X-API-KEY") != "chave-teste":
+                    self.send_response(403)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps({"organic": [{"snippet": stand_in.snippet, "link": "https://www.bcb.gov.br/selic"}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def serper(monkeypatch, tmp_path):
+    import app.core.rag_engine as rag_module
+
+    stand_in = SerperStandIn()
+    monkeypatch.setenv("SERPER_API_KEY", "chave-teste")
+    monkeypatch.setattr(rag_module.settings, "SERPER_BASE_URL", stand_in.url)
+    monkeypatch.setattr(rag_module, "web_facts", SWRCache(str(tmp_path)))
+    yield stand_in
+    stand_in.close()
+
+
+def test_selic_servida_do_cache(serper):
+    """Primeira pergunta busca na Serper; as seguintes saem do cache com a idade do valor"""
+    from app.core.rag_engine import RAGEngine
+
+    rag_engine = RAGEngine(payroll_service=None)
+    first, _ = rag_engine.process_query("Qual a taxa Selic atual?")
+    second, _ = rag_engine.process_query("Qual a taxa Selic atual?")
+
+    assert "15,00%" in first and "15,00%" in second
+    assert "🕒 Consultado agora há pouco" in second
+    assert serper.requests == 1
+    print("✅ Selic em cache OK")
+
+
+def test_stale_while_revalidate_compartilhado(tmp_path):
+    """Valor vencido é servido na hora e atualizado em background; outro worker lê o arquivo"""
+    calls = []
+
+    def fetch():
+        calls.append(time.time())
+        return {"snippet": f"valor {len(calls)}"}
+
+    cache = SWRCache(str(tmp_path), ttl_s=0.05)
+    assert cache.get("selic", fetch).value == {"snippet": "valor 1"}
+
+    time.sleep(0.1)
+    stale = cache.get("selic", fetch)
+    assert stale.stale and stale.value == {"snippet": "valor 1"}
+
+    deadline = time.time() + 2
+    while (len(calls) < 2 or cache._refreshing) and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2
+
+    other_worker = SWRCache(str(tmp_path), ttl_s=60)
+    shared = other_worker.get("selic", fetch)
+    assert shared.source == "file" and shared.value == {"snippet": "valor 2"}
+    assert len(calls) == 2
+    print("✅ Stale-while-revalidate OK")
+
+
+def test_falha_no_refresh_mantem_valor_antigo(tmp_path):
+    """Erro na origem durante o refresh não derruba a resposta"""
+    cache = SWRCache(str(tmp_path), ttl_s=0.0)
+    cache.get("selic", lambda: {"snippet": "antigo"})
+
+    def broken():
+        raise ConnectionError("Serper fora do ar")
+
+    for _ in range(3):
+        assert cache.get("selic", broken).value == {"snippet": "antigo"}
+    with pytest.raises(ConnectionError):
+        SWRCache(str(tmp_path / "vazio")).get("selic", broken)
+    print("✅ Falha no refresh OK")
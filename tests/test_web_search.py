@@ -0,0 +1,81 @@
+import sys
+import os
+import time
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.web_search import SELIC_SEARCH_TERMS, WebSearchService
+from app.utils.config import settings
+from app.utils.resilience import CircuitBreaker
+
+
+class FakeSearchBackend:
+    """Backend de busca local: resultados e latência configuráveis por termo"""
+
+    def __init__(self, responses, latency_s=None, errors=()):
+        self.responses = responses
+        self.latency_s = latency_s or {}
+        self.errors = set(errors)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def text(self, query, region=None, max_results=3):
+        with self._lock:
+            self.calls.append(query)
+        time.sleep(self.latency_s.get(query, 0.0))
+        if query in self.errors:
+            raise ConnectionError(f"falha simulada: {query}")
+        return self.responses.get(query, [])[:max_results]
+
+
+BCB = {"title": "Taxa Selic", "href": "https://www.bcb.gov.br/controleinflacao/taxaselic",
+       "body": "O Copom elevou a taxa Selic para 15,00% ao ano."}
+BLOG = {"title": "Blog", "href": "https://blog.exemplo.com/selic", "body": "A Selic está em 99,99%."}
+
+
+def test_saida_antecipada_com_fonte_confiavel():
+    """Primeira fonte confiável com taxa legível encerra a busca sem esperar as lentas"""
+    backend = FakeSearchBackend(
+        {SELIC_SEARCH_TERMS[0]: [BLOG], SELIC_SEARCH_TERMS[1]: [BCB]},
+        latency_s={SELIC_SEARCH_TERMS[0]: 0.05, SELIC_SEARCH_TERMS[2]: 1.0, SELIC_SEARCH_TERMS[3]: 1.0},
+    )
+    service = WebSearchService(backend=backend, deadline_s=5, breaker=CircuitBreaker("teste"))
+
+    start = time.perf_counter()
+    result = service.search_selic_rate()
+    elapsed = time.perf_counter() - start
+
+    assert result['taxa'] == "15.00%"
+    assert "bcb.gov.br" in result['fonte']
+    assert elapsed < 0.5
+    print(f"✅ Saída antecipada OK ({elapsed * 1000:.0f}ms)")
+
+
+def test_prazo_global_e_falhas_parciais():
+    """Prazo global limita a espera; falha de um termo não derruba os outros"""
+    slow = FakeSearchBackend({term: [BCB] for term in SELIC_SEARCH_TERMS},
+                             latency_s={term: 1.0 for term in SELIC_SEARCH_TERMS})
+    start = time.perf_counter()
+    result = WebSearchService(backend=slow, deadline_s=0.1, breaker=CircuitBreaker("teste")).search_selic_rate()
+    assert result['taxa'] == "Não encontrada"
+    assert time.perf_counter() - start < 0.5
+
+    partial = FakeSearchBackend({SELIC_SEARCH_TERMS[3]: [BCB]}, errors=SELIC_SEARCH_TERMS[:3])
+    assert WebSearchService(backend=partial, breaker=CircuitBreaker("teste")).search_selic_rate()['taxa'] == "15.00%"
+
+    broken = FakeSearchBackend({}, errors=SELIC_SEARCH_TERMS)
+    assert WebSearchService(backend=broken, breaker=CircuitBreaker("teste")).search_selic_rate()['taxa'] == "Erro na busca"
+    print("✅ Prazo global e falhas parciais OK")
+
+
+def test_executor_compartilhado_entre_instancias():
+    """Todas as instâncias usam o mesmo pool: buscas abandonadas não acumulam threads"""
+    slow = FakeSearchBackend({term: [BCB] for term in SELIC_SEARCH_TERMS},
+                             latency_s={term: 0.2 for term in SELIC_SEARCH_TERMS})
+    for _ in range(5):
+        WebSearchService(backend=slow, deadline_s=0.01, breaker=CircuitBreaker("teste")).search_selic_rate()
+
+    workers = [t for t in threading.enumerate() if t.name.startswith("web-search")]
+    assert 0 < len(workers) <= settings.WEB_SEARCH_MAX_WORKERS
+    print("✅ Executor compartilhado OK")